@@ -0,0 +1,154 @@
+"""
+Benchmarks for jlr_sort_attributes running on the in-memory fake Maya DG of fake_maya.py.
+
+For nodes with 10, 100 and 1000 user defined attributes it reports the wall time and the number of
+addAttr, deleteAttr, connectAttr and query calls of each operation. Run it from the repository root:
+
+    python benchmarks/bench_jlr_sort_attributes.py
+    python benchmarks/bench_jlr_sort_attributes.py --sizes 10 100 --json baseline.json
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+
+SCENE = fake_maya.install()
+cmds = SCENE.cmds
+
+import jlr_sort_attributes
+
+QUERY_COMMANDS = ['getAttr', 'attributeQuery', 'attributeName', 'listAttr', 'listConnections', 'objExists', 'ls']
+REPORTED_COMMANDS = ['addAttr', 'deleteAttr', 'connectAttr', 'setAttr']
+
+
+def build_node(name, attr_count):
+    """
+    It creates a transform with attr_count user defined attributes. One of every ten attributes is a double3
+    compound, one of every seven is connected to a multiplyDivide node and one of every five is locked.
+    :param name: String. Node name.
+    :param attr_count: int. Number of top level user defined attributes.
+    :return: String. Node name.
+    """
+    node = cmds.createNode('transform', name=name, skipSelect=True)
+    driver = cmds.createNode('multiplyDivide', name='{}_md'.format(name), skipSelect=True)
+
+    for index in range(attr_count):
+        attr_name = 'attr{:04d}'.format(index)
+        if index % 10 == 9:
+            cmds.addAttr(node, longName=attr_name, attributeType='double3', keyable=True)
+            for axis in 'XYZ':
+                cmds.addAttr(node, longName=attr_name + axis, attributeType='double', parent=attr_name,
+                             keyable=True)
+        else:
+            cmds.addAttr(node, longName=attr_name, attributeType='double', keyable=True, minValue=-10,
+                         maxValue=10)
+            cmds.setAttr('{}.{}'.format(node, attr_name), index % 10)
+
+        if index % 7 == 3:
+            cmds.connectAttr('{}.{}'.format(node, attr_name), '{}.input1X'.format(driver), force=True)
+        if index % 5 == 4:
+            cmds.setAttr('{}.{}'.format(node, attr_name), lock=True)
+
+    return node
+
+
+def measure(operation):
+    """
+    It runs an operation and returns its wall time and the DG calls it made.
+    The deferred commands are run as part of the operation, so the chunks of the jobs are measured too.
+    :param operation: callable without arguments.
+    :return: dictionary with the time in milliseconds and the call counts.
+    """
+    SCENE.counts.clear()
+    start = time.time()
+    operation()
+    cmds.flush_deferred()
+    elapsed = (time.time() - start) * 1000.0
+
+    result = {'ms': round(elapsed, 2)}
+    for command in REPORTED_COMMANDS:
+        result[command] = SCENE.counts[command]
+    result['queries'] = sum(SCENE.counts[command] for command in QUERY_COMMANDS)
+    result['total'] = sum(SCENE.counts.values())
+    return result
+
+
+def select_channels(node, attributes):
+    SCENE.selection = [node]
+    SCENE.channel_box_selection = list(attributes)
+
+
+def bench_size(attr_count):
+    """
+    :param attr_count: int. Number of user defined attributes of the benchmark nodes.
+    :return: dictionary with the results of each operation.
+    """
+    SCENE.reset()
+    node = build_node('ctrl', attr_count)
+    middle = 'attr{:04d}'.format(attr_count // 2)
+    results = dict()
+
+    select_channels(node, [middle])
+    results['move_up_attribute'] = measure(jlr_sort_attributes.move_up_attribute)
+
+    select_channels(node, [middle])
+    results['move_down_attribute'] = measure(jlr_sort_attributes.move_down_attribute)
+
+    results['sort_attributes'] = measure(lambda: jlr_sort_attributes.sort_attributes(node, reverse=True))
+
+    target = cmds.createNode('transform', name='target', skipSelect=True)
+    results['copy_attr'] = measure(lambda: jlr_sort_attributes.copy_attr(node, target, middle))
+
+    copied = ['attr{:04d}'.format(index) for index in range(min(attr_count, 10))]
+    select_channels(node, copied)
+    jlr_sort_attributes.copy_attribute()
+    targets = [cmds.createNode('transform', name='paste{}'.format(index), skipSelect=True) for index in range(10)]
+    SCENE.selection = targets
+    results['paste_attribute'] = measure(jlr_sort_attributes.paste_attribute)
+
+    SCENE.selection = [node] + targets
+    results['lock_trs_attributes'] = measure(jlr_sort_attributes.lock_trs_attributes)
+
+    return results
+
+
+def print_results(all_results):
+    columns = ['ms'] + REPORTED_COMMANDS + ['queries', 'total']
+    header = '{:>6} {:<22}'.format('attrs', 'operation') + ''.join('{:>12}'.format(column) for column in columns)
+    print(header)
+    print('-' * len(header))
+    for attr_count in sorted(all_results):
+        for operation in sorted(all_results[attr_count]):
+            result = all_results[attr_count][operation]
+            print('{:>6} {:<22}'.format(attr_count, operation) +
+                  ''.join('{:>12}'.format(result[column]) for column in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks for jlr_sort_attributes on a fake Maya DG.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Numbers of user defined attributes of the benchmark nodes.')
+    parser.add_argument('--json', help='Path of a json file to save the results as a baseline.')
+    args = parser.parse_args(argv)
+
+    all_results = dict()
+    for attr_count in args.sizes:
+        all_results[attr_count] = bench_size(attr_count)
+
+    print_results(all_results)
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(all_results, json_file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,760 @@
+"""
+In-memory stand-in for the parts of maya.cmds and maya.mel used by jlr_sort_attributes.
+
+It models nodes, user defined attributes, compound children, connections, locks and the channel box
+selection, and it counts every call so the cost of an operation can be measured without Maya.
+
+Usage:
+    import fake_maya
+    scene = fake_maya.install()
+    import jlr_sort_attributes
+"""
+from __future__ import print_function
+
+import collections
+import functools
+import re
+import shlex
+import sys
+import types
+import uuid as uuid_module
+
+COMPOUND_TYPES = {'double2': 2, 'double3': 3, 'float2': 2, 'float3': 3, 'long2': 2, 'long3': 3,
+                  'short2': 2, 'short3': 3}
+DATA_TYPES = ['string', 'matrix', 'doubleArray', 'Int32Array', 'vectorArray', 'pointArray', 'stringArray']
+COUNTED_DATA_TYPES = ['vectorArray', 'pointArray', 'stringArray']
+
+
+def _element_index(plug):
+    match = re.search(r'\[(\d+)\](\.\w+)?$', str(plug))
+    if not match:
+        raise RuntimeError('{} is not an element of a multi attribute.'.format(plug))
+    return int(match.group(1))
+
+
+class FakeAttribute(object):
+
+    def __init__(self, long_name, short_name=None, nice_name=None, attr_type='double', parent=None,
+                 keyable=False, hidden=False, default=0.0, minimum=None, maximum=None, enum=None,
+                 dynamic=True):
+        self.long_name = long_name
+        self.short_name = short_name or long_name
+        self.nice_name = nice_name or long_name
+        self.type = attr_type
+        self.parent = parent
+        self.children = list()
+        self.keyable = keyable
+        self.channel_box = False
+        self.hidden = hidden
+        self.locked = False
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.enum = enum
+        self.dynamic = dynamic
+        self.multi = False
+        self.index_matters = True
+        if attr_type in DATA_TYPES:
+            self.value = '' if attr_type == 'string' else None
+        else:
+            self.value = default
+
+
+class FakeNode(object):
+
+    def __init__(self, name, node_type):
+        self.name = name
+        self.type = node_type
+        self.uuid = str(uuid_module.uuid4()).upper()
+        self.attributes = collections.OrderedDict()
+        self.locked = False
+        self.referenced = False
+
+    def add(self, attribute):
+        self.attributes[attribute.long_name] = attribute
+        if attribute.parent:
+            self.attributes[attribute.parent].children.append(attribute.long_name)
+        return attribute
+
+    def find(self, name):
+        if name in self.attributes:
+            return self.attributes[name]
+        for attribute in self.attributes.values():
+            if attribute.short_name == name:
+                return attribute
+        return None
+
+
+def _add_static_compound(node, long_name, short_name, suffixes, short_suffixes, default=0.0, keyable=True,
+                         child_type='double', parent_type='double3'):
+    node.add(FakeAttribute(long_name, short_name, attr_type=parent_type, keyable=keyable, dynamic=False))
+    for suffix, short_suffix in zip(suffixes, short_suffixes):
+        node.add(FakeAttribute(long_name + suffix, short_name + short_suffix, attr_type=child_type,
+                               parent=long_name, keyable=keyable, default=default, dynamic=False))
+
+
+def _build_static_attributes(node):
+    if node.type in ['transform', 'joint']:
+        for long_name, short_name, default, child_type in [('translate', 't', 0.0, 'doubleLinear'),
+                                                           ('rotate', 'r', 0.0, 'doubleAngle'),
+                                                           ('scale', 's', 1.0, 'double')]:
+            _add_static_compound(node, long_name, short_name, 'XYZ', 'xyz', default=default, child_type=child_type)
+        node.add(FakeAttribute('visibility', 'v', attr_type='bool', keyable=True, default=True, dynamic=False))
+
+    elif node.type == 'pairBlend':
+        node.add(FakeAttribute('weight', 'w', attr_type='double', keyable=True, dynamic=False))
+        for index in ['1', '2']:
+            for long_name, short_name, child_type in [('inTranslate', 'it', 'doubleLinear'),
+                                                      ('inRotate', 'ir', 'doubleAngle')]:
+                node.add(FakeAttribute(long_name + index, short_name + index, attr_type='double3', dynamic=False))
+                for axis in 'XYZ':
+                    node.add(FakeAttribute(long_name + axis + index, short_name + axis.lower() + index,
+                                           attr_type=child_type, parent=long_name + index, dynamic=False))
+        for long_name, short_name, child_type in [('outTranslate', 'ot', 'doubleLinear'),
+                                                  ('outRotate', 'or', 'doubleAngle')]:
+            _add_static_compound(node, long_name, short_name, 'XYZ', 'xyz', keyable=False, child_type=child_type)
+        node.add(FakeAttribute('rotInterpolation', 'ri', attr_type='enum', enum='Euler:Quaternions',
+                               dynamic=False))
+
+    elif node.type == 'plusMinusAverage':
+        node.add(FakeAttribute('operation', 'op', attr_type='enum', enum='No operation:Sum:Subtract:Average',
+                               default=1, dynamic=False))
+        node.add(FakeAttribute('input1D', 'i1', attr_type='float', dynamic=False))
+        node.add(FakeAttribute('output1D', 'o1', attr_type='float', dynamic=False))
+        for size, suffixes in [(2, 'xy'), (3, 'xyz')]:
+            for long_name, short_name in [('input{}D'.format(size), 'i{}'.format(size)),
+                                          ('output{}D'.format(size), 'o{}'.format(size))]:
+                _add_static_compound(node, long_name, short_name, suffixes, suffixes, keyable=False,
+                                     child_type='float', parent_type='float{}'.format(size))
+        for name in ['input1D', 'input2D', 'input2Dx', 'input2Dy', 'input3D', 'input3Dx', 'input3Dy', 'input3Dz']:
+            node.attributes[name].multi = True
+            node.attributes[name].value = dict()
+
+    elif node.type == 'multiplyDivide':
+        for long_name, short_name in [('input1', 'i1'), ('input2', 'i2'), ('output', 'o')]:
+            _add_static_compound(node, long_name, short_name, 'XYZ', 'xyz', keyable=False,
+                                 child_type='float', parent_type='float3')
+
+
+class FakeScene(object):
+    """
+    The fake dependency graph. Every public method of the fake cmds module is recorded in counts.
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.cmds = None
+        self.mel = None
+        self.script_jobs = list()
+        self.reset()
+
+    def reset(self):
+        """
+        It empties the scene, like a new scene, and runs the NewSceneOpened script jobs.
+        """
+        for event, command in list(self.script_jobs):
+            if event == 'NewSceneOpened':
+                command()
+
+        self.nodes = collections.OrderedDict()
+        self.inputs = dict()
+        self.selection = list()
+        self.channel_box_selection = list()
+        self.deferred = list()
+        self.ui = dict()
+        self.undo_stack = list()
+        self.undo_chunk_depth = 0
+        self.refresh_suspended = False
+        self.option_vars = dict()
+        self.batch = False
+        self.progress_cancelled = False
+
+    # --------------------------------------------------------------------------------
+    # Scene helpers used by benchmarks.
+    # --------------------------------------------------------------------------------
+    def create_node(self, node_type, name=None):
+        if not name:
+            index = 1
+            name = '{}{}'.format(node_type, index)
+            while name in self.nodes:
+                index += 1
+                name = '{}{}'.format(node_type, index)
+        node = FakeNode(name, node_type)
+        _build_static_attributes(node)
+        self.nodes[name] = node
+        return name
+
+    def node(self, name):
+        name = str(name).split('|')[-1]
+        if name not in self.nodes:
+            raise RuntimeError('No object matches name: {}'.format(name))
+        return self.nodes[name]
+
+    def resolve(self, plug):
+        node_name, attr_path = str(plug).split('.', 1)
+        node = self.node(node_name)
+        attr_name = attr_path.split('.')[-1].split('[')[0]
+        attribute = node.find(attr_name)
+        if attribute is None:
+            raise RuntimeError('No object matches name: {}'.format(plug))
+        return node, attribute
+
+    def plug_name(self, node, attribute):
+        return '{}.{}'.format(node.name, attribute.long_name)
+
+    def plug_path(self, plug):
+        """
+        It returns the long name of a plug keeping the element indices, like node.input3D[0].input3Dx, so two
+        elements of a multi attribute are two different plugs.
+        """
+        node_name, attr_path = str(plug).split('.', 1)
+        node = self.node(node_name)
+        parts = list()
+        for part in attr_path.split('.'):
+            name, bracket, index = part.partition('[')
+            attribute = node.find(name)
+            if attribute is None:
+                raise RuntimeError('No object matches name: {}'.format(plug))
+            parts.append(attribute.long_name + bracket + index)
+        indexed = [position for position, part in enumerate(parts) if '[' in part]
+        parts = parts[indexed[-1]:] if indexed else parts[-1:]
+        return '{}.{}'.format(node.name, '.'.join(parts))
+
+    def user_attributes(self, node):
+        return [attr for attr in node.attributes.values() if attr.dynamic]
+
+    def connected_inputs(self, plug_name):
+        return self.inputs.get(plug_name)
+
+    def connected_outputs(self, plug_name):
+        return [dst for dst, src in self.inputs.items() if src == plug_name]
+
+    def element_plugs(self, plug_name):
+        """
+        It returns the connected plugs that are the plug itself or one of its elements, or all the connected plugs
+        of a node when it gets a node name.
+        """
+        separator = '[' if '.' in plug_name else '.'
+        plugs = set(self.inputs) | set(self.inputs.values())
+        return sorted(plug for plug in plugs if plug == plug_name or plug.startswith(plug_name + separator))
+
+    def remove_plug_connections(self, plug_name):
+        for plug in self.element_plugs(plug_name):
+            for dst in list(self.inputs):
+                if dst == plug or self.inputs[dst] == plug:
+                    del self.inputs[dst]
+
+
+class FakeCmds(object):
+    """
+    Implementation of the maya.cmds functions used by jlr_sort_attributes.
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+
+    # --------------------------------------------------------------------------------
+    # Attributes
+    # --------------------------------------------------------------------------------
+    def listAttr(self, node, ud=False, userDefined=False, shortNames=False, **kwargs):
+        node = self.scene.node(node)
+        attributes = self.scene.user_attributes(node) if (ud or userDefined) else list(node.attributes.values())
+        if shortNames:
+            return [attr.short_name for attr in attributes] or None
+        return [attr.long_name for attr in attributes] or None
+
+    def attributeQuery(self, attr_name, node=None, **kwargs):
+        fake_node = self.scene.node(node)
+        attribute = fake_node.find(attr_name)
+        if kwargs.get('exists'):
+            return attribute is not None
+        if attribute is None:
+            raise RuntimeError('No attribute {} in {}'.format(attr_name, node))
+        if kwargs.get('attributeType'):
+            if attribute.type in DATA_TYPES:
+                return 'typed'
+            if attribute.type in COMPOUND_TYPES or attribute.children:
+                return attribute.type if attribute.type in COMPOUND_TYPES else 'compound'
+            return attribute.type
+        if kwargs.get('listChildren'):
+            return list(attribute.children) or None
+        if kwargs.get('listParent'):
+            return [attribute.parent] if attribute.parent else None
+        if kwargs.get('hidden'):
+            return attribute.hidden
+        if kwargs.get('listDefault'):
+            return [attribute.default]
+        if kwargs.get('maxExists'):
+            return attribute.maximum is not None
+        if kwargs.get('maximum'):
+            return [attribute.maximum]
+        if kwargs.get('minExists'):
+            return attribute.minimum is not None
+        if kwargs.get('minimum'):
+            return [attribute.minimum]
+        if kwargs.get('listEnum'):
+            return [attribute.enum]
+        if kwargs.get('longName'):
+            return attribute.long_name
+        if kwargs.get('shortName'):
+            return attribute.short_name
+        if kwargs.get('niceName'):
+            return attribute.nice_name
+        if kwargs.get('keyable'):
+            return attribute.keyable
+        if kwargs.get('numberOfChildren'):
+            return len(attribute.children)
+        if kwargs.get('multi'):
+            return attribute.multi
+        if kwargs.get('indexMatters'):
+            return attribute.index_matters
+        raise NotImplementedError('attributeQuery {}'.format(sorted(kwargs)))
+
+    def attributeName(self, plug, long=False, nice=False, short=False):
+        node, attribute = self.scene.resolve(plug)
+        if nice:
+            return attribute.nice_name
+        if short:
+            return attribute.short_name
+        return attribute.long_name
+
+    def getAttr(self, plug, type=False, keyable=False, channelBox=False, lock=False, **kwargs):
+        node, attribute = self.scene.resolve(plug)
+        if type:
+            return attribute.type
+        if keyable:
+            return attribute.keyable
+        if channelBox:
+            return attribute.channel_box
+        if lock:
+            return attribute.locked
+        if attribute.multi:
+            if kwargs.get('multiIndices') or kwargs.get('mi'):
+                return sorted(attribute.value) or None
+            return attribute.value.get(_element_index(plug))
+        if attribute.children:
+            return [tuple(node.attributes[child].value for child in attribute.children)]
+        if attribute.type == 'message':
+            raise RuntimeError('Message attributes have no data values.')
+        return attribute.value
+
+    def setAttr(self, plug, *values, **kwargs):
+        node, attribute = self.scene.resolve(plug)
+        handled = False
+        for flag, field in [('lock', 'locked'), ('l', 'locked'), ('keyable', 'keyable'), ('k', 'keyable'),
+                            ('channelBox', 'channel_box'), ('cb', 'channel_box')]:
+            if flag in kwargs:
+                setattr(attribute, field, bool(kwargs[flag]))
+                if field == 'keyable' and kwargs[flag]:
+                    attribute.channel_box = False
+                handled = True
+        if not values:
+            if not handled:
+                raise RuntimeError('setAttr: no value for {}'.format(plug))
+            return
+        if attribute.locked:
+            raise RuntimeError('The attribute {} is locked or connected and cannot be modified.'.format(plug))
+        plug_name = self.scene.plug_path(plug)
+        if self.scene.connected_inputs(plug_name):
+            raise RuntimeError('The attribute {} is locked or connected and cannot be modified.'.format(plug))
+        if attribute.type in DATA_TYPES and kwargs.get('type') != attribute.type:
+            raise RuntimeError('setAttr: type flag {} does not match {}'.format(kwargs.get('type'), attribute.type))
+        if attribute.type in COUNTED_DATA_TYPES:
+            value = list(values[1:])
+        elif attribute.type in DATA_TYPES:
+            value = values[0] if len(values) == 1 else list(values)
+        else:
+            value = values[0]
+        if attribute.multi:
+            attribute.value[_element_index(plug)] = value
+        elif attribute.children:
+            for child, child_value in zip(attribute.children, values):
+                node.attributes[child].value = child_value
+        else:
+            attribute.value = value
+
+    def addAttr(self, node, **kwargs):
+        if kwargs.get('query') or kwargs.get('q'):
+            attribute = self.scene.resolve(node)[1]
+            if kwargs.get('dataType') or kwargs.get('dt'):
+                return [attribute.type] if attribute.type in DATA_TYPES else None
+            raise NotImplementedError('addAttr query {}'.format(sorted(kwargs)))
+        fake_node = self.scene.node(node)
+        if fake_node.locked:
+            raise RuntimeError('Cannot add attributes to a locked node.')
+        long_name = kwargs.get('longName', kwargs.get('ln'))
+        if fake_node.find(long_name) is not None:
+            raise RuntimeError('Found a duplicate attribute name {}'.format(long_name))
+        attr_type = kwargs.get('attributeType', kwargs.get('at', kwargs.get('dataType', kwargs.get('dt', 'double'))))
+        parent = kwargs.get('parent', kwargs.get('p'))
+        if parent:
+            parent = fake_node.find(parent).long_name
+        attribute = FakeAttribute(long_name, kwargs.get('shortName', kwargs.get('sn')),
+                                  kwargs.get('niceName', kwargs.get('nn')), attr_type=attr_type,
+                                  parent=parent, keyable=kwargs.get('keyable', kwargs.get('k', False)),
+                                  hidden=kwargs.get('hidden', kwargs.get('h', False)),
+                                  default=kwargs.get('defaultValue', kwargs.get('dv', 0.0)),
+                                  minimum=kwargs.get('minValue', kwargs.get('min')),
+                                  maximum=kwargs.get('maxValue', kwargs.get('max')),
+                                  enum=kwargs.get('enumName', kwargs.get('en')))
+        attribute.multi = bool(kwargs.get('multi', kwargs.get('m', False)))
+        attribute.index_matters = kwargs.get('indexMatters', kwargs.get('im', True))
+        if attribute.multi:
+            attribute.value = dict()
+        fake_node.add(attribute)
+
+    def deleteAttr(self, plug, attribute=None, **kwargs):
+        if attribute:
+            plug = '{}.{}'.format(plug, attribute)
+        node, fake_attribute = self.scene.resolve(plug)
+        if not fake_attribute.dynamic:
+            raise RuntimeError('Cannot delete static attribute {}'.format(plug))
+        if fake_attribute.locked:
+            raise RuntimeError('Cannot delete locked attribute {}'.format(plug))
+        removed = [fake_attribute.long_name] + list(fake_attribute.children)
+        state = {'node': node.name, 'attributes': [], 'connections': []}
+        for name in removed:
+            plug_name = '{}.{}'.format(node.name, name)
+            state['attributes'].append(node.attributes[name])
+            element_plugs = self.scene.element_plugs(plug_name)
+            for dst, src in list(self.scene.inputs.items()):
+                if dst in element_plugs or src in element_plugs:
+                    state['connections'].append((src, dst))
+            self.scene.remove_plug_connections(plug_name)
+            del node.attributes[name]
+        if fake_attribute.parent:
+            node.attributes[fake_attribute.parent].children.remove(fake_attribute.long_name)
+        self.scene.undo_stack.append(('deleteAttr', state))
+
+    def renameAttr(self, plug, new_name):
+        node, attribute = self.scene.resolve(plug)
+        old_plug = self.scene.plug_name(node, attribute)
+        items = list(node.attributes.items())
+        node.attributes.clear()
+        for name, attr in items:
+            if attr is attribute:
+                name = new_name
+                attr.long_name = new_name
+                attr.short_name = new_name
+            node.attributes[name] = attr
+        new_plug = self.scene.plug_name(node, attribute)
+        renamed = dict((plug, new_plug + plug[len(old_plug):]) for plug in self.scene.element_plugs(old_plug))
+        for dst, src in list(self.scene.inputs.items()):
+            if dst in renamed or src in renamed:
+                del self.scene.inputs[dst]
+                self.scene.inputs[renamed.get(dst, dst)] = renamed.get(src, src)
+
+    # --------------------------------------------------------------------------------
+    # Connections
+    # --------------------------------------------------------------------------------
+    def connectAttr(self, source, target, force=False, f=False, **kwargs):
+        dst_attr = self.scene.resolve(target)[1]
+        src_plug = self.scene.plug_path(source)
+        dst_plug = self.scene.plug_path(target)
+        if dst_attr.locked:
+            raise RuntimeError('The destination attribute {} is locked.'.format(dst_plug))
+        if self.scene.inputs.get(dst_plug) and not (force or f):
+            raise RuntimeError('{} is already connected.'.format(dst_plug))
+        self.scene.inputs[dst_plug] = src_plug
+
+    def disconnectAttr(self, source, target):
+        dst_attr = self.scene.resolve(target)[1]
+        src_plug = self.scene.plug_path(source)
+        dst_plug = self.scene.plug_path(target)
+        if dst_attr.locked:
+            raise RuntimeError('The destination attribute {} is locked.'.format(dst_plug))
+        if self.scene.inputs.get(dst_plug) == src_plug:
+            del self.scene.inputs[dst_plug]
+
+    def isConnected(self, source, target):
+        return self.scene.inputs.get(self.scene.plug_path(target)) == self.scene.plug_path(source)
+
+    def listConnections(self, plug, source=True, destination=True, plugs=False, connections=False,
+                        s=None, d=None, p=None, c=None, type=None, **kwargs):
+        source = source if s is None else s
+        destination = destination if d is None else d
+        plugs = plugs if p is None else p
+        connections = connections if c is None else c
+        plug = str(plug)
+        if '.' in plug:
+            own_plugs = self.scene.element_plugs(self.scene.plug_path(plug))
+        else:
+            node = self.scene.node(plug)
+            own_plugs = self.scene.element_plugs(node.name)
+        result = list()
+        for own_plug in own_plugs:
+            others = list()
+            if source and self.scene.inputs.get(own_plug):
+                others.append(self.scene.inputs[own_plug])
+            if destination:
+                others.extend(self.scene.connected_outputs(own_plug))
+            for other in others:
+                if type and self.scene.node(other.split('.')[0]).type != type:
+                    continue
+                if connections:
+                    result.append(own_plug)
+                result.append(other if plugs else other.split('.')[0])
+        return result or None
+
+    # --------------------------------------------------------------------------------
+    # Nodes and selection
+    # --------------------------------------------------------------------------------
+    def createNode(self, node_type, name=None, n=None, skipSelect=False, ss=False, **kwargs):
+        node = self.scene.create_node(node_type, name or n)
+        if not (skipSelect or ss):
+            self.scene.selection = [node]
+        return node
+
+    def delete(self, *nodes):
+        for node in nodes:
+            for name in node if isinstance(node, (list, tuple)) else [node]:
+                fake_node = self.scene.node(name)
+                for attribute in list(fake_node.attributes.values()):
+                    self.scene.remove_plug_connections(self.scene.plug_name(fake_node, attribute))
+                del self.scene.nodes[fake_node.name]
+
+    def objExists(self, name):
+        name = str(name)
+        try:
+            if '.' in name:
+                self.scene.resolve(name)
+            else:
+                self.scene.node(name)
+        except RuntimeError:
+            return False
+        return True
+
+    def nodeType(self, node):
+        return self.scene.node(node).type
+
+    def lockNode(self, node, q=False, query=False, lock=None, l=None, **kwargs):
+        fake_node = self.scene.node(node)
+        if q or query:
+            return [fake_node.locked]
+        fake_node.locked = bool(lock if lock is not None else l)
+
+    def referenceQuery(self, node, isNodeReferenced=False, inr=False, **kwargs):
+        return self.scene.node(node).referenced
+
+    def ls(self, *args, **kwargs):
+        if kwargs.get('sl') or kwargs.get('selection'):
+            result = list(self.scene.selection)
+        elif args:
+            names = list()
+            for arg in args:
+                names.extend(arg if isinstance(arg, (list, tuple)) else [arg])
+            uuids = dict((node.uuid, name) for name, node in self.scene.nodes.items())
+            result = list()
+            for name in names:
+                name = str(name).split('|')[-1]
+                if '.' in name:
+                    if self.objExists(name):
+                        result.append(name)
+                elif name in self.scene.nodes:
+                    result.append(name)
+                elif name in uuids:
+                    result.append(uuids[name])
+        else:
+            result = list(self.scene.nodes)
+        node_type = kwargs.get('type') or kwargs.get('typ')
+        if node_type:
+            node_types = node_type if isinstance(node_type, (list, tuple)) else [node_type]
+            result = [name for name in result if self.scene.nodes[name].type in node_types]
+        if kwargs.get('uuid'):
+            return [self.scene.nodes[name].uuid for name in result]
+        return result
+
+    def select(self, *args, **kwargs):
+        names = list()
+        for arg in args:
+            names.extend(arg if isinstance(arg, (list, tuple)) else [arg])
+        if kwargs.get('clear') or kwargs.get('cl'):
+            self.scene.selection = list()
+            return
+        if kwargs.get('add'):
+            self.scene.selection.extend(str(name) for name in names)
+        else:
+            self.scene.selection = [str(name) for name in names]
+
+    def channelBox(self, name, q=False, query=False, sma=False, selectedMainAttributes=False, e=False,
+                   edit=False, select=None, update=False, **kwargs):
+        if q or query:
+            return list(self.scene.channel_box_selection) or None
+        if select is not None:
+            plugs = select if isinstance(select, (list, tuple)) else [select]
+            self.scene.channel_box_selection = list()
+            for plug in plugs:
+                attr_name = str(plug).split('.')[-1]
+                if attr_name not in self.scene.channel_box_selection:
+                    self.scene.channel_box_selection.append(attr_name)
+
+    # --------------------------------------------------------------------------------
+    # Undo and refresh
+    # --------------------------------------------------------------------------------
+    def undoInfo(self, q=False, query=False, state=None, openChunk=False, closeChunk=False, chunkName=None,
+                 stateWithoutFlush=None, **kwargs):
+        if q or query:
+            if state or stateWithoutFlush:
+                return True
+            return self.scene.undo_chunk_depth
+        if openChunk:
+            self.scene.undo_chunk_depth += 1
+        if closeChunk:
+            self.scene.undo_chunk_depth -= 1
+
+    def undo(self):
+        if not self.scene.undo_stack:
+            return
+        action, state = self.scene.undo_stack.pop()
+        if action == 'deleteAttr':
+            node = self.scene.node(state['node'])
+            for attribute in state['attributes']:
+                node.attributes[attribute.long_name] = attribute
+                if attribute.parent and attribute.parent in node.attributes \
+                        and attribute.long_name not in node.attributes[attribute.parent].children:
+                    node.attributes[attribute.parent].children.append(attribute.long_name)
+            for src, dst in state['connections']:
+                self.scene.inputs[dst] = src
+
+    def refresh(self, suspend=None, su=None, query=False, q=False, **kwargs):
+        suspend = suspend if su is None else su
+        if query or q:
+            return self.scene.refresh_suspended
+        if suspend is not None:
+            self.scene.refresh_suspended = bool(suspend)
+
+    def ogs(self, **kwargs):
+        pass
+
+    def evalDeferred(self, command, lowestPriority=False, lp=False, **kwargs):
+        self.scene.deferred.append(command)
+
+    def flush_deferred(self):
+        while self.scene.deferred:
+            command = self.scene.deferred.pop(0)
+            if callable(command):
+                command()
+            else:
+                namespace = {}
+                exec(command, namespace)
+
+    # --------------------------------------------------------------------------------
+    # UI
+    # --------------------------------------------------------------------------------
+    def about(self, version=False, batch=False, **kwargs):
+        if batch:
+            return self.scene.batch
+        return '2024'
+
+    def warning(self, message):
+        print('# Warning: {}'.format(message))
+
+    def lsUI(self, **kwargs):
+        return list(self.scene.ui) or None
+
+    def deleteUI(self, *items, **kwargs):
+        for item in items:
+            self.scene.ui.pop(item, None)
+
+    def menuItem(self, name=None, parent=None, exists=False, **kwargs):
+        if exists:
+            return name in self.scene.ui
+        full_name = '{}|{}'.format(parent, name) if parent else name
+        self.scene.ui[full_name] = kwargs
+        return full_name
+
+    def menu(self, name, **kwargs):
+        if kwargs.get('exists'):
+            return True
+        if kwargs.get('q') or kwargs.get('query'):
+            return self.scene.ui.get(name, {}).get('postMenuCommand')
+        self.scene.ui.setdefault(name, {}).update(kwargs)
+
+    def scriptJob(self, event=None, kill=None, **kwargs):
+        if kill is not None:
+            self.scene.script_jobs[kill] = (None, None)
+            return None
+        self.scene.script_jobs.append(tuple(event))
+        return len(self.scene.script_jobs) - 1
+
+    def confirmDialog(self, **kwargs):
+        return kwargs.get('defaultButton')
+
+    def progressWindow(self, *args, **kwargs):
+        if kwargs.get('query') or kwargs.get('q'):
+            return self.scene.progress_cancelled
+        if kwargs.get('endProgress') or kwargs.get('ep'):
+            self.scene.progress_cancelled = False
+        return True
+
+    def optionVar(self, q=None, exists=None, sv=None, stringValue=None, remove=None, **kwargs):
+        if exists:
+            return exists in self.scene.option_vars
+        if q:
+            return self.scene.option_vars.get(q, 0)
+        value = sv or stringValue
+        if value:
+            self.scene.option_vars[value[0]] = value[1]
+        if remove:
+            self.scene.option_vars.pop(remove, None)
+
+
+class FakeMel(object):
+
+    def __init__(self, scene):
+        self.scene = scene
+
+    def eval(self, command):
+        """
+        Only setAttr statements with -lock, -keyable and -channelBox flags are run, the rest are ignored.
+        """
+        for statement in command.split(';'):
+            tokens = shlex.split(statement)
+            if not tokens or tokens[0] != 'setAttr':
+                continue
+            node, attribute = self.scene.resolve(tokens[-1])
+            flags = dict(zip(tokens[1:-1:2], tokens[2:-1:2]))
+            for flag, field in [('-lock', 'locked'), ('-keyable', 'keyable'), ('-channelBox', 'channel_box')]:
+                if flag in flags:
+                    setattr(attribute, field, bool(int(flags[flag])))
+                    if field == 'keyable' and attribute.keyable:
+                        attribute.channel_box = False
+        return None
+
+
+def _counted(scene, name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        scene.counts[name] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def install():
+    """
+    It installs the fake maya, maya.cmds and maya.mel modules in sys.modules.
+    :return: FakeScene.
+    """
+    scene = FakeScene()
+    fake_cmds = FakeCmds(scene)
+    fake_mel = FakeMel(scene)
+
+    maya = types.ModuleType('maya')
+    cmds = types.ModuleType('maya.cmds')
+    mel = types.ModuleType('maya.mel')
+
+    for name in dir(fake_cmds):
+        if name.startswith('_') or name in ['scene', 'flush_deferred']:
+            continue
+        setattr(cmds, name, _counted(scene, name, getattr(fake_cmds, name)))
+    cmds.flush_deferred = fake_cmds.flush_deferred
+    mel.eval = _counted(scene, 'mel.eval', fake_mel.eval)
+
+    maya.cmds = cmds
+    maya.mel = mel
+    sys.modules['maya'] = maya
+    sys.modules['maya.cmds'] = cmds
+    sys.modules['maya.mel'] = mel
+    scene.cmds = cmds
+    scene.mel = mel
+    return scene
@@ -0,0 +1,65 @@
+##################################################################################
+# jlr_set_plug_data.py - Maya Python Plug-in
+##################################################################################
+# Description:
+# Registers the jlrSetPlugData command used by jlr_sort_attributes.py to write geometry data, like meshes or
+# NURBS curves, to the attributes it creates. setAttr can not write that data and MPlug.setMObject is not recorded
+# in the undo queue, so this command writes it with an MDGModifier that can be undone and redone.
+#
+# Author: Juan Lara.
+##################################################################################
+# Install:
+# Copy this file to the same directory as jlr_sort_attributes.py. It is loaded when it is needed.
+##################################################################################
+
+import maya.api.OpenMaya as om
+
+COMMAND_NAME = 'jlrSetPlugData'
+
+
+def maya_useNewAPI():
+    """
+    The plug-in uses the Python API 2.0.
+    """
+    pass
+
+
+class SetPlugDataCommand(om.MPxCommand):
+    """
+    It writes the data set with jlr_sort_attributes.write_plug_data to its plug.
+    """
+
+    def __init__(self):
+        om.MPxCommand.__init__(self)
+        self.modifier = om.MDGModifier()
+
+    def doIt(self, args):
+        import jlr_sort_attributes
+
+        plug, data = jlr_sort_attributes.pop_pending_plug_data()
+        self.modifier.newPlugValue(jlr_sort_attributes.get_mplug(plug), data)
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def isUndoable(self):
+        return True
+
+
+def create_command():
+    """
+    :return: SetPlugDataCommand.
+    """
+    return SetPlugDataCommand()
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin, 'Juan Lara', '1.0').registerCommand(COMMAND_NAME, create_command)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
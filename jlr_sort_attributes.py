@@ -1,7 +1,12 @@
 from __future__ import print_function
 
+import collections
+import functools
+import os
+import re
 import sys
-import pymel.core as pm
+import timeit
+import maya.cmds as cmds
 import maya.mel as mel
 
 ##################################################################################
@@ -22,6 +27,8 @@ import maya.mel as mel
 #
 # cmds.evalDeferred('jlr_sort_attributes.create_menu_commands()')
 #
+# 3- Copy jlr_set_plug_data.py to the same directory. It is loaded to paste geometry data, like meshes or curves.
+#
 ##################################################################################
 # How to use "Move Attributes Up" or "Move Attributes Down":
 #
@@ -30,12 +37,18 @@ import maya.mel as mel
 # Or click on "Move Attributes down" to move the selected attributes one position down.
 #
 # --------------------------------------------------------------------------------
+# How to use "Sort Attributes...":
+#
+# Select one or more objects and optionally some user-defined attributes in the channel box.
+# Click on "Sort Attributes..." and choose "Ascending" or "Descending".
+#
+# --------------------------------------------------------------------------------
 # How to use Copy, Cut and Paste Attributes:
 #
 # First select an object and in the channel box, select one or more user-defined attributes.
 # Click on "Copy attributes" to copy the selected attributes.
 # Or click on 'Cut attributes' to move the selected attributes.
-# Finally select the object where you want to copy or move the previously selected attributes
+# Finally select one or more objects where you want to copy or move the previously selected attributes
 # and click on "Paste attributes".
 ##################################################################################
 
@@ -45,75 +58,165 @@ import maya.mel as mel
 
 __jlr_copy_data = None
 __jlr_copy_mode = None
+__jlr_backend = None
+__jlr_transaction = None
+__jlr_reorder_engine = 'rebuild'
+__jlr_profiler = None
+__jlr_pending_selection = None
+__jlr_descriptor_cache = dict()
+__jlr_descriptor_callbacks = dict()
+__jlr_scene_jobs = None
+__jlr_pending_plug_data = None
+
+PASTE_BATCH_SIZE = 50
+SHARED_BLEND_TAG = 'jlrSharedBlend'
+SHARED_BLEND_TYPE = 'plusMinusAverage'
+SHARED_BLEND_NODE_TYPES = ['plusMinusAverage', 'pairBlend']
+DATA_TYPES = ['string', 'stringArray', 'doubleArray', 'floatArray', 'Int32Array', 'vectorArray', 'pointArray',
+              'matrix', 'nurbsCurve', 'nurbsSurface', 'mesh', 'lattice']
+COUNTED_DATA_TYPES = ['stringArray', 'vectorArray', 'pointArray']
+GEOMETRY_DATA_TYPES = ['nurbsCurve', 'nurbsSurface', 'mesh', 'lattice']
+PLUG_DATA_PLUGIN = 'jlr_set_plug_data'
+SHARED_CONNECTION_TYPES = ['long', 'bool', 'double', 'doubleAngle', 'enum', 'double3']
+DISCRETE_TYPES = ['bool', 'enum', 'long', 'short', 'byte', 'char']
 
 
 ##############################################
 # Menus Items
 ##############################################
 
-def create_menu_commands():
+def create_menu_commands(lazy=False):
     """
     Create the menu commands.
     Move Up: Move the selected attributes one position up.
     Move Down: Move the selected attributes one position down.
+    :param lazy: Boolean. If it is True, the menus are not generated at startup. The items are added to each menu
+    the first time it is opened and their commands are resolved by name when they are invoked.
     """
     channels_menu = 'ChannelBoxLayerEditor|MainChannelsLayersLayout|ChannelsLayersPaneLayout|ChannelBoxForm|menuBarLayout1|menu2'
     edit_menu = 'ChannelBoxLayerEditor|MainChannelsLayersLayout|ChannelsLayersPaneLayout|ChannelBoxForm|menuBarLayout1|menu3'
     channel_box_popup = 'ChannelBoxLayerEditor|MainChannelsLayersLayout|ChannelsLayersPaneLayout|ChannelBoxForm|menuBarLayout1|frameLayout1|mainChannelBox|popupMenu1'
-    if pm.about(version=1) >= "2022":
+    if cmds.about(version=True) >= "2022":
         channel_box_popup = 'ChannelBoxLayerEditor|MainChannelsLayersLayout|ChannelsLayersPaneLayout|ChannelBoxForm|menuBarLayout1|frameLayout1|CBStackLayout|mainChannelBox|popupMenu1'
 
     main_modify_menu = 'MayaWindow|mainModifyMenu'
 
-    mel.eval('generateChannelMenu {} 0;'.format(channels_menu))
-    mel.eval('generateCBEditMenu {} 0;'.format(edit_menu))
-    mel.eval('generateChannelMenu {} 1;'.format(channel_box_popup))
-    mel.eval('ModObjectsMenu {};'.format(main_modify_menu))
-
     channels_menuitems = [
         {'name': 'jlr_channels_menuDivider', 'label': '', 'command': None},
         {'name': 'jlr_lock_trs', 'label': 'Lock Transformations', 'command': lock_trs_attributes},
         {'name': 'jlr_unlock_trs', 'label': 'Unlock Transformations', 'command': unlock_trs_attributes},
+        {'name': 'jlr_hide_trs', 'label': 'Hide Transformations', 'command': hide_trs_attributes},
+        {'name': 'jlr_show_trs', 'label': 'Show Transformations', 'command': show_trs_attributes},
     ]
 
     edit_menuitems = [
         {'name': 'jlr_options_menuDivider', 'label': '', 'command': None},
         {'name': 'jlr_add_divider', 'label': 'Add Divider', 'command': add_divider_attribute},
+        {'name': 'jlr_renumber_dividers', 'label': 'Renumber Dividers', 'command': renumber_divider_attributes},
+        {'name': 'jlr_delete_dividers', 'label': 'Delete Dividers', 'command': delete_divider_attributes},
         {'name': 'jlr_sort_menuDivider', 'label': 'Sort Attributes', 'command': None},
         {'name': 'jlr_cbf_attrMoveUp', 'label': 'Move Attributes Up', 'command': move_up_attribute},
         {'name': 'jlr_cbf_attrMoveDown', 'label': 'Move Attributes Down', 'command': move_down_attribute},
+        {'name': 'jlr_cbf_attrSort', 'label': 'Sort Attributes...', 'command': sort_selected_attributes},
         {'name': 'jlr_edit_menuDivider', 'label': '', 'command': None},
         {'name': 'jlr_cbf_attrCut', 'label': 'Cut Attributes', 'command': cut_attribute},
         {'name': 'jlr_cbf_attrCopy', 'label': 'Copy Attributes', 'command': copy_attribute},
         {'name': 'jlr_cbf_attrPaste', 'label': 'Paste Attributes', 'command': paste_attribute},
+        {'name': 'jlr_cbf_cleanBlends', 'label': 'Clean Up Shared Connections', 'command': cleanup_shared_connections},
+        {'name': 'jlr_cbf_auditLayouts', 'label': 'Audit Attribute Layouts...', 'command': audit_layouts},
+    ]
+
+    menus = [
+        [channels_menu, 'generateChannelMenu {} 0;'.format(channels_menu), channels_menuitems],
+        [edit_menu, 'generateCBEditMenu {} 0;'.format(edit_menu), edit_menuitems],
+        [channel_box_popup, 'generateChannelMenu {} 1;'.format(channel_box_popup),
+         channels_menuitems + edit_menuitems],
+        [main_modify_menu, 'ModObjectsMenu {};'.format(main_modify_menu), edit_menuitems],
     ]
 
-    remove_ui_item_menu(['jlr_divider', 'jlr_channels_menuDivider', 'jlr_unlock_trs'])
-    remove_ui_item_menu([item['name'] for item in edit_menuitems])
+    if lazy:
+        for menu, generator, menuitems in menus:
+            install_menu_on_open(menu, generator, menuitems)
+        return
+
+    # Items created by old versions of this script.
+    remove_ui_item_menu(['jlr_divider'])
+
+    for menu, generator, menuitems in menus:
+        mel.eval(generator)
+        remove_menu_items(menuitems, menu)
+        add_commands_to_menu(menuitems, menu)
+
+
+def install_menu_on_open(menu, generator, menuitems):
+    """
+    It adds the menu items to a menu the first time it is opened.
+    The current post menu command of the menu is kept and it is run before checking the items, so if the menu is
+    rebuilt every time it is opened, the items are added again.
+    :param menu: String. Full path of the menu.
+    :param generator: String. Mel command that generates the menu if it has no post menu command.
+    :param menuitems: list of dictionaries with the name, label and command of menu item.
+    """
+    if not cmds.menu(menu, exists=True):
+        cmds.warning('The menu {} does not exist.'.format(menu))
+        return
+
+    original_command = cmds.menu(menu, q=True, postMenuCommand=True)
+    state = {'generated': False}
+
+    def post_menu_command(*args):
+        if original_command:
+            mel.eval(original_command)
+        elif not state['generated']:
+            mel.eval(generator)
+        state['generated'] = True
+
+        if not cmds.menuItem(get_menu_item_path(menu, menuitems[-1]['name']), exists=True):
+            remove_menu_items(menuitems, menu)
+            add_commands_to_menu(menuitems, menu, lazy=True)
+
+    cmds.menu(menu, e=True, postMenuCommand=post_menu_command)
+
+
+def get_menu_item_path(menu, name):
+    """
+    :param menu: String. Full path of the menu.
+    :param name: String. Name of the menu item in the menu item list.
+    :return: String. Full path of the menu item created by add_commands_to_menu.
+    """
+    return '{}|{}_{}'.format(menu, menu.split('|')[-1], name)
+
 
-    add_commands_to_menu(channels_menuitems, channels_menu)
-    add_commands_to_menu(edit_menuitems, edit_menu)
-    add_commands_to_menu(channels_menuitems, channel_box_popup)
-    add_commands_to_menu(edit_menuitems, channel_box_popup)
-    add_commands_to_menu(edit_menuitems, main_modify_menu)
+def remove_menu_items(commands, menu):
+    """
+    It removes the menu items created by add_commands_to_menu from a menu, using their known full paths.
+    :param commands: list of dictionaries with the name, label and command of menu item.
+    :param menu: String. Full path of the menu.
+    """
+    for item in commands:
+        path = get_menu_item_path(menu, item['name'])
+        if cmds.menuItem(path, exists=True):
+            cmds.deleteUI(path, menuItem=True)
 
 
 def remove_ui_item_menu(name_list):
     """
     It removes command menu items from maya UI.
+    All menu items are listed once and each one is checked against all names.
     :param name_list: list with the name of UI items to remove.
     """
-    for name in name_list:
-        for item in pm.lsUI():
-            if item.endswith(name):
-                pm.deleteUI(item)
+    names = tuple(name_list)
+    for item in cmds.lsUI(menuItems=True, long=True) or []:
+        if item.endswith(names):
+            cmds.deleteUI(item, menuItem=True)
 
 
-def add_commands_to_menu(commands, menu):
+def add_commands_to_menu(commands, menu, lazy=False):
     """
     It adds a new menu items to a menu.
     :param commands: list of dictionaries with the name, label and command of menu item.
     :param menu: menu object where the items will be created.
+    :param lazy: Boolean. If it is True, the commands are called by name, importing this module when invoked.
     """
 
     for item in commands:
@@ -123,493 +226,4615 @@ def add_commands_to_menu(commands, menu):
 
         if '_menuDivider' in name:
             name = '{}_{}'.format(menu.split('|')[-1], name)
-            pm.menuItem(name, parent=menu, divider=True, dividerLabel=label)
+            cmds.menuItem(name, parent=menu, divider=True, dividerLabel=label)
+
+        elif lazy:
+            name = '{}_{}'.format(menu.split('|')[-1], name)
+            command = 'import {0}\n{0}.{1}()'.format(__name__, command.__name__)
+            cmds.menuItem(name, parent=menu, label=label, command=command, sourceType='python')
 
         else:
             name = '{}_{}'.format(menu.split('|')[-1], name)
-            pm.menuItem(name, parent=menu, label=label, command=command)
+            cmds.menuItem(name, parent=menu, label=label, command=command)
 
 
 #########################################
-# Attribute methods
+# Backends
 #########################################
-def check_string(in_string):
-    if sys.version_info.major == 2:
-        return isinstance(in_string, basestring)
-    else:
-        return isinstance(in_string, str)
-
 
-def copy_attr(node_source, node_target, attr_name, move=False):
+class CmdsBackend(object):
     """
-    Copy or move a existing user defined attribute between nodes.
-    Copy the source attribute connections to the new attribute.
-    If the attribute is copied and has connections, these will be connected through a pairBlend node in order
-    to maintain the old and new connections.
-    If the attribute can not be moved returns None.
-    :param node_source: String or dagNode. Object with the user defined attribute.
-    :param node_target: String or dagNode. Object will receive the user defined attribute.
-    :param attr_name: String. Name of the attribute to be copied.
-    :param move: Boolean. Indicate if the attribute must be copied or moved.
-    :return: Attribute. The new attribute.
+    Attribute primitives built on maya.cmds.
+    All methods work with node names and plug names ('node.attribute'), so no wrapper object is built per call.
     """
-    if check_string(node_source):
-        node_source = pm.PyNode(node_source)
+    name = 'cmds'
 
-    if check_string(node_target):
-        node_target = pm.PyNode(node_target)
+    def list_user_attributes(self, node, short_names=False):
+        return cmds.listAttr(node, ud=True, shortNames=short_names) or []
 
-    if not node_source.hasAttr(attr_name):
-        pm.warning('The attribute{} does not exist in {}'.format(attr_name, node_source))
-        return None
+    def has_attr(self, node, attr_name):
+        return cmds.attributeQuery(attr_name, node=node, exists=True)
 
-    # Get source attribute info.
-    source_attr = node_source.attr(attr_name)
-    attr_data = get_attr_info(source_attr)
-    if not attr_data:
+    def attribute_type(self, node, attr_name):
+        return cmds.attributeQuery(attr_name, node=node, attributeType=True)
+
+    def attribute_children(self, node, attr_name):
+        return cmds.attributeQuery(attr_name, node=node, listChildren=True) or []
+
+    def attribute_parent(self, node, attr_name):
+        parent = cmds.attributeQuery(attr_name, node=node, listParent=True)
+        if parent:
+            return parent[0]
         return None
 
-    source_value = source_attr.get()
-    source_is_locked = source_attr.isLocked()
-    source_is_keyable = source_attr.get(k=1)
-    source_is_displayable = source_attr.get(cb=1)
-    source_is_compound = source_attr.isCompound()
-    source_connections = get_attr_connections(source_attr)
-    source_type_flag = attr_data.get('dataType')
+    def attr_info(self, plug):
+        node, attr_name = split_plug(plug)
+        attribute_type = str(cmds.getAttr(plug, type=True))
 
-    # If attribute is a Compound, read the children attributes info.
-    source_child_info = dict()
-    source_child_connections = dict()
-    if source_is_compound:
-        for child in source_attr.getChildren():
-            source_child_info[child.attrName()] = get_attr_info(child)
-            source_child_connections[child.attrName()] = get_attr_connections(child)
-
-    # Creates a list with all attributes connected to source attribute and its lock status.
-    l_check = list()
-    l_check.extend(source_connections['inputs'])
-    l_check.extend(source_connections['outputs'])
-    if source_is_compound:
-        for child in source_attr.getChildren():
-            l_check.extend(source_child_connections[child.attrName()]['inputs'])
-            l_check.extend(source_child_connections[child.attrName()]['outputs'])
-
-    l_locked = [[attr, attr.isLocked()] for attr in l_check]
-
-    # Unlock all attributes connected
-    for attr in l_check:
-        attr.unlock()
+        d_data = dict()
+        d_data['longName'] = str(cmds.attributeName(plug, long=True))
+        d_data['niceName'] = str(cmds.attributeName(plug, nice=True))
+        d_data['shortName'] = str(cmds.attributeName(plug, short=True))
+        d_data['hidden'] = cmds.attributeQuery(attr_name, node=node, hidden=True)
+        d_data['keyable'] = cmds.getAttr(plug, keyable=True)
 
-    # If move is True, delete the source attribute.
-    if move:
-        if source_attr.isLocked:
-            source_attr.unlock()
-        pm.deleteAttr(source_attr)
+        d_data.update(get_attr_type_data(plug, attribute_type))
+        attribute_type = d_data.get('attributeType')
 
-    # Create the attribute
-    create_attr(node_target, attr_data)
+        if attribute_type in ['long', 'double', 'bool', 'short']:
+            d_data['defaultValue'] = cmds.attributeQuery(attr_name, node=node, listDefault=True)[0]
+            if cmds.attributeQuery(attr_name, node=node, maxExists=True):
+                d_data['maxValue'] = cmds.attributeQuery(attr_name, node=node, maximum=True)[0]
+            if cmds.attributeQuery(attr_name, node=node, minExists=True):
+                d_data['minValue'] = cmds.attributeQuery(attr_name, node=node, minimum=True)[0]
 
-    # If attribute is a Compound, the children attributes are created
-    if source_is_compound:
+        if attribute_type in ['enum']:
+            d_data['enumName'] = cmds.attributeQuery(attr_name, node=node, listEnum=True)[0]
 
-        for child_key in sorted(source_child_info.keys()):
-            create_attr(node_target, source_child_info[child_key])
+        parent = self.attribute_parent(node, attr_name)
+        if parent:
+            d_data['parent'] = str(parent)
 
-    new_attr = node_target.attr(attr_name)
+        return d_data
 
-    # Copy the value
+    def inputs(self, plug):
+        return cmds.listConnections(plug, source=True, destination=False, plugs=True) or []
 
-    if source_type_flag:
-        # if we have a non numeric source lets set the node with that
-        if source_type_flag == 'string' and not source_value:
-            # if the string source is  None(blank string), use an empty string instead
-            source_value = ""
+    def outputs(self, plug):
+        return cmds.listConnections(plug, source=False, destination=True, plugs=True) or []
 
-        new_attr.set(source_value, type=source_type_flag)
-    else:
-        new_attr.set(source_value)
+    def node_connections(self, node, source=True, destination=True):
+        return cmds.listConnections(node, connections=True, plugs=True, source=source,
+                                    destination=destination) or []
 
-    # Copy the lock status
-    if source_is_locked:
-        new_attr.lock()
-    else:
-        new_attr.unlock()
+    def get_value(self, plug):
+        try:
+            value = cmds.getAttr(plug)
+        except RuntimeError:
+            return None
 
-    # Copy the keyable status
-    if not source_is_keyable:
-        new_attr.set(cb=source_is_displayable)
-    new_attr.set(k=source_is_keyable)
+        # Compound attributes are returned as a list with a single tuple.
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], tuple):
+            return value[0]
+        return value
 
-    # Connect the attributes
-    connect_attr(new_attr, **source_connections)
+    def set_value(self, plug, value, data_type=None):
+        if data_type in COUNTED_DATA_TYPES:
+            cmds.setAttr(plug, len(value), *value, type=data_type)
+        elif data_type in DATA_TYPES and data_type != 'string':
+            cmds.setAttr(plug, list(value), type=data_type)
+        elif data_type:
+            cmds.setAttr(plug, value, type=data_type)
+        elif isinstance(value, (list, tuple)):
+            cmds.setAttr(plug, *value)
+        elif value is not None:
+            cmds.setAttr(plug, value)
 
-    # If attribute is a Compound, the children attributes are connected.
-    if source_is_compound:
-        for attr_child, child_key in zip(new_attr.getChildren(), sorted(source_child_connections.keys())):
-            connect_attr(attr_child, **source_child_connections[child_key])
+    def is_locked(self, plug):
+        return cmds.getAttr(plug, lock=True)
 
-    # Lock all attributes connected locked previously.
-    for attr, is_locked in l_locked:
-        if is_locked:
-            attr.lock()
+    def set_locked(self, plug, locked):
+        cmds.setAttr(plug, lock=locked)
 
-    return new_attr
+    def is_keyable(self, plug):
+        return cmds.getAttr(plug, keyable=True)
 
+    def set_keyable(self, plug, keyable):
+        cmds.setAttr(plug, keyable=keyable)
 
-def create_attr(node, attr_data):
-    """
-    This method creates a new attribute in a node.
-    If the node already has an attribute with the same name, the new attribute will not be created.
-    :param node: dagNode.
-    :param attr_data: dictionary with the necessary data to create the attribute.
-    """
+    def is_channel_box(self, plug):
+        return cmds.getAttr(plug, channelBox=True)
 
-    # It checks if the attribute already exists within the node.
-    attr_name = attr_data['longName']
-    if node.hasAttr(attr_name):
-        pm.warning('The attribute {} already exist in {}.'
-                   'Can not create a new attribute with the same name'.format(attr_name, node))
+    def set_channel_box(self, plug, displayable):
+        cmds.setAttr(plug, channelBox=displayable)
 
-    else:
-        # Creating the attribute
-        pm.addAttr(node, **attr_data)
-        attr = node.attr(attr_name)
-        if not attr.get(k=1):
-            attr.set(cb=attr_data["hidden"])
+    def add_attr(self, node, attr_data):
+        cmds.addAttr(node, **attr_data)
 
+    def delete_attr(self, plug):
+        cmds.deleteAttr(plug)
 
-def connect_attr(attribute, inputs=None, outputs=None):
+    def rename_attr(self, plug, new_name):
+        cmds.renameAttr(plug, new_name)
+
+    def connect(self, source_plug, target_plug, force=False):
+        cmds.connectAttr(source_plug, target_plug, force=force)
+
+    def disconnect(self, source_plug, target_plug):
+        cmds.disconnectAttr(source_plug, target_plug)
+
+    def create_node(self, node_type, name=None):
+        if name:
+            return cmds.createNode(node_type, name=name, skipSelect=True)
+        return cmds.createNode(node_type, skipSelect=True)
+
+
+class PymelBackend(CmdsBackend):
     """
-    It connects an attribute to passed inputs and outputs.
-    :param attribute: Attribute Object.
-    :param inputs: list of inputs attributes.
-    :param outputs: list of outputs attributes.
+    Attribute primitives built on pymel. It is slower than the maya.cmds backend but it is kept as fallback.
+    pymel.core is only imported when this backend is used.
     """
-    if inputs:
-        for attr_input in inputs:
-            if attribute.inputs():
-                make_shared_connection(attr_input, attribute)
-            else:
-                attr_input.connect(attribute)
+    name = 'pymel'
 
-    if outputs:
-        if attribute.type() in ['long', 'bool', 'double', 'enum', 'double3']:
-            for attr_output in outputs:
-                if attr_output.inputs(p=1):
-                    make_shared_connection(attribute, attr_output)
-                else:
-                    attribute.connect(attr_output)
+    def __init__(self):
+        import pymel.core
+        self.pm = pymel.core
 
+    def attr_info(self, plug):
+        attribute = self.pm.Attribute(plug)
+        attribute_type = str(attribute.type())
 
-def make_shared_connection(attr_source, target_attr):
+        d_data = dict()
+        d_data['longName'] = str(self.pm.attributeName(attribute, long=True))
+        d_data['niceName'] = str(self.pm.attributeName(attribute, nice=True))
+        d_data['shortName'] = str(self.pm.attributeName(attribute, short=True))
+        d_data['hidden'] = attribute.isHidden()
+        d_data['keyable'] = attribute.get(k=1)
+
+        d_data.update(get_attr_type_data(plug, attribute_type))
+        attribute_type = d_data.get('attributeType')
+
+        if attribute_type in ['long', 'double', 'bool', 'short']:
+            d_data['defaultValue'] = self.pm.attributeQuery(attribute.attrName(), node=attribute.node(),
+                                                            listDefault=True)[0]
+            if attribute.getMax() is not None:
+                d_data['maxValue'] = attribute.getMax()
+            if attribute.getMin() is not None:
+                d_data['minValue'] = attribute.getMin()
+
+        if attribute_type in ['enum']:
+            d_data['enumName'] = self.pm.attributeQuery(attribute.attrName(), node=attribute.node(),
+                                                        listEnum=True)[0]
+
+        if attribute.parent():
+            d_data['parent'] = str(attribute.parent().attrName(longName=True))
+
+        return d_data
+
+    def inputs(self, plug):
+        return [str(attr) for attr in self.pm.Attribute(plug).inputs(p=True)]
+
+    def outputs(self, plug):
+        return [str(attr) for attr in self.pm.Attribute(plug).outputs(p=True)]
+
+    def get_value(self, plug):
+        try:
+            return self.pm.Attribute(plug).get()
+        except RuntimeError:
+            return None
+
+    def set_value(self, plug, value, data_type=None):
+        if data_type:
+            self.pm.Attribute(plug).set(value, type=data_type)
+        elif value is not None:
+            self.pm.Attribute(plug).set(value)
+
+    def add_attr(self, node, attr_data):
+        self.pm.addAttr(node, **attr_data)
+
+    def delete_attr(self, plug):
+        self.pm.deleteAttr(plug)
+
+    def connect(self, source_plug, target_plug, force=False):
+        self.pm.Attribute(source_plug).connect(target_plug, force=force)
+
+
+BACKENDS = {'cmds': CmdsBackend, 'pymel': PymelBackend}
+
+
+def set_backend(name):
     """
-    It connects an attribute to other connected attribute by pairblend node.
-    This way the target attribute does'nt lose their existing connections.
-    :param attr_source: Source attribute.
-    :param target_attr: Target attribute.
+    It sets the backend used by all attribute methods.
+    :param name: String. 'cmds' (default) or 'pymel'.
+    :return: the new backend.
     """
-    attr_previous_connected = target_attr.inputs(p=1)[0]
+    global __jlr_backend
 
-    pb = pm.createNode('pairBlend')
-    pb.w.set(0.5)
-    d_previous = {True: pb.inTranslate1, False: pb.inTranslateX1}
-    d_source = {True: pb.inTranslate2, False: pb.inTranslateX2}
-    d_out = {True: pb.outTranslate, False: pb.outTranslateX}
+    if name not in BACKENDS:
+        raise ValueError('Unknown backend {}. Use one of: {}'.format(name, ', '.join(sorted(BACKENDS))))
 
-    is_compound = attr_previous_connected.isCompound()
-    attr_previous_connected.connect(d_previous[is_compound])
-    attr_source.connect(d_source[is_compound])
-    d_out[is_compound].connect(target_attr, force=True)
+    __jlr_backend = BACKENDS[name]()
+    if __jlr_profiler is not None:
+        __jlr_profiler.instrument(__jlr_backend)
+    return __jlr_backend
 
 
-def get_selected_attributes():
+def get_backend():
     """
-    Get the selected attributes in the ChannelBox.
-    If there are not attributes selected, this method returns a empty list.
-    :return: list with the selected attributes.
+    :return: the backend used by all attribute methods. The maya.cmds backend is used by default.
     """
-    attrs = pm.channelBox('mainChannelBox', q=True, sma=True)
-    if not attrs:
-        return []
-
-    return attrs
+    if __jlr_backend is None:
+        return set_backend('cmds')
+    return __jlr_backend
 
 
-def get_all_user_attributes(node):
+def split_plug(plug):
     """
-    It gets all user defined attributes of a node.
-    :param node: dagNode.
-    :return: list with all user defined attributes.
+    It splits a plug name in node and attribute names.
+    The attribute name is the last attribute of the plug path without multi indices, 'node.a[0].b' returns 'b'.
+    :param plug: String or Attribute.
+    :return: tuple with the node name and the attribute name.
     """
-    all_attributes = list()
-    for attr in pm.listAttr(node, ud=True):
-        if not node.attr(attr).parent():
-            all_attributes.append(attr)
-    return all_attributes
+    node, attr_path = str(plug).split('.', 1)
+    return node, attr_path.split('.')[-1].split('[')[0]
 
 
-def get_attr_info(attribute):
+def get_attr_type_data(plug, attribute_type):
     """
-    Get all data of a passed attribute.
-    The data that it returns depends on the type of attribute.
-    :param attribute: Attribute Object.
-    :return: dictionary with the necessary data to recreate the attribute.
+    It describes the type of an attribute as addAttr needs it. Data attributes use dataType and the rest use
+    attributeType. Multi attributes also get the multi and indexMatters flags.
+    :param plug: String. Plug name.
+    :param attribute_type: String. Type returned by getAttr with the type flag.
+    :return: dictionary with the type flags for addAttr.
     """
-    attribute_type = str(attribute.type())
+    node, attr_name = split_plug(plug)
 
     d_data = dict()
-    d_data['longName'] = str(pm.attributeName(attribute, long=True))
-    d_data['niceName'] = str(pm.attributeName(attribute, nice=True))
-    d_data['shortName'] = str(pm.attributeName(attribute, short=True))
-    d_data['hidden'] = attribute.isHidden()
-    d_data['keyable'] = attribute.get(k=1)
-
-    if attribute_type in ['string']:
-        d_data['dataType'] = attribute_type
+    if cmds.attributeQuery(attr_name, node=node, multi=True):
+        d_data['multi'] = True
+        d_data['indexMatters'] = cmds.attributeQuery(attr_name, node=node, indexMatters=True)
+        attribute_type = cmds.attributeQuery(attr_name, node=node, attributeType=True)
+
+    # Matrix attributes can be created as a data type or as an attribute type.
+    if attribute_type in ['typed', 'matrix']:
+        data_types = cmds.addAttr(plug, query=True, dataType=True) or []
+        if data_types:
+            d_data['dataType'] = str(data_types[0])
+            return d_data
+
+    if attribute_type in DATA_TYPES and attribute_type != 'matrix':
+        d_data['dataType'] = str(attribute_type)
     else:
-        d_data['attributeType'] = attribute_type
+        d_data['attributeType'] = str(attribute_type)
+    return d_data
+
 
-    if attribute_type in ['long', 'double', 'bool', 'short']:
-        d_data['defaultValue'] = attribute.get(default=True)
-        if attribute.getMax() is not None:
-            d_data['maxValue'] = attribute.getMax()
-        if attribute.getMin() is not None:
-            d_data['minValue'] = attribute.getMin()
+#########################################
+# Transaction methods
+#########################################
+
+class AttributeTransaction(object):
+    """
+    Context to run attribute edits as a single undo step, with the refresh suspended until the end.
+    Nested transactions are merged into the outermost one. The undo chunk is closed and the refresh is restored
+    even if an error is raised. The changes are recorded in an OperationJournal and, if an error is raised, they
+    are rolled back before the undo chunk is closed.
 
-    if attribute_type in ['enum']:
-        d_data['enumName'] = attribute.getEnums()
+    with AttributeTransaction('sortMyRig'):
+        for node in nodes:
+            sort_attributes(node)
+    """
 
-    if attribute.parent():
-        d_data['parent'] = attribute.parent().attrName()
+    def __init__(self, name='jlrSortAttributes', journal=None):
+        """
+        :param name: String. Name of the undo chunk.
+        :param journal: OperationJournal where the changes are recorded. By default, a new one. A job passes the
+        same journal to all its chunks, so a failure rolls back all of them.
+        """
+        self.name = name
+        self.is_owner = False
+        self.connection_indexes = dict()
+        self.node_uuids = dict()
+        self.journal = journal
+        self.refresh_suspended = False
+        self.undo_split = False
 
-    return d_data
+    def __enter__(self):
+        if get_active_transaction() is not None:
+            return get_active_transaction()
 
+        set_active_transaction(self)
+        self.is_owner = True
+        if self.journal is None:
+            self.journal = OperationJournal()
+        cmds.undoInfo(openChunk=True, chunkName=self.name)
+        self.refresh_suspended = is_refresh_suspended()
+        if not self.refresh_suspended:
+            cmds.refresh(suspend=True)
+        return self
 
-def get_attr_connections(source_attr):
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.is_owner:
+            return False
+
+        try:
+            if exc_type is not None:
+                self.rollback()
+            if not self.refresh_suspended:
+                cmds.refresh(suspend=False)
+                cmds.refresh()
+        finally:
+            cmds.undoInfo(closeChunk=True)
+            set_active_transaction(None)
+            self.is_owner = False
+            self.connection_indexes = dict()
+            self.node_uuids = dict()
+            self.undo_split = False
+
+        return False
+
+    def rollback(self):
+        """
+        It rolls back the changes recorded in the journal. The rollback is not recorded. If it fails, a warning is
+        shown and the scene is left as it is.
+        """
+        journal = self.journal
+        if journal is None:
+            return
+
+        self.journal = None
+        self.connection_indexes = dict()
+        clear_descriptor_cache()
+        try:
+            journal.rollback()
+        except Exception as error:
+            cmds.warning('The changes of {} could not be rolled back: {}'.format(self.name, error))
+        finally:
+            self.journal = journal
+
+
+def is_refresh_suspended():
     """
-    It returns the inputs and outputs connections of an attribute.
-    :param source_attr: Attribute Object.
-    :return: dictionary with the inputs and outputs connections.
+    :return: Boolean. True if the viewport refresh is already suspended. False if it is not, or if this Maya version
+    can not query it.
     """
-    return {'inputs': source_attr.inputs(p=True), 'outputs': source_attr.outputs(p=True)}
+    try:
+        return bool(cmds.refresh(query=True, suspend=True))
+    except (TypeError, RuntimeError):
+        return False
 
 
-def select_attributes(attributes, nodes):
+def get_active_transaction():
     """
-    Selects the passed attributes in the main Channel Box.
-    :param attributes: List of the attributes to select.
-    :param nodes: List of the objects with the attributes to select
+    :return: the outermost AttributeTransaction running, or None.
     """
-    to_select = ['{}.{}'.format(n, a) for a in attributes for n in nodes]
-    pm.select(nodes, r=True)
-    str_command = "import pymel.core as pm\npm.channelBox('mainChannelBox', e=True, select={}, update=True)"
-    pm.evalDeferred(str_command.format(to_select))
+    return __jlr_transaction
 
 
-def move_up_attribute(*args):
+def set_active_transaction(transaction):
     """
-    It moves a selected attributes in the channel box one position up.
-    :param args: list of arguments.
+    :param transaction: AttributeTransaction or None.
     """
-    selected_attributes = get_selected_attributes()
+    global __jlr_transaction
+    __jlr_transaction = transaction
 
-    if not len(pm.ls(sl=1)) or not selected_attributes:
-        print('Nothing Selected')
-        return
 
-    selected_items = pm.selected()
-    last_parent = None
+def rollback_active_transaction():
+    """
+    It rolls back the changes recorded so far by the active transaction, for the operations that fail without
+    raising an error.
+    """
+    active_transaction = get_active_transaction()
+    if active_transaction is not None:
+        active_transaction.rollback()
+
 
-    for item in selected_items:
-        for attribute in selected_attributes:
+def get_active_journal():
+    """
+    :return: the OperationJournal of the active transaction, or None if there is no transaction or it is rolling
+    back.
+    """
+    active_transaction = get_active_transaction()
+    if active_transaction is None:
+        return None
+    return active_transaction.journal
 
-            if item.attr(attribute).parent():
-                attribute = item.attr(attribute).parent().attrName()
-                if attribute == last_parent:
-                    continue
-                last_parent = attribute
 
-            all_attributes = get_all_user_attributes(item)
+class OperationJournal(object):
+    """
+    Record of the changes made by an operation, to put the attributes back as they were if it fails.
+    The order of the user defined attributes of each node is recorded before its first change, with a single
+    listAttr, and each original attribute is captured before it is deleted for the first time.
+    """
+
+    def __init__(self):
+        self.steps = list()
+        self.orders = collections.OrderedDict()
+        self.snapshots = collections.OrderedDict()
+        self.created_attributes = list()
+        self.created_nodes = list()
+        self.deleted_nodes = list()
+        self.renames = list()
+        self.inputs = collections.OrderedDict()
+
+    def record_node(self, node):
+        """
+        :param node: String. Node that is going to be changed.
+        """
+        node = str(node)
+        if node not in self.orders:
+            self.orders[node] = list(get_layout_signature(node))
+
+    def record_delete(self, plug, snapshot=None):
+        """
+        :param plug: String. Plug name of a top level attribute that is going to be deleted.
+        :param snapshot: AttributeSnapshot of the attribute, if the caller already has it.
+        """
+        node, attr_name = split_plug(plug)
+        self.record_node(node)
+        self.steps.append(('delete_attr', plug))
+        if (node, attr_name) not in self.snapshots and attr_name in self.orders[node]:
+            self.snapshots[(node, attr_name)] = snapshot or capture_attr(node, attr_name)
+
+    def record_create(self, plug):
+        """
+        :param plug: String. Plug name of a top level attribute that is going to be created.
+        """
+        self.record_node(split_plug(plug)[0])
+        self.steps.append(('add_attr', plug))
+        self.created_attributes.append(plug)
+
+    def record_rename(self, plug, new_name):
+        """
+        :param plug: String. Plug name of an attribute that is going to be renamed.
+        :param new_name: String. New name of the attribute.
+        """
+        node, attr_name = split_plug(plug)
+        self.record_node(node)
+        self.steps.append(('rename_attr', plug))
+        self.renames.append((node, attr_name, new_name))
+
+    def record_connection(self, target_plug):
+        """
+        :param target_plug: String. Plug that is going to receive a new input. Only its first input is kept.
+        """
+        self.steps.append(('connect', target_plug))
+        if target_plug not in self.inputs:
+            self.inputs[target_plug] = get_plug_inputs(target_plug)
+
+    def record_create_node(self, node):
+        """
+        :param node: String. Name of a node that has been created.
+        """
+        self.steps.append(('create_node', node))
+        self.created_nodes.append(node)
 
-            if attribute not in all_attributes:
+    def record_delete_node(self, node):
+        """
+        :param node: String. Name of a shared connection node that is going to be deleted. Its type, the weight of a
+        pairBlend and its connections are kept to create it again. The nodes created by the same operation are only
+        deleted by the rollback.
+        """
+        node = str(node)
+        self.steps.append(('delete_node', node))
+        if node in self.created_nodes:
+            return
+
+        index = get_cached_connection_index(node) or ConnectionIndex(node)
+        connections = list()
+        for key, source_plugs in index.inputs.items():
+            connections.extend((source_plug, '{}.{}'.format(node, key)) for source_plug in source_plugs)
+        for key, target_plugs in index.outputs.items():
+            connections.extend(('{}.{}'.format(node, key), target_plug) for target_plug in target_plugs)
+
+        node_type = cmds.nodeType(node)
+        weight = get_backend().get_value('{}.w'.format(node)) if node_type == 'pairBlend' else None
+        self.deleted_nodes.append((node, node_type, weight, connections))
+
+    def rollback(self):
+        """
+        It puts the recorded nodes back as they were: the renamed attributes get their names back, the created
+        attributes and nodes are deleted, the deleted shared connection nodes are created again with their
+        connections, the
+        inputs of the plugs that still exist are restored, the deleted attributes are created again from their
+        snapshots, with their connections, and the original order is restored with the rebuild engine. The journal
+        is empty at the end.
+        """
+        backend = get_backend()
+
+        for node, attr_name, new_name in reversed(self.renames):
+            if backend.has_attr(node, new_name):
+                rename_plug_attribute('{}.{}'.format(node, new_name), attr_name)
+
+        for plug in reversed(self.created_attributes):
+            node, attr_name = split_plug(plug)
+            if backend.has_attr(node, attr_name):
+                delete_plug_attribute(plug, unlock=True)
+
+        for node in reversed(self.created_nodes):
+            if cmds.objExists(node):
+                cmds.delete(node)
+
+        for node, node_type, weight, connections in reversed(self.deleted_nodes):
+            if cmds.objExists(node):
                 continue
+            create_shared_blend(name=node, node_type=node_type, weight=weight)
+            for source_plug, target_plug in connections:
+                if cmds.objExists(source_plug) and cmds.objExists(target_plug):
+                    connect_plugs(source_plug, target_plug, force=True)
 
-            pos_attr = all_attributes.index(attribute)
-            if pos_attr == 0:
+        for target_plug, previous_inputs in self.inputs.items():
+            if not cmds.objExists(target_plug):
+                continue
+            current_inputs = backend.inputs(target_plug)
+            if current_inputs == previous_inputs:
                 continue
 
-            below_attr = all_attributes[pos_attr - 1:]
-            below_attr.remove(attribute)
+            locked = backend.is_locked(target_plug)
+            backend.set_locked(target_plug, False)
+            if previous_inputs and cmds.objExists(previous_inputs[0]):
+                connect_plugs(previous_inputs[0], target_plug, force=True)
+            elif current_inputs:
+                backend.disconnect(current_inputs[0], target_plug)
+                for plug in (current_inputs[0], target_plug):
+                    index = get_cached_connection_index(split_plug(plug)[0])
+                    if index:
+                        index.refresh()
+            backend.set_locked(target_plug, locked)
 
-            result = copy_attr(item, item, attribute, move=True)
-            if not result:
-                return
+        for (node, attr_name), snapshot in self.snapshots.items():
+            if snapshot and not backend.has_attr(node, attr_name):
+                apply_attr(node, snapshot)
 
-            for attr in below_attr:
-                result = copy_attr(item, item, attr, move=True)
-                if not result:
-                    return
+        for node, order in self.orders.items():
+            layout = NodeLayout(node)
+            target_order = [attr for attr in order if attr in layout.attributes]
+            target_order.extend(attr for attr in layout.attributes if attr not in target_order)
+            if not reorder_attributes(node, target_order, layout, engine='rebuild'):
+                raise RuntimeError('The attributes of {} could not be reordered.'.format(node))
 
-    select_attributes(selected_attributes, selected_items)
+        self.__init__()
 
 
-def move_down_attribute(*args):
+def transaction(function):
     """
-    It moves a selected attributes in the channel box one position down.
-    :param args: list of arguments.
+    Decorator that runs a command inside an AttributeTransaction named as the command. A command called with
+    dry_run=True is run without transaction.
+    :param function: function to decorate.
+    :return: the decorated function.
     """
-    selected_attributes = get_selected_attributes()
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # A dry run does not change the scene, so it does not open an undo chunk or suspend the refresh.
+        if kwargs.get('dry_run', False):
+            return function(*args, **kwargs)
 
-    if not len(pm.ls(sl=1)) or not selected_attributes:
-        print('Nothing Selected')
-        return
+        with AttributeTransaction(function.__name__):
+            return function(*args, **kwargs)
 
-    selected_items = pm.selected()
-    last_parent = None
+    return wrapper
 
-    for item in selected_items:
-        for attribute in reversed(selected_attributes):
 
-            if item.attr(attribute).parent():
-                attribute = item.attr(attribute).parent().attrName()
-                if attribute == last_parent:
-                    continue
-                last_parent = attribute
+#########################################
+# Job methods
+#########################################
 
-            all_attributes = get_all_user_attributes(item)
+JOB_CHUNK_SIZE = 25
+JOB_THRESHOLD = 200
 
-            if attribute not in all_attributes:
-                continue
 
-            pos_attr = all_attributes.index(attribute)
-            if pos_attr == len(all_attributes) - 1:
-                continue
+class AttributeJob(object):
+    """
+    A long operation split in steps that are run in chunks from the Maya idle queue, with a progress window that
+    can cancel it. Every step must leave the scene in a consistent state. Each chunk is run as its own
+    AttributeTransaction, so it is one undo step and a cancelled job stops between two chunks. All the chunks
+    share one OperationJournal, so if a step fails the changes of the previous chunks are rolled back too.
+    """
+
+    def __init__(self, name, steps, chunk_size=None, on_finish=None):
+        """
+        :param name: String. Title of the progress window and name of the undo chunks.
+        :param steps: list of functions without arguments. A step that returns False stops the job.
+        :param chunk_size: int. Number of steps of each chunk. By default JOB_CHUNK_SIZE.
+        :param on_finish: function that receives the job when it is done, cancelled or failed.
+        """
+        self.name = name
+        self.steps = list(steps)
+        self.chunk_size = chunk_size or JOB_CHUNK_SIZE
+        self.on_finish = on_finish
+        self.position = 0
+        self.status = 'pending'
+        self.interactive = False
+        self.journal = OperationJournal()
+
+    def start(self):
+        """
+        It shows the progress window and queues the first chunk in the idle queue.
+        :return: AttributeJob.
+        """
+        self.status = 'running'
+        self.interactive = True
+        cmds.progressWindow(title=self.name, progress=0, maxValue=max(len(self.steps), 1),
+                            status='0/{}'.format(len(self.steps)), isInterruptable=True)
+        cmds.evalDeferred(self.run_chunk, lowestPriority=True)
+        return self
+
+    def run(self):
+        """
+        It runs all the chunks at once, without progress window.
+        :return: AttributeJob.
+        """
+        self.status = 'running'
+        self.interactive = False
+        while self.status == 'running':
+            self.run_chunk()
+        return self
 
-            below_attr = all_attributes[pos_attr + 2:]
+    def run_chunk(self):
+        """
+        It runs the next chunk of steps and, in interactive jobs, queues the next one.
+        """
+        if self.status != 'running':
+            return
 
-            result = copy_attr(item, item, attribute, move=True)
-            if not result:
-                return
-            for attr in below_attr:
-                result = copy_attr(item, item, attr, move=True)
-                if not result:
-                    return
+        if self.interactive and cmds.progressWindow(query=True, isCancelled=True):
+            self.finish('cancelled')
+            return
 
-    select_attributes(selected_attributes, selected_items)
+        failed = False
+        try:
+            with AttributeTransaction(self.name, journal=self.journal) as active_transaction:
+                for step in self.steps[self.position:self.position + self.chunk_size]:
+                    if step() is False:
+                        failed = True
+                        active_transaction.rollback()
+                        break
+                    self.position += 1
 
+        except Exception:
+            self.finish('failed')
+            raise
 
-def copy_attribute(*args):
+        if failed:
+            self.finish('failed')
+        elif self.position >= len(self.steps):
+            self.finish('done')
+        elif self.interactive:
+            cmds.progressWindow(edit=True, progress=self.position,
+                                status='{}/{}'.format(self.position, len(self.steps)))
+            cmds.evalDeferred(self.run_chunk, lowestPriority=True)
+
+    def finish(self, status):
+        """
+        :param status: String. 'done', 'cancelled' or 'failed'.
+        """
+        self.status = status
+        if self.interactive:
+            cmds.progressWindow(endProgress=True)
+        if self.on_finish:
+            self.on_finish(self)
+
+
+def should_run_as_job(step_count):
     """
-    Saves the selected items and user defined attributes for copy to other item.
-    :param args: list of arguments
+    :param step_count: int. Number of steps of an operation.
+    :return: Boolean. True if the operation is long enough to run as an AttributeJob and Maya has UI.
     """
-    save_selected_attributes('copy')
+    return step_count > JOB_THRESHOLD and not cmds.about(batch=True)
 
 
-def cut_attribute(*args):
+def run_job(name, steps, on_finish=None):
     """
-    Saves the selected items and user defined attributes for move to other item.
-    :param args: list of arguments
+    It runs the steps as an AttributeJob from the idle queue if should_run_as_job says so, or at once otherwise.
+    :param name: String. Title of the progress window and name of the undo chunks.
+    :param steps: list of functions without arguments.
+    :param on_finish: function that receives the job when it is done, cancelled or failed.
+    :return: AttributeJob.
     """
-    save_selected_attributes('cut')
+    job = AttributeJob(name, steps, on_finish=on_finish)
+    if should_run_as_job(len(job.steps)):
+        return job.start()
+    return job.run()
 
 
-def save_selected_attributes(mode):
+#########################################
+# Cost estimate methods
+#########################################
+
+COST_KEYS = ['attributes_rebuilt', 'attributes_created', 'attributes_deleted', 'connections_remade',
+             'nodes_created', 'nodes_deleted', 'locks_toggled', 'channels_set', 'renames']
+
+
+class CostEstimate(object):
     """
-    Saves the selected items and user defined attributes for copy or move to other item.
-    :param mode: string. 'copy' to copy the attributes. Or 'cut' to move the attributes
+    Planned operations of a command run with dry_run=True, and a summary of their cost.
+    Each operation is a tuple with its name and the plug or node it works on. The scene is not changed.
+    If the pre-flight check of the command fails, the problems are listed and there are no operations.
     """
-    global __jlr_copy_data
-    global __jlr_copy_mode
 
-    if not pm.selected():
-        pm.warning("Nothing selected.")
-        return
+    def __init__(self, name):
+        """
+        :param name: String. Name of the command.
+        """
+        self.name = name
+        self.operations = list()
+        self.summary = collections.OrderedDict((key, 0) for key in COST_KEYS)
+        self.problems = list()
 
-    source_item = pm.selected()[-1]
-    all_selected_attr = get_selected_attributes()
+    def add(self, operation, target, **costs):
+        """
+        :param operation: String. Name of the operation.
+        :param target: plug, node or tuple of plugs the operation works on.
+        :param costs: amounts to add to the summary keys.
+        """
+        self.operations.append((operation, target))
+        for key, value in costs.items():
+            self.summary[key] += value
 
-    if not all_selected_attr:
-        pm.warning("No attribute is selected.")
-        return
+    def to_dict(self):
+        """
+        :return: dictionary with the name, the operations, the summary and the problems.
+        """
+        return {'name': self.name, 'operations': [list(operation) for operation in self.operations],
+                'summary': dict(self.summary), 'problems': list(self.problems)}
 
-    all_ud_attributes = get_all_user_attributes(source_item)
-    ud_selected_attr = [attr for attr in all_selected_attr if attr in all_ud_attributes]
+    def __repr__(self):
+        if self.problems:
+            return 'CostEstimate({!r}, {}, problems={!r})'.format(self.name, dict(self.summary), self.problems)
+        return 'CostEstimate({!r}, {})'.format(self.name, dict(self.summary))
 
-    if not ud_selected_attr:
-        pm.warning("No user defined attribute is selected.")
-        return
 
-    __jlr_copy_data = {'source_item': source_item, 'attributes': ud_selected_attr}
-    __jlr_copy_mode = mode
+def estimate_apply_attr(estimate, node_target, snapshot, move=False, handle_locks=True, rebuild=False):
+    """
+    It adds to an estimate the operations of apply_attr, without running them.
+    :param estimate: CostEstimate.
+    :param node_target: String or dagNode.
+    :param snapshot: AttributeSnapshot.
+    :param move: Boolean. Indicate if the source attribute is deleted.
+    :param handle_locks: Boolean. Indicate if the connected attributes are unlocked and locked again.
+    :param rebuild: Boolean. Indicate if the attribute is deleted and created again in the same node.
+    """
+    backend = get_backend()
+    node_target = str(node_target)
+    new_attr = '{}.{}'.format(node_target, snapshot.attr_name)
+    attr_count = 1 + len(snapshot.children)
+
+    locked_plugs = list()
+    if handle_locks:
+        locked_plugs = get_locked_plugs(get_captured_connected_plugs(snapshot))
+        for plug in locked_plugs:
+            estimate.add('unlock', plug, locks_toggled=1)
+
+    deleted_plugs = set()
+    node_source = get_snapshot_source(snapshot) if move else None
+    if node_source and backend.has_attr(node_source, snapshot.attr_name):
+        source_attr = '{}.{}'.format(node_source, snapshot.attr_name)
+        deleted_plugs.add(source_attr)
+        deleted_plugs.update('{}.{}'.format(node_source, child.attr_name) for child in snapshot.children)
+        if backend.is_locked(source_attr):
+            estimate.add('unlock', source_attr, locks_toggled=1)
+        if not rebuild:
+            estimate.add('delete_attr', source_attr, attributes_deleted=attr_count)
+
+    if rebuild:
+        estimate.add('rebuild_attr', new_attr, attributes_rebuilt=attr_count)
+    else:
+        estimate.add('add_attr', new_attr, attributes_created=attr_count)
+
+    if snapshot.locked:
+        estimate.add('lock', new_attr, locks_toggled=1)
 
+    for attr_snapshot in (snapshot,) + tuple(snapshot.children):
+        plug = '{}.{}'.format(node_target, attr_snapshot.attr_name)
+        for input_plug in attr_snapshot.inputs:
+            estimate.add('connect', (input_plug, plug), connections_remade=1)
 
-def paste_attribute(*args):
+        attr_type = attr_snapshot.attr_data.get('attributeType')
+        if attr_type not in SHARED_CONNECTION_TYPES:
+            continue
+
+        for output_plug in attr_snapshot.outputs:
+            if [plug for plug in get_plug_inputs(output_plug) if plug not in deleted_plugs]:
+                if not can_blend(output_plug):
+                    continue
+                # The node created for a previous target of the same paste is reused, like an existing one.
+                pool = get_shared_pool(output_plug) or get_shared_pool(get_plug_inputs(output_plug)[0])
+                if ('create_node', (SHARED_BLEND_TYPE, output_plug)) in estimate.operations or pool and (
+                        split_plug(output_plug)[0] == pool or get_shared_channels(pool)[0]['targets'] == [output_plug]):
+                    estimate.add('shared_connect', (plug, output_plug), connections_remade=1)
+                    continue
+                estimate.add('create_node', (SHARED_BLEND_TYPE, output_plug), nodes_created=1)
+                estimate.add('shared_connect', (plug, output_plug), connections_remade=3)
+            else:
+                estimate.add('connect', (plug, output_plug), connections_remade=1)
+
+    for index, inputs, outputs in snapshot.elements:
+        plug = '{}[{}]'.format(new_attr, index)
+        for connection in [(input_plug, plug) for input_plug in inputs] + [(plug, output) for output in outputs]:
+            estimate.add('connect', connection, connections_remade=1)
+
+    for plug in locked_plugs:
+        estimate.add('lock', plug, locks_toggled=1)
+
+
+def estimate_reorder(estimate, plans, engine=None):
     """
-    Copies or Moves an attribute from one object to another object.
-    :param args: list of arguments
+    It adds to an estimate the operations of a list of reorder plans, without running them.
+    :param estimate: CostEstimate.
+    :param plans: list of tuples with a node name and its reorder plan, like get_reorder_plans returns.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
     """
-    global __jlr_copy_data
-    global __jlr_copy_mode
-
-    if not pm.selected():
-        pm.warning("Nothing selected.")
-        return
+    engine = engine or get_reorder_engine()
+    backend = get_backend()
 
-    target_item = pm.selected()[-1]
-    source_item = __jlr_copy_data['source_item']
-    move_attr = __jlr_copy_mode == 'cut'
-    for attr in __jlr_copy_data['attributes']:
-        copy_attr(source_item, target_item, attr, move=move_attr)
+    for node, plan in plans:
+        for attr in plan:
+            snapshot = capture_attr(node, attr)
+            if engine == 'rebuild':
+                estimate_apply_attr(estimate, node, snapshot, move=True, rebuild=True)
+                continue
 
-    pm.select(target_item)
+            plugs = ['{}.{}'.format(node, attr)] + ['{}.{}'.format(node, child.attr_name)
+                                                   for child in snapshot.children]
+            locked_plugs = [plug for plug in plugs if backend.is_locked(plug)]
+            estimate.add('move_to_end', plugs[0], attributes_rebuilt=len(plugs),
+                         locks_toggled=2 * len(locked_plugs))
 
 
-def add_divider_attribute(*args):
+def estimate_paste(estimate, snapshots, targets, move=False, batch_size=None):
     """
-    Adds a divider attribute in the ChannelBox of last selected item.
-    :param args: list of arguments
+    It adds to an estimate the operations of paste_snapshots, without running them.
+    :param estimate: CostEstimate.
+    :param snapshots: list of AttributeSnapshot.
+    :param targets: list of nodes that will receive the attributes.
+    :param move: Boolean. Indicate if the source attributes are deleted.
+    :param batch_size: int. Number of targets per batch. By default PASTE_BATCH_SIZE.
     """
-    item = pm.selected()[-1]
-    name = 'divider'
-    cont = 0
-    fullname = name + str(cont).zfill(2)
+    batch_size = batch_size or PASTE_BATCH_SIZE
+    targets = [str(target) for target in targets]
 
-    while fullname in [attr.attrName() for attr in item.listAttr(ud=True)]:
-        cont += 1
-        fullname = name + str(cont).zfill(2)
+    connected_plugs = list()
+    for snapshot in snapshots:
+        connected_plugs.extend(get_captured_connected_plugs(snapshot))
+    locked_plugs = get_locked_plugs(connected_plugs)
 
-    d_data = dict()
-    d_data['longName'] = str(fullname)
-    d_data['type'] = 'enum'
-    d_data['niceName'] = str(' ')
-    d_data['hidden'] = False
-    d_data['keyable'] = True
-    d_data['enumName'] = (str('-' * 15))
-    create_attr(item, d_data)
+    for start in range(0, len(targets), batch_size):
+        for plug in locked_plugs:
+            estimate.add('unlock', plug, locks_toggled=1)
+        for target in targets[start:start + batch_size]:
+            for snapshot in snapshots:
+                estimate_apply_attr(estimate, target, snapshot, move=move, handle_locks=False)
+            move = False
+        for plug in locked_plugs:
+            estimate.add('lock', plug, locks_toggled=1)
 
 
-def lock_trs_attributes(*args):
+def estimate_channels(estimate, plugs, lock=None, keyable=None, channel_box=None):
     """
-    Locks the translate, rotation and scale attributes.
-    :param args: list of arguments.
+    It adds to an estimate the operations of set_channel_states, without running them.
+    :param estimate: CostEstimate.
+    :param plugs: list with the plug names.
+    :param lock: Boolean.
+    :param keyable: Boolean.
+    :param channel_box: Boolean.
     """
-    import itertools
-    for item in pm.selected():
-        for attr in itertools.product(['t', 'r', 's'], ['x', 'y', 'z']):
-            item.attr(''.join(attr)).lock()
+    for plug in plugs:
+        estimate.add('set_channel', plug, channels_set=1, locks_toggled=int(lock is not None))
+
 
+#########################################
+# Profiling methods
+#########################################
 
-def unlock_trs_attributes(*args):
+class Profiler(object):
     """
-    Unlocks the translate, rotation and scale attributes.
-    :param args: list of arguments.
+    It records the call count and the cumulative time of the profiled functions and of the primitives, the backend
+    methods and the maya.cmds and mel functions called directly, grouped by the command that called them.
+    The command is the first profiled function of the call stack.
     """
-    import itertools
-    for item in pm.selected():
-        for attr in itertools.product(['t', 'r', 's'], ['x', 'y', 'z']):
-            item.attr(''.join(attr)).unlock()
 
+    def __init__(self):
+        self.commands = dict()
+        self.stack = list()
+        self.primitive_depth = 0
+
+    def call(self, name, kind, function, args, kwargs):
+        """
+        It runs a function recording its call.
+        :param name: String. Name of the function in the report.
+        :param kind: String. 'functions' or 'primitives'.
+        :param function: callable.
+        :return: the result of the function.
+        """
+        command = self.stack[0] if self.stack else name
+        self.stack.append(name)
+        if kind == 'primitives':
+            self.primitive_depth += 1
+        start = timeit.default_timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = timeit.default_timer() - start
+            self.stack.pop()
+            if kind == 'primitives':
+                self.primitive_depth -= 1
+
+            d_command = self.commands.setdefault(command, {'calls': 0, 'time': 0.0, 'functions': dict(),
+                                                           'primitives': dict()})
+            if self.stack:
+                d_call = d_command[kind].setdefault(name, {'calls': 0, 'time': 0.0})
+                d_call['calls'] += 1
+                d_call['time'] += elapsed
+            else:
+                d_command['calls'] += 1
+                d_command['time'] += elapsed
+
+    def instrument(self, backend):
+        """
+        It records the calls to the methods of a backend instance.
+        :param backend: backend instance.
+        """
+        for name in dir(type(backend)):
+            method = getattr(backend, name)
+            if name.startswith('_') or name in ['name', 'wrap'] or not callable(method):
+                continue
+            setattr(backend, name, self.wrap_primitive('backend.{}'.format(name), method))
+
+    def wrap_primitive(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return self.call(name, 'primitives', method, args, kwargs)
+
+        wrapper.profiled_primitive = True
+        return wrapper
+
+    def wrap_command(self, name, function):
+        """
+        It records the calls to a maya.cmds or mel function, unless they are made by a backend primitive that is
+        already recorded.
+        :param name: String. Name of the function in the report.
+        :param function: callable.
+        :return: the wrapped function.
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if self.primitive_depth:
+                return function(*args, **kwargs)
+            return self.call(name, 'primitives', function, args, kwargs)
+
+        return wrapper
+
+    @staticmethod
+    def uninstrument(backend):
+        """
+        It removes the recording of the calls to the methods of a backend instance.
+        :param backend: backend instance.
+        """
+        for name, value in list(vars(backend).items()):
+            if getattr(value, 'profiled_primitive', False):
+                delattr(backend, name)
+
+    def report(self):
+        """
+        :return: dictionary with the recorded data of each command:
+        {command: {'calls': int, 'time': float, 'functions': {name: {'calls': int, 'time': float}},
+        'primitives': {name: {'calls': int, 'time': float}}}}
+        """
+        import copy
+        return copy.deepcopy(self.commands)
+
+
+class ProfiledModule(object):
+    """
+    Proxy of a module, like maya.cmds or maya.mel, that records the calls to its functions while the profiling is
+    enabled.
+    """
+
+    def __init__(self, profiler, module, prefix):
+        """
+        :param profiler: Profiler.
+        :param module: module to wrap.
+        :param prefix: String. Prefix of the names of its functions in the report.
+        """
+        self.profiled_module = module
+        self.profiler = profiler
+        self.prefix = prefix
+
+    def __getattr__(self, name):
+        value = getattr(self.profiled_module, name)
+        if callable(value):
+            value = self.profiler.wrap_command('{}.{}'.format(self.prefix, name), value)
+            setattr(self, name, value)
+        return value
+
+
+def profiled(name_or_function):
+    """
+    Decorator that records the calls of a function when the profiling is enabled.
+    When it is disabled the overhead is a single global lookup.
+    It can be used as @profiled or @profiled('ClassName.method').
+    :param name_or_function: function to decorate, or String with its name in the report.
+    :return: the decorated function or a decorator.
+    """
+    if callable(name_or_function):
+        return profiled(name_or_function.__name__)(name_or_function)
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = get_profiler()
+            if profiler is None:
+                return function(*args, **kwargs)
+            return profiler.call(name_or_function, 'functions', function, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_profiler():
+    """
+    :return: the active Profiler, or None if the profiling is disabled.
+    """
+    return __jlr_profiler
+
+
+def enable_profiling():
+    """
+    It starts recording the calls of the commands, internal functions, backend primitives and the maya.cmds and
+    mel functions called by this script.
+    :return: the new Profiler.
+    """
+    global __jlr_profiler, cmds, mel
+
+    disable_profiling()
+    backend = get_backend()
+    __jlr_profiler = Profiler()
+    __jlr_profiler.instrument(backend)
+    cmds = ProfiledModule(__jlr_profiler, cmds, 'cmds')
+    mel = ProfiledModule(__jlr_profiler, mel, 'mel')
+    return __jlr_profiler
+
+
+def disable_profiling():
+    """
+    It stops recording calls.
+    :return: dictionary with the report of the recorded calls, or None if the profiling was not enabled.
+    """
+    global __jlr_profiler, cmds, mel
+
+    if __jlr_profiler is None:
+        return None
+
+    report = __jlr_profiler.report()
+    Profiler.uninstrument(get_backend())
+    cmds = getattr(cmds, 'profiled_module', cmds)
+    mel = getattr(mel, 'profiled_module', mel)
+    __jlr_profiler = None
+    return report
+
+
+def print_profiling_report(report=None):
+    """
+    It prints a profiling report, sorted by cumulative time.
+    :param report: dictionary returned by disable_profiling or Profiler.report. By default, the active profiler.
+    """
+    if report is None:
+        if get_profiler() is None:
+            print('Profiling is not enabled.')
+            return
+        report = get_profiler().report()
+
+    for command, d_command in sorted(report.items(), key=lambda item: -item[1]['time']):
+        print('{}: {} calls, {:.2f} ms'.format(command, d_command['calls'], d_command['time'] * 1000.0))
+        for kind in ['functions', 'primitives']:
+            for name, d_call in sorted(d_command[kind].items(), key=lambda item: -item[1]['time']):
+                print('    {:<36} {:>8} calls {:>12.2f} ms'.format(name, d_call['calls'], d_call['time'] * 1000.0))
+
+
+#########################################
+# Connection methods
+#########################################
+
+class ConnectionIndex(object):
+    """
+    Index of all connections of a node, built with one listConnections query per direction.
+    It maps every plug of the node to its input and output plugs. During a transaction the index of each node is
+    built once and it is updated by connect_plugs and delete_plug_attribute.
+    """
+
+    def __init__(self, node):
+        """
+        :param node: String. Node name.
+        """
+        self.node = node
+        self.inputs = dict()
+        self.outputs = dict()
+        self.refresh()
+
+    @profiled('ConnectionIndex.refresh')
+    def refresh(self):
+        """
+        It reads again the connections from the node.
+        """
+        self.inputs = dict()
+        self.outputs = dict()
+        for connections, source, destination in [(self.inputs, True, False), (self.outputs, False, True)]:
+            pairs = get_backend().node_connections(self.node, source=source, destination=destination)
+            for own_plug, other_plug in zip(pairs[::2], pairs[1::2]):
+                connections.setdefault(get_plug_key(own_plug), list()).append(other_plug)
+
+    def get_inputs(self, plug):
+        """
+        :param plug: String. Plug name of this node.
+        :return: list with the input plugs.
+        """
+        return list(self.inputs.get(get_plug_key(plug), []))
+
+    def get_outputs(self, plug):
+        """
+        :param plug: String. Plug name of this node.
+        :return: list with the output plugs.
+        """
+        return list(self.outputs.get(get_plug_key(plug), []))
+
+    def add_input(self, plug, source_plug):
+        self.inputs[get_plug_key(plug)] = [source_plug]
+
+    def add_output(self, plug, target_plug):
+        self.outputs.setdefault(get_plug_key(plug), list()).append(target_plug)
+
+    def remove_input(self, plug):
+        self.inputs.pop(get_plug_key(plug), None)
+
+    def remove_output(self, plug, target_plug):
+        key = get_plug_key(plug)
+        if target_plug in self.outputs.get(key, []):
+            self.outputs[key].remove(target_plug)
+
+    def remove_attributes(self, attr_names):
+        """
+        It removes all plugs of the passed attributes from the index.
+        :param attr_names: list with the long names of the attributes.
+        :return: tuple with the removed inputs and outputs dictionaries.
+        """
+        attr_names = set(attr_names)
+        removed_inputs = dict()
+        removed_outputs = dict()
+        for connections, removed in [(self.inputs, removed_inputs), (self.outputs, removed_outputs)]:
+            for key in list(connections):
+                if attr_names.intersection(part.split('[')[0] for part in key.split('.')):
+                    removed[key] = connections.pop(key)
+        return removed_inputs, removed_outputs
+
+
+def get_plug_key(plug):
+    """
+    :param plug: String. Plug name.
+    :return: String. Attribute path of the plug, without the node name.
+    """
+    return str(plug).split('.', 1)[1]
+
+
+def get_connection_index(node):
+    """
+    It returns the connection index of a node cached in the active transaction.
+    :param node: String. Node name.
+    :return: ConnectionIndex, or None if there is no active transaction.
+    """
+    active_transaction = get_active_transaction()
+    if active_transaction is None:
+        return None
+
+    node = str(node)
+    if node not in active_transaction.connection_indexes:
+        active_transaction.connection_indexes[node] = ConnectionIndex(node)
+    return active_transaction.connection_indexes[node]
+
+
+def get_cached_connection_index(node):
+    """
+    :param node: String. Node name.
+    :return: ConnectionIndex of the node if it is already cached in the active transaction, or None.
+    """
+    active_transaction = get_active_transaction()
+    if active_transaction is None:
+        return None
+    return active_transaction.connection_indexes.get(str(node))
+
+
+def get_plug_inputs(plug):
+    """
+    :param plug: String. Plug name.
+    :return: list with the input plugs. The connection index is used if there is an active transaction.
+    """
+    index = get_connection_index(split_plug(plug)[0])
+    if index is None:
+        return get_backend().inputs(plug)
+    return index.get_inputs(plug)
+
+
+def get_plug_outputs(plug):
+    """
+    :param plug: String. Plug name.
+    :return: list with the output plugs. The connection index is used if there is an active transaction.
+    """
+    index = get_connection_index(split_plug(plug)[0])
+    if index is None:
+        return get_backend().outputs(plug)
+    return index.get_outputs(plug)
+
+
+def connect_plugs(source_plug, target_plug, force=False):
+    """
+    It connects two plugs and updates the connection indexes of the active transaction. The previous input of the
+    target plug is recorded in the journal of the active transaction.
+    :param source_plug: String.
+    :param target_plug: String.
+    :param force: Boolean. Replace the current input of the target plug.
+    """
+    previous_inputs = list()
+    if force and get_active_transaction() is not None:
+        previous_inputs = get_plug_inputs(target_plug)
+
+    journal = get_active_journal()
+    if journal is not None:
+        journal.record_connection(target_plug)
+
+    get_backend().connect(source_plug, target_plug, force=force)
+
+    for previous_input in previous_inputs:
+        index = get_cached_connection_index(split_plug(previous_input)[0])
+        if index:
+            index.remove_output(previous_input, target_plug)
+
+    index = get_cached_connection_index(split_plug(source_plug)[0])
+    if index:
+        index.add_output(source_plug, target_plug)
+
+    index = get_cached_connection_index(split_plug(target_plug)[0])
+    if index:
+        index.add_input(target_plug, source_plug)
+
+
+def delete_plug_attribute(plug, snapshot=None, unlock=False):
+    """
+    It deletes an attribute and removes its connections from the connection indexes of the active transaction.
+    The deletion is recorded in the journal of the active transaction.
+    :param plug: String. Plug name of the attribute.
+    :param snapshot: AttributeSnapshot of the attribute for the journal, if the caller already has it.
+    :param unlock: Boolean. If it is True, the attribute is unlocked before it is deleted.
+    """
+    backend = get_backend()
+    node, attr_name = split_plug(plug)
+    journal = get_active_journal()
+    if journal is not None:
+        journal.record_delete(plug, snapshot)
+
+    index = get_cached_connection_index(node)
+    attr_names = [attr_name] + backend.attribute_children(node, attr_name)
+
+    if unlock:
+        backend.set_locked(plug, False)
+    backend.delete_attr(plug)
+    clear_descriptor_cache(node, attr_names)
+
+    if not index:
+        return
+
+    removed_inputs, removed_outputs = index.remove_attributes(attr_names)
+    for key, source_plugs in removed_inputs.items():
+        for source_plug in source_plugs:
+            other_index = get_cached_connection_index(split_plug(source_plug)[0])
+            if other_index:
+                other_index.remove_output(source_plug, '{}.{}'.format(node, key))
+
+    for key, target_plugs in removed_outputs.items():
+        for target_plug in target_plugs:
+            other_index = get_cached_connection_index(split_plug(target_plug)[0])
+            if other_index:
+                other_index.remove_input(target_plug)
+
+
+def rename_plug_attribute(plug, new_name):
+    """
+    It renames an attribute, unlocking it while it is renamed, and refreshes the connection indexes of the active
+    transaction that have its plugs. The rename is recorded in the journal of the active transaction.
+    :param plug: String. Plug name of the attribute.
+    :param new_name: String. New name of the attribute.
+    :return: String. New plug name.
+    """
+    backend = get_backend()
+    node, attr_name = split_plug(plug)
+    journal = get_active_journal()
+    if journal is not None:
+        journal.record_rename(plug, new_name)
+
+    index = get_cached_connection_index(node)
+
+    locked = backend.is_locked(plug)
+    if locked:
+        backend.set_locked(plug, False)
+    backend.rename_attr(plug, new_name)
+    new_plug = '{}.{}'.format(node, new_name)
+    if locked:
+        backend.set_locked(new_plug, True)
+
+    clear_descriptor_cache(node, [attr_name])
+
+    if index:
+        others = [split_plug(other)[0] for connections in (index.inputs, index.outputs)
+                  for key, plugs in connections.items() if key.split('[')[0] == attr_name for other in plugs]
+        for indexed_node in set([node] + others):
+            other_index = get_cached_connection_index(indexed_node)
+            if other_index:
+                other_index.refresh()
+
+    return new_plug
+
+
+#########################################
+# Descriptor cache methods
+#########################################
+
+def get_node_uuid(node):
+    """
+    :param node: String. Node name.
+    :return: String. UUID of the node, or None if it has none. It is cached in the active transaction.
+    """
+    node = str(node)
+    active_transaction = get_active_transaction()
+    if active_transaction is not None and node in active_transaction.node_uuids:
+        return active_transaction.node_uuids[node]
+
+    uuid = (cmds.ls(node, uuid=True) or [None])[0]
+    if active_transaction is not None:
+        active_transaction.node_uuids[node] = uuid
+    return uuid
+
+
+def get_descriptor_cache():
+    """
+    The cache is kept for the whole session, so the definitions are reused between commands. It is cleared when a
+    scene is opened or a new one is created.
+    :return: dictionary with a dictionary of cached descriptors for each node UUID. The descriptors are found by
+    the long and short names of the attribute, and each value is a list with the fingerprint of the attribute and
+    its descriptor.
+    """
+    install_scene_jobs()
+    return __jlr_descriptor_cache
+
+
+def install_scene_jobs():
+    """
+    It creates, only once, the script jobs that clear the descriptor cache when a scene is opened or a new one is
+    created.
+    """
+    global __jlr_scene_jobs
+
+    if __jlr_scene_jobs is not None:
+        return
+
+    __jlr_scene_jobs = list()
+    for event in ['SceneOpened', 'NewSceneOpened']:
+        try:
+            __jlr_scene_jobs.append(cmds.scriptJob(event=[event, clear_descriptor_cache]))
+        except RuntimeError:
+            pass
+
+
+def get_attr_fingerprint(plug):
+    """
+    Cheap check that a cached descriptor still belongs to the attribute: its type and, for compound attributes,
+    the number of children.
+    :param plug: String. Plug name.
+    :return: tuple.
+    """
+    attribute_type = str(cmds.getAttr(plug, type=True))
+    if attribute_type != 'TdataCompound':
+        return attribute_type,
+
+    node, attr_name = split_plug(plug)
+    return attribute_type, len(get_backend().attribute_children(node, attr_name))
+
+
+@profiled
+def get_attr_descriptor(plug):
+    """
+    It returns the descriptor of an attribute, the dictionary with the data needed to create it again.
+    The definition is read with the backend the first time and then it is taken from the cache. Only the keyable
+    status, which is per instance state, is read every time.
+    :param plug: String. Plug name.
+    :return: dictionary with the data of the attribute.
+    """
+    d_data = dict(get_attr_definition(plug))
+    d_data['keyable'] = get_backend().is_keyable(plug)
+    return d_data
+
+
+def get_attr_definition(plug):
+    """
+    The cached descriptor is only used if the fingerprint of the attribute has not changed. The attributes
+    created, renamed or deleted by this script update the cache themselves.
+    :param plug: String. Plug name.
+    :return: dictionary with the cached descriptor of an attribute, without the keyable status. Do not modify it.
+    """
+    node, attr_name = split_plug(plug)
+    uuid = get_node_uuid(node)
+
+    fingerprint = get_attr_fingerprint(plug)
+    entry = get_descriptor_cache().get(uuid, {}).get(attr_name)
+    if entry is not None and entry[0] in (None, fingerprint):
+        entry[0] = fingerprint
+        return entry[1]
+
+    descriptor = get_backend().attr_info(plug)
+    descriptor.pop('keyable', None)
+    if uuid is not None:
+        store_descriptor(node, uuid, descriptor, attr_name, fingerprint)
+    return descriptor
+
+
+def set_cached_descriptor(node, attr_data, attr_name=None):
+    """
+    It stores the descriptor of an attribute whose definition is already known, like a pasted one. Its
+    fingerprint is read the first time it is used.
+    :param node: String. Node name.
+    :param attr_data: dictionary with the data of the attribute.
+    :param attr_name: String. Name used to find the attribute. By default, its long name.
+    """
+    uuid = get_node_uuid(node)
+    if uuid is None:
+        return
+
+    descriptor = dict(attr_data)
+    descriptor.pop('keyable', None)
+    store_descriptor(node, uuid, descriptor, attr_name)
+
+
+def store_descriptor(node, uuid, descriptor, attr_name=None, fingerprint=None):
+    """
+    :param node: String. Node name.
+    :param uuid: String. UUID of the node.
+    :param descriptor: dictionary with the data of the attribute, without the keyable status.
+    :param attr_name: String. Name used to find the attribute, besides its long and short names.
+    :param fingerprint: tuple returned by get_attr_fingerprint, or None if it is read the first time it is used.
+    """
+    watch_node_attributes(node, uuid)
+    entry = [fingerprint, descriptor]
+    node_cache = get_descriptor_cache().setdefault(uuid, dict())
+    for name in set([attr_name, descriptor.get('longName'), descriptor.get('shortName')]):
+        if name:
+            node_cache[name] = entry
+
+
+def watch_node_attributes(node, uuid):
+    """
+    It registers, once per node, an OpenMaya callback that removes the cached descriptor of an attribute when it
+    is added, removed or renamed by any means, like undo or the Edit Attribute window. Without OpenMaya it does
+    nothing and only the fingerprint protects the cache.
+    :param node: String. Node name.
+    :param uuid: String. UUID of the node.
+    """
+    if uuid in __jlr_descriptor_callbacks:
+        return
+
+    om = get_open_maya()
+    if om is None:
+        __jlr_descriptor_callbacks[uuid] = None
+        return
+
+    messages = om.MNodeMessage.kAttributeAdded | om.MNodeMessage.kAttributeRemoved | \
+        om.MNodeMessage.kAttributeRenamed
+
+    def on_attribute_changed(message, plug, other_plug, client_data):
+        if message & messages:
+            discard_cached_descriptor(uuid, plug.partialName(useLongNames=True))
+
+    selection = om.MSelectionList()
+    selection.add(node)
+    __jlr_descriptor_callbacks[uuid] = om.MNodeMessage.addAttributeChangedCallback(selection.getDependNode(0),
+                                                                                   on_attribute_changed)
+
+
+def discard_cached_descriptor(uuid, attr_path):
+    """
+    :param uuid: String. UUID of the node.
+    :param attr_path: String. Name of the attribute, it can be a path with multi indices.
+    """
+    node_cache = __jlr_descriptor_cache.get(uuid)
+    if not node_cache:
+        return
+
+    entry = node_cache.pop(attr_path.split('.')[-1].split('[')[0], None)
+    if entry is not None:
+        for name in [entry[1].get('longName'), entry[1].get('shortName')]:
+            node_cache.pop(name, None)
+
+
+def clear_descriptor_cache(node=None, attributes=None):
+    """
+    It removes attribute descriptors from the cache.
+    :param node: String. Node name. If it is None, the whole cache is cleared.
+    :param attributes: list with the attribute names. If it is None, all the attributes of the node.
+    """
+    cache = get_descriptor_cache()
+    if node is None:
+        cache.clear()
+        remove_descriptor_callbacks()
+        return
+
+    uuid = get_node_uuid(node)
+    if attributes is None:
+        cache.pop(uuid, None)
+        return
+
+    for attr_name in attributes:
+        discard_cached_descriptor(uuid, attr_name)
+
+
+def remove_descriptor_callbacks():
+    """
+    It removes the OpenMaya callbacks registered by watch_node_attributes.
+    """
+    callbacks = [callback for callback in __jlr_descriptor_callbacks.values() if callback is not None]
+    __jlr_descriptor_callbacks.clear()
+    for callback in callbacks:
+        try:
+            get_open_maya().MMessage.removeCallback(callback)
+        except RuntimeError:
+            # The node was deleted with its callbacks.
+            pass
+
+
+#########################################
+# Attribute methods
+#########################################
+def check_string(in_string):
+    if sys.version_info.major == 2:
+        return isinstance(in_string, basestring)
+    else:
+        return isinstance(in_string, str)
+
+
+@profiled
+def copy_attr(node_source, node_target, attr_name, move=False):
+    """
+    Copy or move a existing user defined attribute between nodes.
+    Copy the source attribute connections to the new attribute.
+    If the attribute is copied and has connections, these will be connected through a plusMinusAverage node in
+    order to maintain the old and new connections.
+    If the attribute can not be moved returns None.
+    :param node_source: String or dagNode. Object with the user defined attribute.
+    :param node_target: String or dagNode. Object will receive the user defined attribute.
+    :param attr_name: String. Name of the attribute to be copied.
+    :param move: Boolean. Indicate if the attribute must be copied or moved.
+    :return: String. Plug name of the new attribute, with any backend.
+    """
+    snapshot = capture_attr(node_source, attr_name)
+    if not snapshot:
+        return None
+
+    return apply_attr(node_target, snapshot, move=move)
+
+
+class AttributeSnapshot(collections.namedtuple('AttributeSnapshot', ['node', 'uuid', 'data', 'value', 'locked',
+                                                                     'keyable', 'displayable', 'inputs',
+                                                                     'outputs', 'children', 'elements'])):
+    """
+    Immutable snapshot of a user defined attribute: definition, value, lock, keyable and channel box status,
+    connected plug names and compound children. It is built by capture_attr and replayed by apply_attr
+    without querying the source again.
+    The value of a multi attribute is a tuple of (index, value) pairs, and the connections of its elements are
+    kept in elements as (index, inputs, outputs) tuples.
+    """
+    __slots__ = ()
+
+    @property
+    def attr_data(self):
+        """
+        :return: dictionary with the necessary data to recreate the attribute.
+        """
+        return dict(self.data)
+
+    @property
+    def attr_name(self):
+        """
+        :return: String. Long name of the attribute.
+        """
+        return self.attr_data['longName']
+
+    def to_dict(self):
+        """
+        :return: dictionary with the snapshot data that can be saved as json.
+        """
+        d_snapshot = self._asdict()
+        d_snapshot['data'] = self.attr_data
+        d_snapshot['value'] = get_python_value(self.value)
+        d_snapshot['children'] = [child.to_dict() for child in self.children]
+        return d_snapshot
+
+    @classmethod
+    def from_dict(cls, d_snapshot):
+        """
+        :param d_snapshot: dictionary returned by to_dict.
+        :return: AttributeSnapshot.
+        """
+        d_snapshot = dict(d_snapshot)
+        d_snapshot['data'] = freeze_value(sorted((str(key), value) for key, value in d_snapshot['data'].items()))
+        d_snapshot['value'] = freeze_value(d_snapshot['value'])
+        d_snapshot['inputs'] = freeze_value(d_snapshot['inputs'])
+        d_snapshot['outputs'] = freeze_value(d_snapshot['outputs'])
+        d_snapshot['children'] = tuple(cls.from_dict(child) for child in d_snapshot['children'])
+        d_snapshot['elements'] = freeze_value(d_snapshot.get('elements', ()))
+        return cls(**d_snapshot)
+
+
+def freeze_value(value):
+    """
+    It converts the lists of a value in tuples, recursively.
+    :param value: any value.
+    :return: the value without lists.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(item) for item in value)
+    return value
+
+
+def get_open_maya():
+    """
+    :return: the maya.api.OpenMaya module, or None if it is not available.
+    """
+    try:
+        import maya.api.OpenMaya as open_maya
+    except ImportError:
+        return None
+    return open_maya
+
+
+def get_mplug(plug):
+    """
+    :param plug: String. Plug name.
+    :return: MPlug of the plug.
+    """
+    selection = get_open_maya().MSelectionList()
+    selection.add(plug)
+    return selection.getPlug(0)
+
+
+class PlugData(object):
+    """
+    Value of a data attribute kept as the MObject of its data, so it is read without converting it into Python
+    objects. It is only used when maya.api.OpenMaya is available.
+    """
+    __slots__ = ('data_type', 'data')
+
+    def __init__(self, data_type, data):
+        """
+        :param data_type: String. Data type of the attribute.
+        :param data: MObject with the data.
+        """
+        self.data_type = data_type
+        self.data = data
+
+    def to_python(self):
+        """
+        :return: the data as the Python value that getAttr returns, or None for geometry data, that has no Python
+        value.
+        """
+        om = get_open_maya()
+        if self.data_type == 'matrix':
+            matrix = om.MFnMatrixData(self.data).matrix()
+            return tuple(matrix.getElement(row, column) for row in range(4) for column in range(4))
+
+        function_names = {'stringArray': 'MFnStringArrayData', 'doubleArray': 'MFnDoubleArrayData',
+                          'floatArray': 'MFnFloatArrayData', 'Int32Array': 'MFnIntArrayData',
+                          'vectorArray': 'MFnVectorArrayData', 'pointArray': 'MFnPointArrayData'}
+        function_set = getattr(om, function_names.get(self.data_type, ''), None)
+        if function_set is None:
+            return None
+
+        values = function_set(self.data).array()
+        if self.data_type == 'vectorArray':
+            return tuple((value.x, value.y, value.z) for value in values)
+        if self.data_type == 'pointArray':
+            return tuple((value.x, value.y, value.z, value.w) for value in values)
+        return tuple(values)
+
+
+def can_save_value(value):
+    """
+    :param value: value of an AttributeSnapshot.
+    :return: Boolean. False if the value has geometry data, that can not be saved as json.
+    """
+    if isinstance(value, PlugData):
+        return value.data_type not in GEOMETRY_DATA_TYPES
+    if isinstance(value, tuple):
+        return all(can_save_value(item) for item in value)
+    return True
+
+
+def write_plug_data(plug, data):
+    """
+    It writes geometry data to a plug with the jlrSetPlugData command, so the write is recorded in the undo queue.
+    The jlr_set_plug_data.py plug-in, next to this script, is loaded the first time.
+    :param plug: String. Plug name.
+    :param data: MObject with the data.
+    """
+    global __jlr_pending_plug_data
+
+    if not cmds.pluginInfo(PLUG_DATA_PLUGIN, query=True, loaded=True):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        cmds.loadPlugin(os.path.join(directory, PLUG_DATA_PLUGIN + '.py'), quiet=True)
+
+    __jlr_pending_plug_data = (plug, data)
+    try:
+        cmds.jlrSetPlugData()
+    finally:
+        __jlr_pending_plug_data = None
+
+
+def pop_pending_plug_data():
+    """
+    It is called by the jlrSetPlugData command to get the data it writes.
+    :return: tuple with the plug name and the MObject with the data.
+    """
+    global __jlr_pending_plug_data
+
+    pending_plug_data = __jlr_pending_plug_data
+    __jlr_pending_plug_data = None
+    return pending_plug_data
+
+
+def get_python_value(value):
+    """
+    :param value: value of an AttributeSnapshot.
+    :return: the value with the PlugData converted into Python values.
+    """
+    if isinstance(value, PlugData):
+        return value.to_python()
+    if isinstance(value, tuple):
+        return tuple(get_python_value(item) for item in value)
+    return value
+
+
+def get_element_data(attr_data):
+    """
+    :param attr_data: dictionary with the data of a multi attribute.
+    :return: dictionary with the data of one of its elements.
+    """
+    element_data = dict(attr_data)
+    element_data.pop('multi', None)
+    element_data.pop('indexMatters', None)
+    return element_data
+
+
+def get_plug_value(plug, attr_data):
+    """
+    It reads the value of an attribute for a snapshot.
+    Message attributes have no value. Multi attributes are read element by element. Data attributes other than
+    strings are read as PlugData when OpenMaya is available, so arrays, matrices and geometry are not converted.
+    :param plug: String. Plug name.
+    :param attr_data: dictionary with the data of the attribute.
+    :return: the value.
+    """
+    if attr_data.get('attributeType') == 'message':
+        return None
+
+    if attr_data.get('multi'):
+        element_data = get_element_data(attr_data)
+        return tuple((index, get_plug_value('{}[{}]'.format(plug, index), element_data))
+                     for index in cmds.getAttr(plug, multiIndices=True) or [])
+
+    data_type = attr_data.get('dataType')
+    if data_type and data_type != 'string' and get_open_maya():
+        try:
+            return PlugData(data_type, get_mplug(plug).asMObject())
+        except RuntimeError:
+            # The attribute has no data yet.
+            return None
+
+    return freeze_value(get_backend().get_value(plug))
+
+
+def set_plug_value(plug, attr_data, value):
+    """
+    It writes a value read by get_plug_value. Every value is written in a way that can be undone and redone:
+    PlugData is written with setAttr and its Python value, and geometry data, that setAttr can not write, with the
+    jlrSetPlugData command.
+    :param plug: String. Plug name.
+    :param attr_data: dictionary with the data of the attribute.
+    :param value: the value.
+    """
+    data_type = attr_data.get('dataType')
+    if data_type == 'string' and not value:
+        # if the string source is  None(blank string), use an empty string instead
+        value = ""
+
+    if value is None or attr_data.get('attributeType') == 'message':
+        return
+
+    if attr_data.get('multi'):
+        element_data = get_element_data(attr_data)
+        for index, element_value in value:
+            set_plug_value('{}[{}]'.format(plug, index), element_data, element_value)
+
+    elif isinstance(value, PlugData) and value.data_type in GEOMETRY_DATA_TYPES:
+        write_plug_data(plug, value.data)
+
+    elif isinstance(value, PlugData):
+        get_backend().set_value(plug, value.to_python(), data_type=value.data_type)
+
+    elif attr_data.get('attributeType') == 'matrix':
+        get_backend().set_value(plug, value, data_type='matrix')
+
+    else:
+        get_backend().set_value(plug, value, data_type=data_type)
+
+
+@profiled
+def capture_attr(node, attr_name):
+    """
+    It reads all the data needed to recreate a user defined attribute: definition, value, lock, keyable and
+    channel box status, connections and compound children. The result can be applied to many nodes with
+    apply_attr without querying the source again.
+    :param node: String or dagNode. Object with the user defined attribute.
+    :param attr_name: String. Name of the attribute.
+    :return: AttributeSnapshot, or None if the attribute does not exist.
+    """
+    backend = get_backend()
+    node = str(node)
+
+    if not backend.has_attr(node, attr_name):
+        cmds.warning('The attribute{} does not exist in {}'.format(attr_name, node))
+        return None
+
+    source_attr = '{}.{}'.format(node, attr_name)
+    attr_data = get_attr_descriptor(source_attr)
+    if not attr_data:
+        return None
+
+    uuid = get_node_uuid(node)
+
+    # If attribute is a Compound, read the children attributes info.
+    children = list()
+    for child in backend.attribute_children(node, attr_data['longName']):
+        child_attr = '{}.{}'.format(node, child)
+        child_connections = _get_plug_connections(child_attr)
+        children.append(AttributeSnapshot(node=node, uuid=uuid,
+                                          data=freeze_value(sorted(get_attr_descriptor(child_attr).items())),
+                                          value=None, locked=None, keyable=None, displayable=None,
+                                          inputs=freeze_value(child_connections['inputs']),
+                                          outputs=freeze_value(child_connections['outputs']),
+                                          children=tuple(), elements=tuple()))
+
+    connections = _get_plug_connections(source_attr)
+    elements = _get_element_connections(source_attr) if attr_data.get('multi') else tuple()
+    return AttributeSnapshot(node=node, uuid=uuid,
+                             data=freeze_value(sorted(attr_data.items())),
+                             value=get_plug_value(source_attr, attr_data),
+                             locked=backend.is_locked(source_attr),
+                             keyable=backend.is_keyable(source_attr),
+                             displayable=backend.is_channel_box(source_attr),
+                             inputs=freeze_value(connections['inputs']),
+                             outputs=freeze_value(connections['outputs']),
+                             children=tuple(children),
+                             elements=elements)
+
+
+def capture_attributes(node, attributes):
+    """
+    :param node: String or dagNode. Object with the user defined attributes.
+    :param attributes: list with the names of the attributes.
+    :return: tuple of AttributeSnapshot. The attributes that do not exist are skipped.
+    """
+    return tuple(snapshot for snapshot in [capture_attr(node, attr) for attr in attributes] if snapshot)
+
+
+def get_snapshot_source(snapshot):
+    """
+    It finds the current name of the node an snapshot was taken from, even if it has been renamed.
+    If the snapshot has the UUID of the node, only that node is returned: other node with the same name, like in
+    other scene, is not the source.
+    :param snapshot: AttributeSnapshot.
+    :return: String with the node name, or None if the node does not exist anymore.
+    """
+    if snapshot.uuid:
+        nodes = cmds.ls(snapshot.uuid)
+        return nodes[0] if nodes else None
+    if cmds.objExists(snapshot.node):
+        return snapshot.node
+    return None
+
+
+def get_captured_connected_plugs(snapshot):
+    """
+    :param snapshot: AttributeSnapshot.
+    :return: list with all plugs connected to the captured attribute and its children.
+    """
+    plugs = list()
+    for captured in (snapshot,) + snapshot.children:
+        plugs.extend(captured.inputs)
+        plugs.extend(captured.outputs)
+    for index, inputs, outputs in snapshot.elements:
+        plugs.extend(inputs)
+        plugs.extend(outputs)
+    return plugs
+
+
+def get_locked_plugs(plugs):
+    """
+    :param plugs: list with plug names.
+    :return: list with the plugs that exist and are locked.
+    """
+    backend = get_backend()
+    return [plug for plug in plugs if cmds.objExists(plug) and backend.is_locked(plug)]
+
+
+def unlock_plugs(plugs):
+    """
+    It unlocks the passed plugs.
+    :param plugs: list of plug names.
+    :return: list with the plugs that were locked.
+    """
+    backend = get_backend()
+    locked = get_locked_plugs(plugs)
+    for plug in locked:
+        backend.set_locked(plug, False)
+    return locked
+
+
+def lock_plugs(plugs):
+    """
+    It locks the passed plugs.
+    :param plugs: list of plug names.
+    """
+    backend = get_backend()
+    for plug in plugs:
+        backend.set_locked(plug, True)
+
+
+@profiled
+def apply_attr(node_target, snapshot, move=False, handle_locks=True):
+    """
+    It creates an attribute captured with capture_attr in a node, with its value, status and connections.
+    :param node_target: String or dagNode. Object will receive the user defined attribute.
+    :param snapshot: AttributeSnapshot.
+    :param move: Boolean. If it is True, the source attribute is deleted before creating the new attribute,
+    if it still exists.
+    :param handle_locks: Boolean. If it is True, the connected attributes are unlocked during the operation and
+    locked again at the end. Pass False if the caller already did it.
+    :return: String. Plug name of the new attribute.
+    """
+    node_target = str(node_target)
+
+    # Unlock all attributes connected. They are locked again even if something fails.
+    l_locked = list()
+    if handle_locks:
+        l_locked = unlock_plugs(get_captured_connected_plugs(snapshot))
+
+    try:
+        new_attr = _apply_attr(node_target, snapshot, move=move)
+    finally:
+        # Lock all attributes connected locked previously.
+        lock_plugs(l_locked)
+
+    return new_attr
+
+
+def _apply_attr(node_target, snapshot, move=False):
+    backend = get_backend()
+    attr_data = snapshot.attr_data
+    attr_name = attr_data['longName']
+
+    # If move is True, delete the source attribute.
+    if move:
+        node_source = get_snapshot_source(snapshot)
+        if node_source and backend.has_attr(node_source, attr_name):
+            source_attr = '{}.{}'.format(node_source, attr_name)
+            delete_plug_attribute(source_attr, snapshot=snapshot, unlock=True)
+
+    # Create the attribute
+    _create_attr(node_target, attr_data)
+
+    # If attribute is a Compound, the children attributes are created
+    for child in snapshot.children:
+        _create_attr(node_target, child.attr_data)
+
+    new_attr = '{}.{}'.format(node_target, attr_name)
+
+    # The new attributes have the same definition as the captured ones.
+    for captured in (snapshot,) + snapshot.children:
+        set_cached_descriptor(node_target, captured.attr_data)
+
+    # Copy the value
+    set_plug_value(new_attr, attr_data, snapshot.value)
+
+    # Copy the keyable status
+    if not snapshot.keyable:
+        backend.set_channel_box(new_attr, snapshot.displayable)
+    backend.set_keyable(new_attr, snapshot.keyable)
+
+    # Connect the attributes
+    _connect_attr(new_attr, inputs=snapshot.inputs, outputs=snapshot.outputs)
+
+    # If attribute is a Compound, the children attributes are connected.
+    for child in snapshot.children:
+        _connect_attr('{}.{}'.format(node_target, child.attr_name), inputs=child.inputs, outputs=child.outputs)
+
+    # If attribute is a multi, the elements are connected.
+    for index, inputs, outputs in snapshot.elements:
+        _connect_attr('{}[{}]'.format(new_attr, index), inputs=inputs, outputs=outputs)
+
+    # Copy the lock status, after the connections, because a locked attribute can not get an input.
+    backend.set_locked(new_attr, snapshot.locked)
+
+    return new_attr
+
+
+def paste_attributes(node_source, targets, attributes, move=False, batch_size=None):
+    """
+    It copies or moves user defined attributes from one node to many nodes.
+    The source attributes are captured once and reused for every target.
+    :param node_source: String or dagNode. Object with the user defined attributes.
+    :param targets: list of nodes that will receive the attributes.
+    :param attributes: list with the names of the attributes.
+    :param move: Boolean. Indicate if the attributes must be copied or moved.
+    :param batch_size: int. Number of targets per batch. By default PASTE_BATCH_SIZE.
+    :return: list with the plug names of the new attributes.
+    """
+    return paste_snapshots(capture_attributes(node_source, attributes), targets, move=move, batch_size=batch_size)
+
+
+@profiled
+def paste_snapshots(snapshots, targets, move=False, batch_size=None):
+    """
+    It creates the attributes of a list of snapshots in many nodes.
+    The targets are processed in batches: the attributes connected to the source are unlocked once per batch and
+    locked again at the end of it. When the attributes are moved, the first target receives the original
+    attributes and their connections, and the rest of the targets receive copies.
+    :param snapshots: list of AttributeSnapshot.
+    :param targets: list of nodes that will receive the attributes.
+    :param move: Boolean. Indicate if the source attributes must be deleted.
+    :param batch_size: int. Number of targets per batch. By default PASTE_BATCH_SIZE.
+    :return: list with the plug names of the new attributes.
+    """
+    batch_size = batch_size or PASTE_BATCH_SIZE
+    targets = [str(target) for target in targets]
+
+    connected_plugs = list()
+    for snapshot in snapshots:
+        connected_plugs.extend(get_captured_connected_plugs(snapshot))
+
+    new_attrs = list()
+    for start in range(0, len(targets), batch_size):
+        l_locked = unlock_plugs(connected_plugs)
+        try:
+            for target in targets[start:start + batch_size]:
+                for snapshot in snapshots:
+                    new_attrs.append(apply_attr(target, snapshot, move=move, handle_locks=False))
+                move = False
+        finally:
+            lock_plugs(l_locked)
+
+    return new_attrs
+
+
+def get_paste_steps(snapshots, targets, move=False):
+    """
+    It splits the paste of a list of snapshots in many nodes in steps, one for each attribute and target.
+    Each step handles the locks of its own attribute, so the job can stop after any of them.
+    :param snapshots: list of AttributeSnapshot.
+    :param targets: list of nodes that will receive the attributes.
+    :param move: Boolean. If it is True, the first target receives the original attributes.
+    :return: list of functions without arguments.
+    """
+    steps = list()
+    for target in targets:
+        for snapshot in snapshots:
+            steps.append(functools.partial(apply_attr, str(target), snapshot, move=move))
+        move = False
+
+    return steps
+
+
+def save_clipboard(path):
+    """
+    It saves the copied or cut attributes to a json file, so they can be pasted in other scenes or sessions.
+    Geometry data can not be saved, so the clipboard is not saved if it has some.
+    :param path: String. Path of the json file.
+    """
+    import json
+
+    if not __jlr_copy_data:
+        cmds.warning("There are no attributes to save.")
+        return
+
+    unsaved = [snapshot.attr_name for snapshot in __jlr_copy_data
+               if not all(can_save_value(captured.value) for captured in (snapshot,) + tuple(snapshot.children))]
+    if unsaved:
+        cmds.warning('The clipboard was not saved. The geometry data of {} can not be saved in a json '
+                     'file.'.format(', '.join(unsaved)))
+        return
+
+    with open(path, 'w') as json_file:
+        json.dump({'mode': __jlr_copy_mode, 'snapshots': [snapshot.to_dict() for snapshot in __jlr_copy_data]},
+                  json_file, indent=2)
+
+
+def load_clipboard(path):
+    """
+    It loads the attributes saved with save_clipboard, ready to be pasted.
+    Cut attributes are loaded as copied, so pasting them never deletes an attribute of the current scene.
+    :param path: String. Path of the json file.
+    """
+    import json
+    global __jlr_copy_data
+    global __jlr_copy_mode
+
+    with open(path) as json_file:
+        d_clipboard = json.load(json_file)
+
+    __jlr_copy_data = tuple(AttributeSnapshot.from_dict(snapshot) for snapshot in d_clipboard['snapshots'])
+    __jlr_copy_mode = 'copy'
+    if d_clipboard['mode'] == 'cut':
+        print('The cut attributes are loaded as copied, their source attributes will not be deleted.')
+
+
+def create_attr(node, attr_data):
+    """
+    This method creates a new attribute in a node.
+    If the node already has an attribute with the same name, the new attribute will not be created.
+    :param node: String or dagNode.
+    :param attr_data: dictionary with the necessary data to create the attribute.
+    """
+    _create_attr(str(node), attr_data)
+
+
+@profiled
+def _create_attr(node, attr_data):
+    backend = get_backend()
+
+    # It checks if the attribute already exists within the node.
+    attr_name = attr_data['longName']
+    if backend.has_attr(node, attr_name):
+        cmds.warning('The attribute {} already exist in {}.'
+                     'Can not create a new attribute with the same name'.format(attr_name, node))
+
+    else:
+        # Creating the attribute
+        journal = get_active_journal()
+        if journal is not None and not attr_data.get('parent'):
+            journal.record_create('{}.{}'.format(node, attr_name))
+        backend.add_attr(node, attr_data)
+        clear_descriptor_cache(node, [attr_name])
+        attr = '{}.{}'.format(node, attr_name)
+        if not backend.is_keyable(attr):
+            backend.set_channel_box(attr, attr_data["hidden"])
+
+
+def connect_attr(attribute, inputs=None, outputs=None):
+    """
+    It connects an attribute to passed inputs and outputs.
+    :param attribute: String or Attribute.
+    :param inputs: list of inputs attributes.
+    :param outputs: list of outputs attributes.
+    """
+    _connect_attr(str(attribute),
+                  inputs=[str(attr) for attr in inputs or []],
+                  outputs=[str(attr) for attr in outputs or []])
+
+
+@profiled
+def _connect_attr(attribute, inputs=None, outputs=None):
+    backend = get_backend()
+
+    if inputs:
+        for attr_input in inputs:
+            if get_plug_inputs(attribute):
+                _make_shared_connection(attr_input, attribute)
+            else:
+                connect_plugs(attr_input, attribute)
+
+    if outputs:
+        node, attr_name = split_plug(attribute)
+        if backend.attribute_type(node, attr_name) in SHARED_CONNECTION_TYPES:
+            for attr_output in outputs:
+                if get_plug_inputs(attr_output):
+                    _make_shared_connection(attribute, attr_output)
+                else:
+                    connect_plugs(attribute, attr_output)
+
+
+def make_shared_connection(attr_source, target_attr):
+    """
+    It connects an attribute to other connected attribute through a plusMinusAverage node that averages them.
+    This way the target attribute does'nt lose their existing connections.
+    If the target is an input of a node created by this script, or it is driven by one that only drives the target,
+    the source is added as a new input of that node, so every source keeps the same weight instead of chaining one
+    node per shared connection.
+    Bool, enum and integer targets can not be averaged, so they keep their connection and a warning is shown.
+    :param attr_source: Source attribute.
+    :param target_attr: Target attribute.
+    :return: String. Name of the plusMinusAverage node, or None if the source already drives the target or the
+    target can not be blended.
+    """
+    return _make_shared_connection(str(attr_source), str(target_attr))
+
+
+@profiled
+def _make_shared_connection(attr_source, target_attr):
+    attr_previous_connected = get_plug_inputs(target_attr)[0]
+    if attr_previous_connected == attr_source:
+        return None
+
+    if not can_blend(target_attr):
+        cmds.warning('{} can not be blended, it keeps its input from {} and {} is not connected to it.'.format(
+            target_attr, attr_previous_connected, attr_source))
+        return None
+
+    # The target can be an input of a shared node, when the source is pasted again, or it can be driven by the
+    # output of one.
+    sources = [attr_previous_connected]
+    pool = get_shared_pool(target_attr) or get_shared_pool(attr_previous_connected)
+    if pool:
+        channel = get_shared_channels(pool)[0]
+        sources = [source for _, source in channel['inputs']]
+        if attr_source in sources:
+            return pool
+
+        if split_plug(target_attr)[0] == pool or channel['targets'] == [target_attr]:
+            connect_plugs(attr_source, get_pool_input(pool, channel['size'], get_next_pool_index(channel)))
+            return pool
+
+    return create_shared_pool(sources + [attr_source], get_pool_size(target_attr), [target_attr])
+
+
+def create_shared_blend(name=None, node_type=SHARED_BLEND_TYPE, weight=0.5):
+    """
+    It creates a node for a shared connection, tagged so it can be found and cleaned up later.
+    The shared connections use a plusMinusAverage node that averages its inputs. A pairBlend is only created by a
+    rollback, to put back a pairBlend made by an older version of this script.
+    :param name: String. Name of the node. By default, Maya names it.
+    :param node_type: String. 'plusMinusAverage' or 'pairBlend'.
+    :param weight: float. Weight of a pairBlend.
+    :return: String. Name of the node.
+    """
+    backend = get_backend()
+    node = backend.create_node(node_type, name=name)
+    journal = get_active_journal()
+    if journal is not None:
+        journal.record_create_node(node)
+    if node_type == 'pairBlend':
+        backend.set_value('{}.w'.format(node), weight)
+    else:
+        backend.set_value('{}.operation'.format(node), 3)
+    backend.add_attr(node, {'longName': SHARED_BLEND_TAG, 'attributeType': 'bool', 'defaultValue': True})
+    return node
+
+
+def create_shared_pool(sources, size, targets):
+    """
+    It creates a plusMinusAverage node that averages the sources and drives the targets.
+    :param sources: list with the source plugs.
+    :param size: int. 1 for single attributes, 2 or 3 for compounds with 2 or 3 children.
+    :param targets: list with the target plugs.
+    :return: String. Name of the plusMinusAverage node.
+    """
+    pool = create_shared_blend()
+    for index, source in enumerate(sources):
+        connect_plugs(source, get_pool_input(pool, size, index))
+    for target in targets:
+        connect_plugs('{}.output{}D'.format(pool, size), target, force=True)
+    return pool
+
+
+def is_shared_blend(node):
+    """
+    :param node: String. Node name.
+    :return: Boolean. True if the node is a plusMinusAverage, or a pairBlend of an older version, created by this
+    script for a shared connection.
+    """
+    return cmds.nodeType(node) in SHARED_BLEND_NODE_TYPES and get_backend().has_attr(node, SHARED_BLEND_TAG)
+
+
+def get_shared_blends():
+    """
+    :return: list with the names of all nodes of the scene created by this script for shared connections.
+    """
+    return [node for node in cmds.ls(type=SHARED_BLEND_NODE_TYPES) or []
+            if get_backend().has_attr(node, SHARED_BLEND_TAG)]
+
+
+def get_shared_pool(plug):
+    """
+    :param plug: String. Plug name.
+    :return: String. Name of the plusMinusAverage node created by this script if the plug is one of its inputs or
+    outputs, or None.
+    """
+    if not plug or not re.match(r'^(input[123]D\[\d+\]|output[123]D)$', get_plug_key(plug)):
+        return None
+    node = split_plug(plug)[0]
+    return node if is_shared_blend(node) else None
+
+
+def get_pool_size(plug):
+    """
+    :param plug: String. Plug name.
+    :return: int. Size of the plusMinusAverage plugs that fit the attribute: 1 for single attributes, or the number
+    of children of a compound.
+    """
+    node, attr_name = split_plug(plug)
+    return len(get_backend().attribute_children(node, attr_name)) or 1
+
+
+def get_pool_input(pool, size, index):
+    """
+    :param pool: String. Name of the plusMinusAverage node.
+    :param size: int. 1, 2 or 3.
+    :param index: int. Element index.
+    :return: String. Input plug of the node.
+    """
+    return '{}.input{}D[{}]'.format(pool, size, index)
+
+
+def get_next_pool_index(channel):
+    """
+    :param channel: dictionary returned by get_shared_channels.
+    :return: int. Index after the last connected input.
+    """
+    indices = [int(re.search(r'\[(\d+)\]$', plug).group(1)) for plug, _ in channel['inputs']]
+    return max(indices) + 1 if indices else 0
+
+
+def can_blend(plug):
+    """
+    :param plug: String. Plug name.
+    :return: Boolean. False if the attribute holds discrete values, bool, enum or integer, that a plusMinusAverage
+    would average as doubles.
+    """
+    node, attr_name = split_plug(plug)
+    return get_backend().attribute_type(node, attr_name) not in DISCRETE_TYPES
+
+
+def get_shared_channels(node):
+    """
+    It describes the connections of a node created for shared connections. A plusMinusAverage has one channel.
+    A pairBlend of an older version has a channel for each of its connected outputs.
+    :param node: String. Node name.
+    :return: list of dictionaries with the output key, the size, the list of (input plug, source plug) sorted by
+    input and the list of target plugs of each channel.
+    """
+    index = get_connection_index(node) or ConnectionIndex(node)
+    channels = list()
+    if cmds.nodeType(node) == 'pairBlend':
+        for out_key, targets in sorted(index.outputs.items()):
+            match = re.match(r'^out(Translate|Rotate)([XYZ]?)$', out_key)
+            if not match or not targets:
+                continue
+            inputs = list()
+            for slot in '12':
+                in_key = 'in{}{}{}'.format(match.group(1), match.group(2), slot)
+                sources = index.inputs.get(in_key)
+                if sources:
+                    inputs.append(('{}.{}'.format(node, in_key), sources[0]))
+            channels.append({'output': out_key, 'size': 1 if match.group(2) else 3, 'inputs': inputs,
+                             'targets': list(targets)})
+        return channels
+
+    inputs = dict()
+    targets = list()
+    size = None
+    for key, sources in index.inputs.items():
+        match = re.match(r'^input([123])D\[(\d+)\]$', key)
+        if match and sources:
+            size = int(match.group(1))
+            inputs[int(match.group(2))] = ('{}.{}'.format(node, key), sources[0])
+    for key, plugs in index.outputs.items():
+        match = re.match(r'^output([123])D$', key)
+        if match and plugs:
+            size = int(match.group(1))
+            targets.extend(plugs)
+    if size is not None:
+        channels.append({'output': 'output{}D'.format(size), 'size': size,
+                         'inputs': [inputs[element] for element in sorted(inputs)], 'targets': targets})
+    return channels
+
+
+@profiled
+@transaction
+def collapse_shared_blends(blends=None):
+    """
+    It simplifies the nodes created by the shared connections, until no more can be simplified:
+    - Nodes without outputs are deleted.
+    - Nodes with a single source are replaced by a direct connection.
+    - Chains are flattened: a node that only feeds another shared node is merged into it, so all the sources are
+      averaged by one node with the same weight.
+    - Nodes that average the same sources as another node are merged into it.
+    - pairBlends created by older versions of this script are replaced by a plusMinusAverage node that averages
+      their inputs with the same weight.
+    :param blends: list with the names of the nodes to check. By default, all created by this script.
+    :return: list with the names of the removed nodes.
+    """
+    if blends is None:
+        blends = get_shared_blends()
+    blends = [str(node) for node in blends]
+
+    removed = list()
+    changed = True
+    while changed:
+        changed = False
+        channels = dict((node, get_shared_channels(node)) for node in blends if node not in removed)
+        signatures = dict()
+
+        for node in list(blends):
+            if node in removed:
+                continue
+
+            replacements = plan_blend_collapse(node, channels, signatures)
+            if replacements is None:
+                continue
+
+            for sources, size, targets in replacements:
+                if len(sources) == 1:
+                    for target in targets:
+                        connect_plugs(sources[0], target, force=True)
+                elif sources:
+                    blends.append(create_shared_pool(sources, size, targets))
+
+            delete_shared_blend(node)
+            removed.append(node)
+            changed = True
+            break
+
+    return removed
+
+
+def plan_blend_collapse(node, channels, signatures):
+    """
+    It checks if a shared node can be simplified, following the rules of collapse_shared_blends.
+    :param node: String. Node name.
+    :param channels: dictionary with the channels of every shared node, see get_shared_channels.
+    :param signatures: dictionary with the nodes kept so far, by their size and sources. If the node is kept, it is
+    added to it.
+    :return: list with a (sources, size, targets) tuple for each channel of the node, to replace it by a direct
+    connection when there is one source or by a new plusMinusAverage node when there are more, or None if the node
+    must be kept.
+    """
+    node_channels = [channel for channel in channels[node] if channel['targets']]
+    is_pool = cmds.nodeType(node) != 'pairBlend'
+
+    replacements = list()
+    for channel in node_channels:
+        current = [source for _, source in channel['inputs']]
+        sources = flatten_shared_sources(node, channel, channels, set())
+        signature = (channel['size'], tuple(sorted(sources)))
+        if len(sources) > 1 and signature in signatures:
+            sources = ['{}.output{}D'.format(signatures[signature], channel['size'])]
+        elif len(sources) > 1 and is_pool and sources == current:
+            signatures[signature] = node
+            return None
+        replacements.append((sources, channel['size'], channel['targets']))
+    return replacements
+
+
+def flatten_shared_sources(node, channel, channels, visited):
+    """
+    :param node: String. Node name.
+    :param channel: dictionary. Channel of the node, see get_shared_channels.
+    :param channels: dictionary with the channels of every shared node.
+    :param visited: set with the nodes already flattened, to stop on cycles.
+    :return: list with the sources of the channel without duplicates. A source that is the output of another shared
+    node that only drives this channel is replaced by the sources of that node.
+    """
+    visited.add(node)
+    sources = list()
+    for input_plug, source in channel['inputs']:
+        other = split_plug(source)[0]
+        inner = [other_channel for other_channel in channels.get(other, [])
+                 if other_channel['output'] == get_plug_key(source)]
+        other_targets = [target for other_channel in channels.get(other, []) for target in other_channel['targets']]
+        if inner and other not in visited and other_targets == [input_plug]:
+            flattened = flatten_shared_sources(other, inner[0], channels, visited)
+        else:
+            flattened = [source]
+        sources.extend(plug for plug in flattened if plug not in sources)
+    return sources
+
+
+def delete_shared_blend(node):
+    """
+    It deletes a shared node and removes its connections from the connection indexes of the active transaction.
+    The node is recorded in the journal of the active transaction, so a rollback creates it again.
+    :param node: String. Node name.
+    """
+    journal = get_active_journal()
+    if journal is not None:
+        journal.record_delete_node(node)
+
+    index = get_cached_connection_index(node)
+    cmds.delete(node)
+
+    if not index:
+        return
+
+    for key, source_plugs in index.inputs.items():
+        for source_plug in source_plugs:
+            other_index = get_cached_connection_index(split_plug(source_plug)[0])
+            if other_index:
+                other_index.remove_output(source_plug, '{}.{}'.format(node, key))
+
+    for key, target_plugs in index.outputs.items():
+        for target_plug in target_plugs:
+            other_index = get_cached_connection_index(split_plug(target_plug)[0])
+            if other_index and other_index.get_inputs(target_plug) == ['{}.{}'.format(node, key)]:
+                other_index.remove_input(target_plug)
+
+    del get_active_transaction().connection_indexes[node]
+
+
+def get_selected_attributes():
+    """
+    Get the selected attributes in the ChannelBox.
+    If there are not attributes selected, this method returns a empty list.
+    :return: list with the selected attributes.
+    """
+    attrs = cmds.channelBox('mainChannelBox', q=True, sma=True)
+    if not attrs:
+        return []
+
+    return attrs
+
+
+def get_all_user_attributes(node):
+    """
+    It gets all user defined attributes of a node.
+    :param node: dagNode.
+    :return: list with all user defined attributes.
+    """
+    return list(NodeLayout(node).attributes)
+
+
+def get_attr_info(attribute):
+    """
+    Get all data of a passed attribute.
+    The data that it returns depends on the type of attribute.
+    :param attribute: String or Attribute.
+    :return: dictionary with the necessary data to recreate the attribute.
+    """
+    return get_attr_descriptor(str(attribute))
+
+
+def get_attr_connections(source_attr):
+    """
+    It returns the inputs and outputs connections of an attribute.
+    :param source_attr: String or Attribute.
+    :return: dictionary with the inputs and outputs connections, as lists of plug names with any backend.
+    """
+    connections = _get_plug_connections(str(source_attr))
+    return {'inputs': list(connections['inputs']), 'outputs': list(connections['outputs'])}
+
+
+@profiled
+def _get_plug_connections(plug):
+    return {'inputs': get_plug_inputs(plug), 'outputs': get_plug_outputs(plug)}
+
+
+def _get_element_connections(plug):
+    """
+    :param plug: String. Plug name of a multi attribute.
+    :return: tuple with the (index, inputs, outputs) of the connected elements, sorted by index.
+    """
+    node, attr_name = split_plug(plug)
+    index = get_connection_index(node) or ConnectionIndex(node)
+    pattern = re.compile(r'^{}\[(\d+)\]$'.format(re.escape(attr_name)))
+
+    elements = dict()
+    for connections, position in [(index.inputs, 0), (index.outputs, 1)]:
+        for key, plugs in connections.items():
+            match = pattern.match(key)
+            if match:
+                elements.setdefault(int(match.group(1)), ([], []))[position].extend(plugs)
+
+    return tuple((element, tuple(inputs), tuple(outputs)) for element, (inputs, outputs) in sorted(elements.items()))
+
+
+#########################################
+# Layout methods
+#########################################
+
+COMPOUND_TYPES = ['compound', 'double2', 'double3', 'float2', 'float3', 'long2', 'long3', 'short2', 'short3']
+
+
+class NodeLayout(object):
+    """
+    Snapshot of the user defined attributes layout of a node.
+    It is built once per node and operation with a single listAttr, and it is updated as the attributes are
+    rebuilt, added or removed, so the node does not need to be listed again in every step.
+    """
+
+    def __init__(self, node):
+        """
+        :param node: String or dagNode.
+        """
+        self.node = node
+        self.attributes = list()
+        self.children = dict()
+        self.parents = dict()
+        self.types = dict()
+        self.long_names = dict()
+        self.dividers = DividerIndex()
+        self.refresh()
+
+    @profiled('NodeLayout.refresh')
+    def refresh(self):
+        """
+        It reads again the layout from the node.
+        """
+        backend = get_backend()
+        node_name = str(self.node)
+        long_names = backend.list_user_attributes(node_name)
+        short_names = backend.list_user_attributes(node_name, short_names=True)
+
+        self.attributes = list()
+        self.children = dict()
+        self.parents = dict()
+        self.types = dict()
+        self.long_names = dict(zip(short_names, long_names))
+        self.dividers = DividerIndex(short_names + long_names)
+
+        for attr in long_names:
+            self.types[attr] = backend.attribute_type(node_name, attr)
+
+        for attr in long_names:
+            if self.types[attr] not in COMPOUND_TYPES:
+                continue
+
+            children = backend.attribute_children(node_name, attr)
+            self.children[attr] = list(children)
+            for child in children:
+                self.parents[child] = attr
+
+        self.attributes = [attr for attr in long_names if attr not in self.parents]
+
+    def __contains__(self, attr_name):
+        return self.resolve(attr_name) is not None
+
+    def index(self, attr_name):
+        """
+        :param attr_name: String. Name of a top level attribute.
+        :return: int. Position of the attribute in the layout.
+        """
+        return self.attributes.index(attr_name)
+
+    def has_name(self, attr_name):
+        """
+        :param attr_name: String. Long or short name of any user defined attribute.
+        :return: Boolean. True if the name is used by any user defined attribute of the node.
+        """
+        return attr_name in self.types or attr_name in self.long_names
+
+    def resolve(self, attr_name):
+        """
+        It resolves a long or short attribute name to the top level attribute that owns it.
+        :param attr_name: String.
+        :return: String with the long name of the top level attribute, or None if it is not user defined.
+        """
+        long_name = self.long_names.get(attr_name, attr_name)
+        long_name = self.parents.get(long_name, long_name)
+        if long_name in self.attributes:
+            return long_name
+        return None
+
+    def move_to_end(self, attr_name):
+        """
+        It updates the layout after an attribute has been rebuilt at the end of the list.
+        :param attr_name: String. Long name of a top level attribute.
+        """
+        self.attributes.remove(attr_name)
+        self.attributes.append(attr_name)
+
+    def add(self, attr_data, children_data=None):
+        """
+        It updates the layout after a new attribute has been created at the end of the list.
+        :param attr_data: dictionary with the data used to create the attribute.
+        :param children_data: list of dictionaries with the data of the compound children.
+        """
+        attr_name = attr_data['longName']
+        self.attributes.append(attr_name)
+        self.types[attr_name] = attr_data.get('attributeType', attr_data.get('type', attr_data.get('dataType')))
+        self.dividers.add(attr_name)
+        if attr_data.get('shortName'):
+            self.long_names[attr_data['shortName']] = attr_name
+
+        if children_data:
+            self.children[attr_name] = list()
+            for child_data in children_data:
+                child_name = child_data['longName']
+                self.children[attr_name].append(child_name)
+                self.parents[child_name] = attr_name
+                self.types[child_name] = child_data.get('attributeType', child_data.get('dataType'))
+                if child_data.get('shortName'):
+                    self.long_names[child_data['shortName']] = child_name
+
+    def remove(self, attr_name):
+        """
+        It updates the layout after an attribute has been deleted.
+        :param attr_name: String. Long name of a top level attribute.
+        """
+        self.attributes.remove(attr_name)
+        removed = [attr_name] + self.children.pop(attr_name, [])
+        for name in removed:
+            self.types.pop(name, None)
+            self.parents.pop(name, None)
+        for short_name, long_name in list(self.long_names.items()):
+            if long_name in removed:
+                del self.long_names[short_name]
+                self.dividers.discard(short_name)
+        for name in removed:
+            self.dividers.discard(name)
+
+    def rename(self, attr_name, new_name):
+        """
+        It updates the layout after a top level attribute without children has been renamed. A short name equal to
+        the long name is renamed too.
+        :param attr_name: String. Long name of the attribute.
+        :param new_name: String. New long name of the attribute.
+        """
+        self.attributes[self.attributes.index(attr_name)] = new_name
+        self.types[new_name] = self.types.pop(attr_name, None)
+        for short_name, long_name in list(self.long_names.items()):
+            if long_name == attr_name:
+                del self.long_names[short_name]
+                self.dividers.discard(short_name)
+                short_name = new_name if short_name == attr_name else short_name
+                self.long_names[short_name] = new_name
+                self.dividers.add(short_name)
+        self.dividers.discard(attr_name)
+        self.dividers.add(new_name)
+
+
+def get_top_level_attributes(node, attributes, layout=None):
+    """
+    It resolves the passed attribute names to the top level attributes that own them.
+    Compound children are replaced by their parent and repeated names are removed.
+    :param node: dagNode.
+    :param attributes: list with the names of the attributes.
+    :param layout: NodeLayout of the node. If it is None, a new one is built.
+    :return: list with the long names of the top level attributes.
+    """
+    if layout is None:
+        layout = NodeLayout(node)
+
+    top_level = list()
+    for attribute in attributes:
+        attr_name = layout.resolve(attribute)
+        if attr_name and attr_name not in top_level:
+            top_level.append(attr_name)
+
+    return top_level
+
+
+#########################################
+# Reorder methods
+#########################################
+
+@profiled
+def plan_reorder(current_order, target_order):
+    """
+    It computes the smallest list of attributes that must be rebuilt to go from the current order to the target order.
+    Rebuilding an attribute sends it to the end of the list, so the attributes that are kept are the longest prefix
+    of the target order that is already a subsequence of the current order. The rest of them are rebuilt.
+    :param current_order: list with the current order of the attributes.
+    :param target_order: list with the wanted order of the same attributes.
+    :return: list with the attributes to rebuild, in the order they must be rebuilt.
+    """
+    if sorted(current_order) != sorted(target_order):
+        raise ValueError('The target order must contain the same attributes as the current order.')
+
+    kept = 0
+    for attr in current_order:
+        if kept < len(target_order) and attr == target_order[kept]:
+            kept += 1
+
+    return list(target_order[kept:])
+
+
+def shift_attributes(order, attributes, direction):
+    """
+    It returns a new order where the passed attributes are moved one position up or down.
+    An attribute is not moved beyond the ends of the list or over another moved attribute that can not move.
+    :param order: list with the current order of the attributes.
+    :param attributes: list with the attributes to move.
+    :param direction: int. -1 to move the attributes up or 1 to move them down.
+    :return: list with the new order.
+    """
+    new_order = list(order)
+    moving = [attr for attr in new_order if attr in attributes]
+    if direction > 0:
+        moving.reverse()
+
+    blocked = set()
+    for attr in moving:
+        pos_attr = new_order.index(attr)
+        pos_neighbour = pos_attr + direction
+
+        if pos_neighbour < 0 or pos_neighbour >= len(new_order) or new_order[pos_neighbour] in blocked:
+            blocked.add(attr)
+            continue
+
+        new_order[pos_attr], new_order[pos_neighbour] = new_order[pos_neighbour], new_order[pos_attr]
+
+    return new_order
+
+
+@profiled
+def reorder_attributes(node, target_order, layout=None, engine=None):
+    """
+    It sorts the user defined attributes of a node in the target order.
+    Only the attributes returned by plan_reorder are sent to the end of the list.
+    :param node: dagNode.
+    :param target_order: list with the wanted order of all user defined attributes of the node.
+    :param layout: NodeLayout of the node. If it is None, a new one is built. It is updated with the new order.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: Boolean. False if some attribute could not be moved.
+    """
+    node = str(node)
+
+    if layout is None:
+        layout = NodeLayout(node)
+
+    return apply_reorder_plan(node, plan_reorder(layout.attributes, target_order), layout, engine=engine)
+
+
+def apply_reorder_plan(node, plan, layout=None, engine=None):
+    """
+    It sends to the end of the list, in order, the attributes of a plan computed by plan_reorder.
+    The same plan can be applied to every node that shares the layout it was computed from.
+    :param node: String. Node name.
+    :param plan: list with the attributes to rebuild, in the order they must be rebuilt.
+    :param layout: NodeLayout of the node. If it is not None, it is updated with the new order.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: Boolean. False if some attribute could not be moved. The changes of the active transaction are rolled
+    back in that case.
+    """
+    move_to_end = REORDER_ENGINES[engine or get_reorder_engine()]
+
+    for attr in plan:
+        if not move_to_end(node, attr):
+            rollback_active_transaction()
+            return False
+        if layout is not None:
+            layout.move_to_end(attr)
+
+    return True
+
+
+def get_layout_signature(node):
+    """
+    It returns a value that is equal for all nodes with the same user defined attributes in the same order.
+    It only needs one listAttr, so nodes can be grouped before building any NodeLayout.
+    :param node: String or dagNode.
+    :return: tuple with the long names of all user defined attributes, compound children included.
+    """
+    return tuple(get_backend().list_user_attributes(str(node)))
+
+
+@profiled
+def group_nodes_by_layout(nodes):
+    """
+    It groups the nodes that share the same layout signature, keeping the order in which they are found.
+    :param nodes: list of nodes.
+    :return: list of lists with the names of the nodes of each group.
+    """
+    if len(nodes) < 2:
+        return [[str(node) for node in nodes]]
+
+    groups = collections.OrderedDict()
+    for node in nodes:
+        groups.setdefault(get_layout_signature(node), list()).append(str(node))
+
+    return list(groups.values())
+
+
+def reorder_node_groups(nodes, get_target_order, engine=None):
+    """
+    It reorders many nodes computing the target order and the reorder plan only once per group of nodes with the
+    same layout. The layout of the first node of each group is used for all its members.
+    :param nodes: list of nodes.
+    :param get_target_order: function that receives a NodeLayout and returns the wanted order of its attributes.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: Boolean. False if some attribute could not be moved. The changes of the active transaction are rolled
+    back in that case.
+    """
+    plans = get_reorder_plans(nodes, get_target_order)
+    problems = check_reorder_plans(plans, engine=engine)
+    if problems:
+        raise RuntimeError('\n'.join(problems))
+
+    for step in get_plan_steps(plans, engine=engine):
+        if not step():
+            rollback_active_transaction()
+            return False
+
+    return True
+
+
+def get_plan_steps(plans, engine=None):
+    """
+    :param plans: list of tuples with a node name and its reorder plan, like get_reorder_plans returns.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: list of functions without arguments. Each one sends one attribute of one node to the end of the list.
+    """
+    move_to_end = REORDER_ENGINES[engine or get_reorder_engine()]
+
+    steps = list()
+    for node, plan in plans:
+        steps.extend(functools.partial(move_to_end, node, attr) for attr in plan)
+
+    return steps
+
+
+def get_reorder_plans(nodes, get_target_order):
+    """
+    :param nodes: list of nodes.
+    :param get_target_order: function that receives a NodeLayout and returns the wanted order of its attributes.
+    :return: list of tuples with each node name and its reorder plan. The plan is computed once per group of nodes
+    with the same layout.
+    """
+    plans = list()
+    for group in group_nodes_by_layout(nodes):
+        layout = NodeLayout(group[0])
+        plan = plan_reorder(layout.attributes, get_target_order(layout))
+        plans.extend((node, plan) for node in group)
+
+    return plans
+
+
+def get_node_problems(node, delete_attributes=True):
+    """
+    It checks that the user defined attributes of a node can be changed.
+    :param node: String. Node name.
+    :param delete_attributes: Boolean. If it is True, some attributes of the node are going to be deleted, which is
+    not allowed in referenced nodes.
+    :return: list of Strings with the problems found.
+    """
+    node = str(node)
+    if not cmds.objExists(node):
+        return ['{} does not exist.'.format(node)]
+
+    problems = list()
+    if cmds.lockNode(node, q=True, lock=True)[0]:
+        problems.append('{} is locked.'.format(node))
+    if delete_attributes and cmds.referenceQuery(node, isNodeReferenced=True):
+        problems.append('{} is referenced, its attributes can not be rebuilt.'.format(node))
+    return problems
+
+
+@profiled
+def check_reorder_plans(plans, engine=None):
+    """
+    Pre-flight check of reorder plans, to run before any change: the nodes can be changed, the attributes exist
+    and can be captured, and the engine can run.
+    :param plans: list of tuples with a node name and its reorder plan, like get_reorder_plans returns.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: list of Strings with the problems found. It is empty if the plans can be applied.
+    """
+    plans = [(node, plan) for node, plan in plans if plan]
+    problems = list()
+    if plans and (engine or get_reorder_engine()) == 'preserve' and not cmds.undoInfo(q=True, state=True):
+        problems.append('The undo queue is disabled, the preserve engine can not move attributes.')
+
+    for node, plan in plans:
+        node_problems = get_node_problems(node)
+        problems.extend(node_problems)
+        if node_problems:
+            continue
+
+        for attr in plan:
+            plug = '{}.{}'.format(node, attr)
+            if not get_attr_definition(plug):
+                problems.append('{} can not be rebuilt.'.format(plug))
+
+    return problems
+
+
+def check_paste(snapshots, targets, move=False):
+    """
+    Pre-flight check of a paste, to run before any change: the targets can receive attributes, they do not have
+    attributes with the pasted names yet and, if the attributes are moved, the source nodes can be changed.
+    :param snapshots: list of AttributeSnapshot.
+    :param targets: list of nodes that will receive the attributes.
+    :param move: Boolean. Indicate if the source attributes must be deleted.
+    :return: list of Strings with the problems found. It is empty if the paste can be done.
+    """
+    backend = get_backend()
+    sources = [get_snapshot_source(snapshot) if move else None for snapshot in snapshots]
+
+    problems = list()
+    for target in targets:
+        target = str(target)
+        node_problems = get_node_problems(target, delete_attributes=False)
+        problems.extend(node_problems)
+        if node_problems:
+            continue
+
+        existing_names = set(backend.list_user_attributes(target))
+        existing_names.update(backend.list_user_attributes(target, short_names=True))
+        for snapshot, node_source in zip(snapshots, sources):
+            # A moved attribute is deleted from its source before it is created again.
+            if node_source == target:
+                continue
+            for attr_snapshot in (snapshot,) + tuple(snapshot.children):
+                attr_data = attr_snapshot.attr_data
+                names = [attr_data['longName'], attr_data.get('shortName')]
+                existing = [name for name in names if name in existing_names]
+                if existing:
+                    problems.append('{} already has an attribute named {}.'.format(target, existing[0]))
+
+    if move:
+        for node_source in set(sources):
+            if node_source:
+                problems.extend(get_node_problems(node_source))
+
+    return problems
+
+
+def report_problems(name, problems):
+    """
+    It shows the problems found by a pre-flight check of a command.
+    :param name: String. Name of the command.
+    :param problems: list of Strings.
+    :return: Boolean. True if there are problems and the command must not run.
+    """
+    for problem in problems:
+        cmds.warning(problem)
+    if problems:
+        cmds.warning('{} was not run. Nothing has been changed.'.format(name))
+    return bool(problems)
+
+
+def move_to_end_rebuilding(node, attr_name):
+    """
+    Reorder engine that sends an attribute to the end of the list by deleting it and creating it again.
+    The value, status and connections are captured and restored by copy_attr.
+    :param node: String. Node name.
+    :param attr_name: String. Name of a top level user defined attribute.
+    :return: Boolean. False if the attribute could not be rebuilt.
+    """
+    return bool(copy_attr(node, node, attr_name, move=True))
+
+
+@profiled
+def move_to_end_preserving(node, attr_name):
+    """
+    Reorder engine that sends an attribute to the end of the list keeping the original attribute.
+    The attribute is deleted and the deletion is undone, Maya restores it at the end of the user defined
+    attributes with its value, status and connections, so nothing needs to be read or written again.
+    It needs the undo queue enabled. The undo chunk of the active transaction is closed while the attribute is
+    moved and opened again after it, so the change of order is not part of any undo step and the command is split
+    in several undo steps. A warning is shown once per transaction.
+    :param node: String. Node name.
+    :param attr_name: String. Name of a top level user defined attribute.
+    :return: Boolean. False if the attribute could not be moved.
+    """
+    if not cmds.undoInfo(q=True, state=True):
+        cmds.warning('The undo queue is disabled. The attribute {} can not be moved with the preserve '
+                     'engine.'.format(attr_name))
+        return False
+
+    backend = get_backend()
+    plug = '{}.{}'.format(node, attr_name)
+    plugs = [plug] + ['{}.{}'.format(node, child) for child in backend.attribute_children(node, attr_name)]
+
+    journal = get_active_journal()
+    if journal is not None:
+        journal.record_node(node)
+
+    active_transaction = get_active_transaction()
+    if active_transaction is not None:
+        if not active_transaction.undo_split:
+            active_transaction.undo_split = True
+            cmds.warning('The preserve engine splits {} in several undo steps, and undoing them does not restore the '
+                         'order of the attributes.'.format(active_transaction.name))
+        cmds.undoInfo(closeChunk=True)
+
+    # The attributes are unlocked before the deletion, so the undo restores them unlocked.
+    l_locked = unlock_plugs(plugs)
+    try:
+        cmds.deleteAttr(plug)
+        cmds.undo()
+
+    finally:
+        lock_plugs(l_locked)
+        if active_transaction is not None:
+            cmds.undoInfo(openChunk=True, chunkName=active_transaction.name)
+
+    return True
+
+
+REORDER_ENGINES = {'rebuild': move_to_end_rebuilding, 'preserve': move_to_end_preserving}
+
+
+def set_reorder_engine(name):
+    """
+    It sets the engine used to reorder the attributes.
+    'rebuild' (default) deletes and creates again the attributes.
+    'preserve' keeps the original attributes using the deleteAttr and undo trick. The change of order can not be
+    undone and each command that moves attributes is split in several undo steps, so a warning is shown.
+    :param name: String. Name of the engine.
+    """
+    global __jlr_reorder_engine
+
+    if name not in REORDER_ENGINES:
+        raise ValueError('Unknown reorder engine {}. Use one of: {}'.format(name, ', '.join(sorted(REORDER_ENGINES))))
+
+    if name == 'preserve':
+        cmds.warning('With the preserve engine the commands that move attributes are not a single undo step, and '
+                     'undoing them does not restore the order of the attributes.')
+
+    __jlr_reorder_engine = name
+
+
+def get_reorder_engine():
+    """
+    :return: String. Name of the engine used to reorder the attributes.
+    """
+    return __jlr_reorder_engine
+
+
+@profiled
+@transaction
+def sort_attributes(node, order=None, key=None, reverse=False, engine=None):
+    """
+    It sorts the user defined attributes of a node in a single pass. Each attribute is moved at most once.
+    If order is passed, those attributes are placed first in that order and the rest keep their order after them.
+    If key is passed, the attributes are sorted by the result of key(attribute_name).
+    If neither order nor key are passed, the attributes are sorted alphabetically.
+    :param node: String or dagNode.
+    :param order: list with the names of the attributes in the wanted order.
+    :param key: function that receives an attribute name and returns the value to sort by.
+    :param reverse: Boolean. If it is True, the key or alphabetical sort is reversed.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: Boolean. False if some attribute could not be moved.
+    """
+    if order is not None and key is not None:
+        raise ValueError('sort_attributes accepts an order or a key, not both.')
+
+    node = str(node)
+    layout = NodeLayout(node)
+
+    if order is not None:
+        listed = get_top_level_attributes(node, order, layout)
+        target_order = listed + [attr for attr in layout.attributes if attr not in listed]
+    else:
+        if key is None:
+            key = sort_key_alphabetical
+        target_order = sorted(layout.attributes, key=key, reverse=reverse)
+
+    return reorder_attributes(node, target_order, layout, engine=engine)
+
+
+def sort_key_alphabetical(attr_name):
+    """
+    Key function to sort attributes alphabetically without taking into account the case.
+    :param attr_name: String.
+    :return: String.
+    """
+    return attr_name.lower()
+
+
+@profiled
+def select_attributes(attributes, nodes):
+    """
+    Selects the passed attributes in the main Channel Box.
+    The nodes are only selected again if the selection is different. The channel box is updated from the idle
+    queue, only once if it is requested several times before, and only if its selection is different.
+    :param attributes: List of the attributes to select.
+    :param nodes: List of the objects with the attributes to select
+    """
+    global __jlr_pending_selection
+    nodes = [str(node) for node in nodes]
+    if cmds.ls(sl=True) != nodes:
+        cmds.select(nodes, r=True)
+
+    # The channel box shows the attributes of the last selected object, its plugs select the rows of all of them.
+    is_scheduled = __jlr_pending_selection is not None
+    __jlr_pending_selection = ['{}.{}'.format(nodes[-1], attr) for attr in attributes] if nodes else []
+    if not is_scheduled:
+        cmds.evalDeferred(restore_channel_box_selection)
+
+
+def restore_channel_box_selection():
+    """
+    It selects in the main Channel Box the plugs of the last select_attributes call, if they are not selected yet.
+    """
+    global __jlr_pending_selection
+    plugs = __jlr_pending_selection
+    __jlr_pending_selection = None
+    if not plugs:
+        return
+
+    if set(get_selected_attributes()) == set(split_plug(plug)[1] for plug in plugs):
+        return
+
+    cmds.channelBox('mainChannelBox', e=True, select=plugs, update=True)
+
+
+@profiled
+@transaction
+def move_up_attribute(*args, **kwargs):
+    """
+    It moves a selected attributes in the channel box one position up.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    return move_selected_attributes(-1, dry_run=kwargs.get('dry_run', False))
+
+
+@profiled
+@transaction
+def move_down_attribute(*args, **kwargs):
+    """
+    It moves a selected attributes in the channel box one position down.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    return move_selected_attributes(1, dry_run=kwargs.get('dry_run', False))
+
+
+def move_selected_attributes(direction, dry_run=False):
+    """
+    It moves the selected attributes in the channel box one position up or down in all selected items.
+    Only the attributes that the reorder planner asks for are rebuilt. The plan is computed once for every group
+    of items with the same attributes.
+    :param direction: int. -1 to move the attributes up or 1 to move them down.
+    :param dry_run: Boolean. If it is True, nothing is moved and the planned operations are returned.
+    :return: CostEstimate if dry_run is True.
+    """
+    estimate = CostEstimate('move_attributes') if dry_run else None
+    selected_attributes = get_selected_attributes()
+
+    if not len(cmds.ls(sl=1)) or not selected_attributes:
+        print('Nothing Selected')
+        return estimate
+
+    selected_items = cmds.ls(sl=True)
+
+    def get_target_order(layout):
+        attributes = get_top_level_attributes(layout.node, selected_attributes, layout)
+        return shift_attributes(layout.attributes, attributes, direction)
+
+    plans = get_reorder_plans(selected_items, get_target_order)
+    if dry_run:
+        estimate_reorder(estimate, plans)
+        return estimate
+
+    if report_problems('Move Attributes', check_reorder_plans(plans)):
+        return
+
+    def on_finish(job):
+        if job.status == 'done':
+            select_attributes(selected_attributes, selected_items)
+
+    run_job('Move Attributes', get_plan_steps(plans), on_finish=on_finish)
+
+
+@profiled
+def sort_selected_attributes(*args, **kwargs):
+    """
+    It sorts alphabetically the user defined attributes of the selected items, see sort_selected_items.
+    The dialog is shown before the transaction starts, so the viewport is not suspended while it is open.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it. The dialog is not
+    shown in a dry run, reverse=True estimates a descending sort.
+    :return: CostEstimate if dry_run is True.
+    """
+    dry_run = kwargs.get('dry_run', False)
+    if not cmds.ls(sl=True):
+        print('Nothing Selected')
+        return CostEstimate('sort_attributes') if dry_run else None
+
+    if dry_run:
+        return sort_selected_items(reverse=kwargs.get('reverse', False), dry_run=True)
+
+    result = cmds.confirmDialog(title='Sort Attributes', message='Sort the attributes alphabetically:',
+                                button=['Ascending', 'Descending', 'Cancel'], defaultButton='Ascending',
+                                cancelButton='Cancel', dismissString='Cancel')
+    if result == 'Cancel':
+        return
+
+    sort_selected_items(reverse=result == 'Descending')
+
+
+@profiled
+@transaction
+def sort_selected_items(reverse=False, dry_run=False):
+    """
+    It sorts alphabetically the user defined attributes of the selected items.
+    If there are attributes selected in the channel box, only those attributes are sorted between the positions
+    they already occupy. Otherwise, all user defined attributes are sorted.
+    :param reverse: Boolean. If it is True, the attributes are sorted in descending order.
+    :param dry_run: Boolean. If it is True, nothing is sorted and the planned operations are returned.
+    :return: CostEstimate if dry_run is True.
+    """
+    estimate = CostEstimate('sort_attributes') if dry_run else None
+
+    selected_items = cmds.ls(sl=True)
+    if not selected_items:
+        print('Nothing Selected')
+        return estimate
+
+    selected_attributes = get_selected_attributes()
+
+    def get_target_order(layout):
+        if not selected_attributes:
+            return sorted(layout.attributes, key=sort_key_alphabetical, reverse=reverse)
+
+        attributes = get_top_level_attributes(layout.node, selected_attributes, layout)
+        slots = [pos for pos, attr in enumerate(layout.attributes) if attr in attributes]
+        sorted_attributes = sorted([layout.attributes[pos] for pos in slots], key=sort_key_alphabetical,
+                                   reverse=reverse)
+
+        target_order = list(layout.attributes)
+        for pos, attr in zip(slots, sorted_attributes):
+            target_order[pos] = attr
+        return target_order
+
+    plans = get_reorder_plans(selected_items, get_target_order)
+    if dry_run:
+        estimate_reorder(estimate, plans)
+        return estimate
+
+    if report_problems('Sort Attributes', check_reorder_plans(plans)):
+        return
+
+    def on_finish(job):
+        if job.status == 'done' and selected_attributes:
+            select_attributes(selected_attributes, selected_items)
+
+    run_job('Sort Attributes', get_plan_steps(plans), on_finish=on_finish)
+
+
+@profiled
+def copy_attribute(*args, **kwargs):
+    """
+    Saves the selected items and user defined attributes for copy to other item.
+    :param args: list of arguments
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True. Copy does not change the scene, so it is always empty.
+    """
+    if kwargs.get('dry_run', False):
+        return CostEstimate('copy_attributes')
+    save_selected_attributes('copy')
+
+
+@profiled
+def cut_attribute(*args, **kwargs):
+    """
+    Saves the selected items and user defined attributes for move to other item.
+    :param args: list of arguments
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True. Cut does not change the scene until the paste, so it is always empty.
+    """
+    if kwargs.get('dry_run', False):
+        return CostEstimate('cut_attributes')
+    save_selected_attributes('cut')
+
+
+def save_selected_attributes(mode):
+    """
+    Saves a snapshot of the selected user defined attributes for copy or move to other item.
+    The snapshot does not depend on the source item, so it can be pasted after the source is renamed or deleted.
+    :param mode: string. 'copy' to copy the attributes. Or 'cut' to move the attributes
+    """
+    global __jlr_copy_data
+    global __jlr_copy_mode
+
+    if not cmds.ls(sl=True):
+        cmds.warning("Nothing selected.")
+        return
+
+    source_item = cmds.ls(sl=True)[-1]
+    all_selected_attr = get_selected_attributes()
+
+    if not all_selected_attr:
+        cmds.warning("No attribute is selected.")
+        return
+
+    ud_selected_attr = get_top_level_attributes(source_item, all_selected_attr)
+
+    if not ud_selected_attr:
+        cmds.warning("No user defined attribute is selected.")
+        return
+
+    __jlr_copy_data = capture_attributes(source_item, ud_selected_attr)
+    __jlr_copy_mode = mode
+
+
+@profiled
+@transaction
+def paste_attribute(*args, **kwargs):
+    """
+    Copies or Moves the saved attributes to all selected objects.
+    :param args: list of arguments
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it. If the pre-flight
+    check fails, the estimate has no operations and lists the problems.
+    :return: CostEstimate if dry_run is True.
+    """
+    global __jlr_copy_data
+    global __jlr_copy_mode
+
+    estimate = CostEstimate('paste_attributes') if kwargs.get('dry_run', False) else None
+
+    if not cmds.ls(sl=True):
+        cmds.warning("Nothing selected.")
+        return estimate
+
+    if not __jlr_copy_data:
+        cmds.warning("There are no attributes to paste.")
+        return estimate
+
+    target_items = cmds.ls(sl=True)
+    move_attr = __jlr_copy_mode == 'cut'
+
+    problems = check_paste(__jlr_copy_data, target_items, move=move_attr)
+    if estimate is not None:
+        if problems:
+            estimate.problems.extend(problems)
+            return estimate
+
+        estimate_paste(estimate, __jlr_copy_data, target_items, move=move_attr)
+        return estimate
+
+    if report_problems('Paste Attributes', problems):
+        return
+
+    def on_finish(job):
+        if job.status == 'done':
+            cmds.select(target_items)
+
+    if should_run_as_job(len(target_items) * len(__jlr_copy_data)):
+        AttributeJob('Paste Attributes', get_paste_steps(__jlr_copy_data, target_items, move=move_attr),
+                     on_finish=on_finish).start()
+        return
+
+    paste_snapshots(__jlr_copy_data, target_items, move=move_attr)
+
+    cmds.select(target_items)
+
+
+@profiled
+@transaction
+def add_divider_attribute(*args, **kwargs):
+    """
+    Adds a divider attribute in the ChannelBox of the selected items.
+    If there are attributes selected in the channel box, the divider is placed above the first of them. Otherwise,
+    it is added at the end.
+    :param args: list of arguments
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it. If the pre-flight
+    check fails, the estimate has no operations and lists the problems.
+    :return: CostEstimate if dry_run is True.
+    """
+    dry_run = kwargs.get('dry_run', False)
+    estimate = CostEstimate('add_divider') if dry_run else None
+
+    selected_items = cmds.ls(sl=True)
+    if not selected_items:
+        print('Nothing Selected')
+        return estimate
+
+    selected_attributes = get_selected_attributes()
+    positions = selected_attributes[:1] or [None]
+
+    plans = list()
+    problems = list()
+    for item in selected_items:
+        layout = NodeLayout(item)
+        target_order, created = plan_divider_insertion(layout, positions)
+        problems.extend(check_divider_insertion(item, layout, target_order, created))
+        plans.append((item, layout, target_order, created))
+
+    if dry_run:
+        if problems:
+            estimate.problems.extend(problems)
+            return estimate
+
+        for item, layout, target_order, created in plans:
+            for attr_name in created:
+                estimate.add('add_attr', '{}.{}'.format(item, attr_name), attributes_created=1)
+            plan = plan_reorder(layout.attributes + created, target_order)
+            estimate_reorder(estimate, [(item, [attr for attr in plan if attr not in created])])
+        return estimate
+
+    if report_problems('Add Divider', problems):
+        return
+
+    insert_dividers(selected_items, positions)
+    if selected_attributes:
+        select_attributes(selected_attributes, selected_items)
+
+
+@profiled
+@transaction
+def renumber_divider_attributes(*args, **kwargs):
+    """
+    Renames the dividers of the selected items as divider00, divider01... in the order they are shown.
+    :param args: list of arguments
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    selected_items = cmds.ls(sl=True)
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('renumber_dividers')
+        backend = get_backend()
+        for item in selected_items:
+            for divider, new_name in plan_divider_renumbering(NodeLayout(item)):
+                plug = '{}.{}'.format(item, divider)
+                temporary_plug = '{}.{}'.format(item, get_temporary_divider_name(divider))
+                locks_toggled = 2 if backend.is_locked(plug) else 0
+                estimate.add('rename_attr', (plug, temporary_plug), renames=1, locks_toggled=locks_toggled)
+                estimate.add('rename_attr', (temporary_plug, '{}.{}'.format(item, new_name)), renames=1,
+                             locks_toggled=locks_toggled)
+        return estimate
+
+    renumber_dividers(selected_items)
+
+
+@profiled
+@transaction
+def delete_divider_attributes(*args, **kwargs):
+    """
+    Deletes all the dividers of the selected items.
+    :param args: list of arguments
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    selected_items = cmds.ls(sl=True)
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('delete_dividers')
+        for item in selected_items:
+            for divider in NodeLayout(item).attributes:
+                if is_divider(divider):
+                    estimate.add('delete_attr', '{}.{}'.format(item, divider), attributes_deleted=1)
+        return estimate
+
+    strip_dividers(selected_items)
+
+
+@profiled
+@transaction
+def lock_trs_attributes(*args, **kwargs):
+    """
+    Locks the translate, rotation and scale attributes.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('lock_trs_attributes')
+        estimate_channels(estimate, get_channel_plugs(cmds.ls(sl=True), 'trs'), lock=True)
+        return estimate
+
+    lock_channels(cmds.ls(sl=True), 'trs')
+
+
+@profiled
+@transaction
+def unlock_trs_attributes(*args, **kwargs):
+    """
+    Unlocks the translate, rotation and scale attributes.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('unlock_trs_attributes')
+        estimate_channels(estimate, get_channel_plugs(cmds.ls(sl=True), 'trs'), lock=False)
+        return estimate
+
+    unlock_channels(cmds.ls(sl=True), 'trs')
+
+
+@profiled
+@transaction
+def hide_trs_attributes(*args, **kwargs):
+    """
+    Hides the translate, rotation and scale attributes from the channel box.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('hide_trs_attributes')
+        estimate_channels(estimate, get_channel_plugs(cmds.ls(sl=True), 'trs'), keyable=False, channel_box=False)
+        return estimate
+
+    hide_channels(cmds.ls(sl=True), 'trs')
+
+
+@profiled
+@transaction
+def show_trs_attributes(*args, **kwargs):
+    """
+    Shows the translate, rotation and scale attributes in the channel box as keyable attributes.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True.
+    """
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('show_trs_attributes')
+        estimate_channels(estimate, get_channel_plugs(cmds.ls(sl=True), 'trs'), keyable=True)
+        return estimate
+
+    show_channels(cmds.ls(sl=True), 'trs')
+
+
+@profiled
+@transaction
+def cleanup_shared_connections(*args, **kwargs):
+    """
+    It simplifies the nodes created by the shared connections of Copy and Paste Attributes.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of the command instead of running it.
+    :return: CostEstimate if dry_run is True. The estimate only covers the first pass of collapse_shared_blends.
+    """
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('cleanup_shared_connections')
+        blends = get_shared_blends()
+        channels = dict((node, get_shared_channels(node)) for node in blends)
+        signatures = dict()
+        for node in blends:
+            replacements = plan_blend_collapse(node, channels, signatures)
+            if replacements is None:
+                continue
+            for sources, size, targets in replacements:
+                if len(sources) > 1:
+                    estimate.add('create_node', SHARED_BLEND_TYPE, nodes_created=1)
+                    for source in sources:
+                        estimate.add('connect', (source, SHARED_BLEND_TYPE), connections_remade=1)
+                    sources = [SHARED_BLEND_TYPE]
+                for source in sources[:1]:
+                    for target in targets:
+                        estimate.add('connect', (source, target), connections_remade=1)
+            estimate.add('delete_node', node, nodes_deleted=1)
+        return estimate
+
+    removed = collapse_shared_blends()
+    print('{} shared connection nodes removed.'.format(len(removed)))
+
+
+#########################################
+# Channel methods
+#########################################
+
+CHANNEL_PRESETS = {
+    'translate': ['tx', 'ty', 'tz'],
+    'rotate': ['rx', 'ry', 'rz'],
+    'scale': ['sx', 'sy', 'sz'],
+    'trs': ['tx', 'ty', 'tz', 'rx', 'ry', 'rz', 'sx', 'sy', 'sz'],
+    'visibility': ['v'],
+}
+CHANNEL_BATCH_SIZE = 1000
+
+
+def get_channel_plugs(nodes, channels):
+    """
+    It resolves channel presets and attribute names to the existing plugs of the nodes with a single ls query.
+    :param nodes: list of nodes.
+    :param channels: String or list with names of CHANNEL_PRESETS, attribute names or 'user' for the user defined
+    attributes of each node.
+    :return: list with the names of the plugs that exist.
+    """
+    if check_string(channels):
+        channels = [channels]
+
+    plugs = collections.OrderedDict()
+    for node in nodes:
+        node = str(node)
+        for channel in channels:
+            if channel == 'user':
+                attributes = get_backend().list_user_attributes(node)
+            else:
+                attributes = CHANNEL_PRESETS.get(channel, [channel])
+
+            for attr in attributes:
+                plugs['{}.{}'.format(node, attr)] = None
+
+    if not plugs:
+        return []
+    return cmds.ls(list(plugs)) or []
+
+
+@profiled
+def set_channel_states(plugs, lock=None, keyable=None, channel_box=None, batch_size=None):
+    """
+    It sets the lock, keyable and channel box status of many plugs with one mel.eval for each batch of plugs,
+    instead of one setAttr call per plug and status. The status that are None are not changed.
+    :param plugs: list with the plug names.
+    :param lock: Boolean.
+    :param keyable: Boolean.
+    :param channel_box: Boolean. Only used by Maya for the attributes that are not keyable.
+    :param batch_size: int. Number of plugs of each mel.eval. By default, CHANNEL_BATCH_SIZE.
+    :return: int. Number of plugs set.
+    """
+    flags = ''.join(' -{} {}'.format(flag, int(value)) for flag, value in
+                    [('lock', lock), ('keyable', keyable), ('channelBox', channel_box)] if value is not None)
+    if not flags or not plugs:
+        return 0
+
+    batch_size = batch_size or CHANNEL_BATCH_SIZE
+    for start in range(0, len(plugs), batch_size):
+        mel.eval(''.join('setAttr{} "{}";'.format(flags, plug) for plug in plugs[start:start + batch_size]))
+
+    return len(plugs)
+
+
+@profiled
+@transaction
+def set_channels(nodes=None, channels='trs', lock=None, keyable=None, channel_box=None):
+    """
+    It sets the lock, keyable and channel box status of the channels of many nodes at once.
+    :param nodes: list of nodes. By default, the selected nodes.
+    :param channels: String or list with names of CHANNEL_PRESETS, attribute names or 'user'.
+    :param lock: Boolean.
+    :param keyable: Boolean.
+    :param channel_box: Boolean.
+    :return: int. Number of plugs set.
+    """
+    if nodes is None:
+        nodes = cmds.ls(sl=True)
+
+    return set_channel_states(get_channel_plugs(nodes, channels), lock=lock, keyable=keyable,
+                              channel_box=channel_box)
+
+
+def lock_channels(nodes=None, channels='trs'):
+    """
+    :param nodes: list of nodes. By default, the selected nodes.
+    :param channels: String or list with names of CHANNEL_PRESETS, attribute names or 'user'.
+    :return: int. Number of plugs locked.
+    """
+    return set_channels(nodes, channels, lock=True)
+
+
+def unlock_channels(nodes=None, channels='trs'):
+    """
+    :param nodes: list of nodes. By default, the selected nodes.
+    :param channels: String or list with names of CHANNEL_PRESETS, attribute names or 'user'.
+    :return: int. Number of plugs unlocked.
+    """
+    return set_channels(nodes, channels, lock=False)
+
+
+def hide_channels(nodes=None, channels='trs'):
+    """
+    :param nodes: list of nodes. By default, the selected nodes.
+    :param channels: String or list with names of CHANNEL_PRESETS, attribute names or 'user'.
+    :return: int. Number of plugs hidden.
+    """
+    return set_channels(nodes, channels, keyable=False, channel_box=False)
+
+
+def show_channels(nodes=None, channels='trs'):
+    """
+    :param nodes: list of nodes. By default, the selected nodes.
+    :param channels: String or list with names of CHANNEL_PRESETS, attribute names or 'user'.
+    :return: int. Number of plugs shown.
+    """
+    return set_channels(nodes, channels, keyable=True)
+
+
+#########################################
+# Layout templates
+#########################################
+
+LAYOUT_TEMPLATES_OPTION_VAR = 'jlrSortAttributesLayoutTemplates'
+
+
+def get_layout_templates():
+    """
+    The layout templates are stored in an optionVar, so they are kept between Maya sessions.
+    :return: dictionary with the attribute order of each template name.
+    """
+    import json
+
+    if not cmds.optionVar(exists=LAYOUT_TEMPLATES_OPTION_VAR):
+        return dict()
+    return json.loads(cmds.optionVar(q=LAYOUT_TEMPLATES_OPTION_VAR))
+
+
+def set_layout_templates(templates):
+    """
+    :param templates: dictionary with the attribute order of each template name.
+    """
+    import json
+
+    cmds.optionVar(stringValue=(LAYOUT_TEMPLATES_OPTION_VAR, json.dumps(templates, sort_keys=True)))
+
+
+def get_layout_template(name):
+    """
+    :param name: String. Name of the template.
+    :return: list with the attribute order of the template.
+    """
+    templates = get_layout_templates()
+    if name not in templates:
+        raise ValueError('Unknown layout template {}.'.format(name))
+    return templates[name]
+
+
+def save_layout_template(name, node=None, order=None):
+    """
+    It saves a named layout template with the order of the user defined attributes of a node or an explicit order.
+    :param name: String. Name of the template. An existing template with the same name is replaced.
+    :param node: String or dagNode. Node whose current order is saved.
+    :param order: list with the names of the attributes in the wanted order.
+    :return: list with the saved order.
+    """
+    if (node is None) == (order is None):
+        raise ValueError('save_layout_template needs a node or an order.')
+
+    if node is not None:
+        order = NodeLayout(node).attributes
+
+    templates = get_layout_templates()
+    templates[name] = list(order)
+    set_layout_templates(templates)
+    return templates[name]
+
+
+def delete_layout_template(name):
+    """
+    :param name: String. Name of the template.
+    """
+    templates = get_layout_templates()
+    templates.pop(name, None)
+    set_layout_templates(templates)
+
+
+@profiled
+@transaction
+def apply_layout_template(name, nodes, engine=None):
+    """
+    It sorts the user defined attributes of many nodes with a named layout template.
+    The attributes of the template are placed first in its order and the rest keep their order after them, like
+    sort_attributes with an order. The reorder plan is computed once for each group of nodes with the same layout.
+    :param name: String. Name of the template.
+    :param nodes: list of nodes.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: Boolean. False if some attribute could not be moved.
+    """
+    order = get_layout_template(name)
+
+    def get_target_order(layout):
+        listed = get_top_level_attributes(layout.node, order, layout)
+        return listed + [attr for attr in layout.attributes if attr not in listed]
+
+    return reorder_node_groups(nodes, get_target_order, engine=engine)
+
+
+#########################################
+# Divider methods
+#########################################
+
+DIVIDER_PREFIX = 'divider'
+
+
+class DividerIndex(object):
+    """
+    Index of the divider numbers used by the attribute names of a node. It finds free divider names without listing
+    the attributes again, and the search for the next free number only goes forward until a number is released.
+    """
+
+    def __init__(self, names=()):
+        """
+        :param names: list with the long and short names of the attributes of the node.
+        """
+        self.numbers = set()
+        self.next_free = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, attr_name):
+        """
+        :param attr_name: String. A new attribute name of the node. It is ignored if it is not a divider name.
+        """
+        if is_divider(attr_name):
+            self.numbers.add(int(attr_name[len(DIVIDER_PREFIX):]))
+
+    def discard(self, attr_name):
+        """
+        :param attr_name: String. An attribute name that is no longer used in the node.
+        """
+        if is_divider(attr_name):
+            number = int(attr_name[len(DIVIDER_PREFIX):])
+            self.numbers.discard(number)
+            self.next_free = min(self.next_free, number)
+
+    def copy(self):
+        """
+        :return: DividerIndex with the same numbers.
+        """
+        index = DividerIndex()
+        index.numbers = set(self.numbers)
+        index.next_free = self.next_free
+        return index
+
+    def next_name(self):
+        """
+        :return: String. First divider name that is not used in the node. It is not reserved until it is added.
+        """
+        while self.next_free in self.numbers:
+            self.next_free += 1
+        return get_divider_attr_name(self.next_free)
+
+
+def get_divider_attr_name(number):
+    """
+    :param number: int.
+    :return: String. Name of the divider with that number.
+    """
+    return DIVIDER_PREFIX + str(number).zfill(2)
+
+
+def get_divider_name(layout):
+    """
+    :param layout: NodeLayout of a node.
+    :return: String. First divider name that is not used in the node.
+    """
+    return layout.dividers.next_name()
+
+
+def get_divider_data(attr_name):
+    """
+    :param attr_name: String. Name of the divider.
+    :return: dictionary with the data to create a divider attribute.
+    """
+    d_data = dict()
+    d_data['longName'] = str(attr_name)
+    d_data['attributeType'] = 'enum'
+    d_data['niceName'] = str(' ')
+    d_data['hidden'] = False
+    d_data['keyable'] = True
+    d_data['enumName'] = (str('-' * 15))
+    return d_data
+
+
+def create_divider(node, layout=None):
+    """
+    It creates a divider attribute at the end of the user defined attributes of a node.
+    :param node: String or dagNode.
+    :param layout: NodeLayout of the node. If it is passed, it is updated with the new divider.
+    :return: String. Name of the divider attribute.
+    """
+    if layout is None:
+        layout = NodeLayout(node)
+
+    d_data = get_divider_data(get_divider_name(layout))
+    create_attr(node, d_data)
+    layout.add(d_data)
+
+    return d_data['longName']
+
+
+def plan_divider_insertion(layout, positions):
+    """
+    It computes the dividers to create in a node and the order of its attributes with them in place, without
+    changing the node. No divider is placed where there is one already.
+    :param layout: NodeLayout of the node.
+    :param positions: list with the names of the attributes a divider is placed above. None places it at the end.
+    :return: tuple with the target order and the list with the names of the new dividers.
+    """
+    above = set(layout.resolve(position) for position in positions if position is not None)
+    index = layout.dividers.copy()
+
+    target_order = list()
+    created = list()
+
+    def add_divider():
+        if target_order and is_divider(target_order[-1]):
+            return
+        name = index.next_name()
+        index.add(name)
+        created.append(name)
+        target_order.append(name)
+
+    for attr in layout.attributes:
+        if attr in above:
+            add_divider()
+        target_order.append(attr)
+
+    if None in positions:
+        add_divider()
+
+    return target_order, created
+
+
+def check_divider_insertion(node, layout, target_order, created, engine=None):
+    """
+    Pre-flight check of the insertion of dividers in a node. The node only needs to allow deletions if some
+    attributes have to be rebuilt to put the dividers in place.
+    :param node: String. Node name.
+    :param layout: NodeLayout of the node.
+    :param target_order: list with the order of the attributes with the new dividers, from plan_divider_insertion.
+    :param created: list with the names of the new dividers.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: list of Strings with the problems found.
+    """
+    plan = [attr for attr in plan_reorder(layout.attributes + created, target_order) if attr not in created]
+    problems = get_node_problems(node, delete_attributes=False)
+    if not problems:
+        problems = check_reorder_plans([(node, plan)], engine=engine)
+    return problems
+
+
+@profiled
+@transaction
+def insert_dividers(nodes, positions, engine=None):
+    """
+    It inserts dividers in many nodes in one pass. The dividers of each node are created at the end and then the
+    attributes are reordered once to put them in place.
+    :param nodes: list of nodes.
+    :param positions: list with the names of the attributes a divider is placed above. None places it at the end.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: dictionary with the names of the new dividers of each node. The nodes that do not pass the pre-flight
+    check are skipped with a warning.
+    """
+    created_dividers = dict()
+    for node in nodes:
+        node = str(node)
+        layout = NodeLayout(node)
+        target_order, created = plan_divider_insertion(layout, positions)
+        problems = check_divider_insertion(node, layout, target_order, created, engine=engine)
+        if problems:
+            for problem in problems:
+                cmds.warning(problem)
+            continue
+
+        for attr_name in created:
+            d_data = get_divider_data(attr_name)
+            create_attr(node, d_data)
+            layout.add(d_data)
+
+        if not reorder_attributes(node, target_order, layout, engine=engine):
+            raise RuntimeError('The attributes of {} could not be reordered.'.format(node))
+        created_dividers[node] = created
+
+    return created_dividers
+
+
+def plan_divider_renumbering(layout):
+    """
+    :param layout: NodeLayout of a node.
+    :return: list of tuples with the name of each divider that has to be renamed and its new name, so the dividers
+    are numbered from 00 in the order they are shown.
+    """
+    dividers = [attr for attr in layout.attributes if is_divider(attr)]
+    return [(divider, get_divider_attr_name(number)) for number, divider in enumerate(dividers)
+            if divider != get_divider_attr_name(number)]
+
+
+def get_temporary_divider_name(divider):
+    """
+    :param divider: String. Name of a divider.
+    :return: String. Name given to the divider in the first pass of renumber_dividers.
+    """
+    return 'jlrRenumber_{}'.format(divider)
+
+
+@profiled
+@transaction
+def renumber_dividers(nodes):
+    """
+    It renames the dividers of many nodes as divider00, divider01... in the order they are shown.
+    The attributes are renamed in two passes, first to temporary names and then to the final ones, so a new name
+    never collides with a divider that has not been renamed yet. The attributes are not rebuilt.
+    :param nodes: list of nodes.
+    :return: int. Number of renamed dividers.
+    """
+    renamed = 0
+    for node in nodes:
+        node = str(node)
+        layout = NodeLayout(node)
+        renames = plan_divider_renumbering(layout)
+
+        temporary_names = list()
+        for divider, new_name in renames:
+            temporary_name = get_temporary_divider_name(divider)
+            rename_plug_attribute('{}.{}'.format(node, divider), temporary_name)
+            layout.rename(divider, temporary_name)
+            temporary_names.append(temporary_name)
+
+        for temporary_name, (divider, new_name) in zip(temporary_names, renames):
+            rename_plug_attribute('{}.{}'.format(node, temporary_name), new_name)
+            layout.rename(temporary_name, new_name)
+
+        renamed += len(renames)
+
+    return renamed
+
+
+@profiled
+@transaction
+def strip_dividers(nodes):
+    """
+    It deletes all the dividers of many nodes.
+    :param nodes: list of nodes.
+    :return: int. Number of deleted dividers.
+    """
+    deleted = 0
+    for node in nodes:
+        node = str(node)
+        for divider in get_layout_signature(node):
+            if not is_divider(divider):
+                continue
+            delete_plug_attribute('{}.{}'.format(node, divider), unlock=True)
+            deleted += 1
+
+    return deleted
+
+
+#########################################
+# Audit methods
+#########################################
+
+AUDIT_NODE_TYPES = ['transform']
+
+
+class LayoutMismatch(collections.namedtuple('LayoutMismatch', ['node', 'reference', 'expected', 'current'])):
+    """
+    A node whose user defined attributes are in a different order than the other nodes with the same attributes.
+    The orders are tuples with the long names of the attributes, compound children included, and DIVIDER_TOKEN in
+    place of each divider.
+    node: String. Node name.
+    reference: String. First node with the expected order.
+    expected: tuple with the order of most nodes of the group.
+    current: tuple with the order of the node.
+    """
+    __slots__ = ()
+
+
+def iter_attribute_orders(node_types=None, nodes=None):
+    """
+    It yields the order of the user defined attributes of the nodes one by one. Only one listAttr is run for each
+    node and no NodeLayout or PyNode is built, so it can go through big scenes.
+    The nodes without user defined attributes are skipped.
+    :param node_types: list of node types. By default, AUDIT_NODE_TYPES.
+    :param nodes: list of nodes. If it is passed, node_types is ignored.
+    :return: generator of tuples with the node name and the order of its attributes, with DIVIDER_TOKEN in place of
+    each divider.
+    """
+    if nodes is None:
+        nodes = cmds.ls(type=node_types or AUDIT_NODE_TYPES, long=True) or []
+
+    for node in nodes:
+        order = get_layout_signature(node)
+        if order:
+            yield str(node), tuple(DIVIDER_TOKEN if is_divider(attr) else attr for attr in order)
+
+
+@profiled
+def audit_attribute_layouts(node_types=None, nodes=None):
+    """
+    It groups the nodes by their set of user defined attributes and finds the nodes whose attributes are in a
+    different order than most nodes of their group, like a left control that does not match the right one or a
+    divider in another place. The divider numbers are ignored.
+    :param node_types: list of node types. By default, AUDIT_NODE_TYPES.
+    :param nodes: list of nodes. If it is passed, node_types is ignored.
+    :return: list of LayoutMismatch.
+    """
+    groups = collections.OrderedDict()
+    for node, order in iter_attribute_orders(node_types, nodes):
+        attribute_set = frozenset(attr for attr in order if attr != DIVIDER_TOKEN)
+        groups.setdefault(attribute_set, collections.OrderedDict()).setdefault(order, list()).append(node)
+
+    mismatches = list()
+    for orders in groups.values():
+        if len(orders) < 2:
+            continue
+
+        # The most common order wins. With a tie, the first one found.
+        expected = max(orders, key=lambda order: len(orders[order]))
+        reference = orders[expected][0]
+        for order, members in orders.items():
+            if order != expected:
+                mismatches.extend(LayoutMismatch(node, reference, expected, order) for node in members)
+
+    return mismatches
+
+
+@profiled
+@transaction
+def fix_layout_mismatches(mismatches, engine=None):
+    """
+    It sorts the attributes of the nodes of an audit like their reference node. The dividers are reused, created
+    or deleted to match the reference, see apply_layout_spec.
+    :param mismatches: list of LayoutMismatch.
+    :param engine: String. Name of the reorder engine. If it is None, the engine set with set_reorder_engine.
+    :return: list with the names of the changed nodes. The nodes that do not pass the pre-flight check are skipped
+    with a warning.
+    """
+    changed = list()
+    for mismatch in mismatches:
+        spec = {'order': list(mismatch.expected), 'engine': engine}
+        layout = NodeLayout(mismatch.node)
+        problems = check_layout_spec(mismatch.node, spec, layout)
+        if problems:
+            for problem in problems:
+                cmds.warning(problem)
+            continue
+
+        if _apply_layout_spec(mismatch.node, spec, layout):
+            changed.append(mismatch.node)
+
+    return changed
+
+
+@profiled
+def audit_layouts(*args, **kwargs):
+    """
+    It audits the attribute layouts of the nodes with the types of the selected items, or of all transforms if
+    nothing is selected. The mismatches are printed and a dialog offers to fix or select them.
+    :param args: list of arguments.
+    :param kwargs: dry_run=True returns the CostEstimate of fixing the mismatches instead of showing the dialog.
+    The dividers that would be created or deleted are not estimated.
+    :return: CostEstimate if dry_run is True.
+    """
+    selected_items = cmds.ls(sl=True)
+    node_types = sorted(set(cmds.nodeType(item) for item in selected_items)) or AUDIT_NODE_TYPES
+    mismatches = audit_attribute_layouts(node_types)
+
+    if kwargs.get('dry_run', False):
+        estimate = CostEstimate('audit_layouts')
+        by_expected = dict()
+        for mismatch in mismatches:
+            by_expected.setdefault(mismatch.expected, list()).append(mismatch.node)
+
+        for expected, nodes in by_expected.items():
+            def get_target_order(layout):
+                listed = [attr for attr in expected if layout.resolve(attr) == attr]
+                return listed + [attr for attr in layout.attributes if attr not in listed]
+
+            estimate_reorder(estimate, get_reorder_plans(nodes, get_target_order))
+        return estimate
+
+    if not mismatches:
+        print('All attribute layouts match.')
+        return
+
+    for mismatch in mismatches:
+        print('{} does not match the attribute order of {}.'.format(mismatch.node, mismatch.reference))
+
+    result = cmds.confirmDialog(title='Audit Attribute Layouts',
+                                message='{} nodes have a different attribute order.'.format(len(mismatches)),
+                                button=['Fix', 'Select', 'Cancel'], defaultButton='Fix', cancelButton='Cancel',
+                                dismissString='Cancel')
+    if result == 'Fix':
+        changed = fix_layout_mismatches(mismatches)
+        print('{} nodes fixed.'.format(len(changed)))
+    elif result == 'Select':
+        cmds.select([mismatch.node for mismatch in mismatches])
+
+
+#########################################
+# Batch methods
+#########################################
+
+DIVIDER_TOKEN = '---'
+BATCH_RESULT_PREFIX = 'JLR_BATCH_RESULT '
+
+
+def is_divider(attr_name):
+    """
+    :param attr_name: String.
+    :return: Boolean. True if the attribute name is a divider created by this script.
+    """
+    return bool(re.match(r'^divider\d+$', attr_name))
+
+
+@profiled
+@transaction
+def apply_layout_spec(node, spec, layout=None):
+    """
+    It applies a layout spec to a node, without any UI.
+    The spec is a dictionary with the wanted order of the attributes in the key 'order'. The value '---' in the
+    order is a divider. The dividers of the node are reused in order, the missing ones are created and, if
+    'strip_extra_dividers' is True (default), the extra ones are deleted. A divider is only placed if some of the
+    following attributes exists in the node. The attributes that are not in the order are kept after them.
+    The optional key 'engine' is the name of the reorder engine.
+    :param node: String or dagNode.
+    :param spec: dictionary with the layout spec.
+    :param layout: NodeLayout of the node. If it is None, a new one is built.
+    :return: Boolean. True if the node was changed.
+    """
+    node = str(node)
+    if layout is None:
+        layout = NodeLayout(node)
+
+    problems = check_layout_spec(node, spec, layout)
+    if problems:
+        raise RuntimeError('\n'.join(problems))
+
+    return _apply_layout_spec(node, spec, layout)
+
+
+def _apply_layout_spec(node, spec, layout):
+    original_order = list(layout.attributes)
+    target_order, new_dividers, extra_dividers = plan_layout_spec(spec, layout)
+
+    for divider in extra_dividers:
+        delete_plug_attribute('{}.{}'.format(node, divider), unlock=True)
+        layout.remove(divider)
+
+    for _ in new_dividers:
+        create_divider(node, layout)
+
+    if not reorder_attributes(node, target_order, layout, engine=spec.get('engine')):
+        raise RuntimeError('The attributes of {} could not be reordered.'.format(node))
+
+    return layout.attributes != original_order
+
+
+def plan_layout_spec(spec, layout):
+    """
+    It computes how a layout spec changes a node, without changing it. See apply_layout_spec.
+    :param spec: dictionary with the layout spec.
+    :param layout: NodeLayout of the node.
+    :return: tuple with the target order, the list with the names of the new dividers and the list with the
+    dividers to delete.
+    """
+    dividers = [attr for attr in layout.attributes if is_divider(attr)]
+
+    # Resolve the spec order, dropping the missing attributes and the dividers without attributes after them.
+    groups = [[]]
+    listed = set()
+    for entry in spec.get('order', []):
+        if entry == DIVIDER_TOKEN:
+            groups.append([])
+            continue
+        attr_name = layout.resolve(entry)
+        if attr_name and not is_divider(attr_name) and attr_name not in listed:
+            groups[-1].append(attr_name)
+            listed.add(attr_name)
+
+    index = layout.dividers.copy()
+    new_dividers = list()
+    target_order = list(groups[0])
+    for group in groups[1:]:
+        if not group:
+            continue
+        if dividers:
+            divider = dividers.pop(0)
+        else:
+            divider = index.next_name()
+            index.add(divider)
+            new_dividers.append(divider)
+        target_order.append(divider)
+        target_order.extend(group)
+
+    extra_dividers = dividers if spec.get('strip_extra_dividers', True) else []
+
+    placed = set(target_order + extra_dividers)
+    target_order.extend(attr for attr in layout.attributes if attr not in placed)
+    return target_order, new_dividers, extra_dividers
+
+
+def check_layout_spec(node, spec, layout=None):
+    """
+    Pre-flight check of a layout spec in a node. The node only needs to allow deletions if some attributes have
+    to be rebuilt or deleted.
+    :param node: String. Node name.
+    :param spec: dictionary with the layout spec.
+    :param layout: NodeLayout of the node. If it is None, a new one is built.
+    :return: list of Strings with the problems found.
+    """
+    node = str(node)
+    if not cmds.objExists(node):
+        return ['{} does not exist.'.format(node)]
+    if layout is None:
+        layout = NodeLayout(node)
+
+    target_order, new_dividers, extra_dividers = plan_layout_spec(spec, layout)
+    current_order = [attr for attr in layout.attributes if attr not in extra_dividers] + new_dividers
+    plan = [attr for attr in plan_reorder(current_order, target_order) if attr not in new_dividers]
+
+    problems = get_node_problems(node, delete_attributes=bool(extra_dividers))
+    if not problems:
+        problems = check_reorder_plans([(node, plan)], engine=spec.get('engine'))
+    return problems
+
+
+def get_spec_nodes(spec):
+    """
+    :param spec: dictionary with the layout spec. The optional key 'nodes' is a list of name patterns and the
+    optional key 'node_types' is a list of node types. By default, all transforms.
+    :return: list with the names of the nodes of the scene the spec is applied to.
+    """
+    patterns = spec.get('nodes') or []
+    node_types = spec.get('node_types') or ['transform']
+    return cmds.ls(*patterns, type=node_types) or []
+
+
+def normalize_file(path, spec, save=True):
+    """
+    It opens a scene file, applies a layout spec to its nodes and saves it.
+    :param path: String. Path of the scene file.
+    :param spec: dictionary with the layout spec. See apply_layout_spec and get_spec_nodes.
+    :param save: Boolean. Save the file if some node was changed.
+    :return: dictionary with the result: file, status ('ok' or 'error'), nodes, changed, skipped, problems, seconds
+    and error. The nodes that do not pass the pre-flight check are skipped and their problems are listed.
+    """
+    start = timeit.default_timer()
+    result = {'file': path, 'status': 'ok', 'nodes': 0, 'changed': 0, 'skipped': 0, 'problems': [], 'error': None}
+
+    try:
+        cmds.file(path, open=True, force=True)
+        nodes = get_spec_nodes(spec)
+        result['nodes'] = len(nodes)
+
+        for node in nodes:
+            layout = NodeLayout(node)
+            problems = check_layout_spec(node, spec, layout)
+            if problems:
+                result['skipped'] += 1
+                result['problems'].extend(problems)
+                continue
+
+            if _apply_layout_spec(node, spec, layout):
+                result['changed'] += 1
+
+        if save and result['changed']:
+            cmds.file(save=True, force=True)
+
+    except Exception as error:
+        result['status'] = 'error'
+        result['error'] = '{}: {}'.format(type(error).__name__, error)
+
+    result['seconds'] = round(timeit.default_timer() - start, 3)
+    return result
+
+
+def get_mayapy_path():
+    """
+    :return: String. Path of the mayapy executable of the Maya installation set in MAYA_LOCATION.
+    """
+    import os
+
+    maya_location = os.environ.get('MAYA_LOCATION')
+    if not maya_location:
+        raise RuntimeError('MAYA_LOCATION is not set. Pass the path of the mayapy executable.')
+
+    mayapy = os.path.join(maya_location, 'bin', 'mayapy.exe' if sys.platform == 'win32' else 'mayapy')
+    if not os.path.isfile(mayapy):
+        raise RuntimeError('{} does not exist. Pass the path of the mayapy executable.'.format(mayapy))
+    return mayapy
+
+
+def batch_normalize_files(paths, spec_path, workers=None, log_path=None, mayapy=None):
+    """
+    It applies a layout spec to many scene files. The files are split in one group per worker and each group is
+    processed by one mayapy process running this script, so Maya is only started once per worker.
+    :param paths: list with the paths of the scene files.
+    :param spec_path: String. Path of the json file with the layout spec.
+    :param workers: int. Number of worker processes. By default, the number of CPUs.
+    :param log_path: String. Path of a file where a json line with the result of each file is written.
+    :param mayapy: String. Path of the mayapy executable. By default, the one of the Maya installation set in
+    MAYA_LOCATION.
+    :return: list of dictionaries with the result of each file.
+    """
+    import json
+    import multiprocessing
+    import multiprocessing.pool
+    import subprocess
+    import threading
+
+    paths = list(paths)
+    if not paths:
+        return []
+
+    workers = min(workers or multiprocessing.cpu_count(), len(paths))
+    mayapy = mayapy or get_mayapy_path()
+    script = __file__.replace('.pyc', '.py')
+    chunks = [paths[i::workers] for i in range(workers)]
+
+    results = list()
+    lock = threading.Lock()
+    log_file = open(log_path, 'a') if log_path else None
+
+    def report(result):
+        with lock:
+            results.append(result)
+            print('{status:>5} {file} ({changed}/{nodes} nodes changed, {skipped} skipped)'.format(**result))
+            if log_file:
+                log_file.write(json.dumps(result) + '\n')
+                log_file.flush()
+
+    def run_worker(chunk):
+        command = [mayapy, script, 'normalize', '--spec', spec_path, '--worker'] + chunk
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        pending = list(chunk)
+        output = list()
+        for line in iter(process.stdout.readline, b''):
+            line = line.decode('utf-8', 'replace').rstrip('\r\n')
+            if not line.startswith(BATCH_RESULT_PREFIX):
+                output.append(line)
+                continue
+
+            result = json.loads(line[len(BATCH_RESULT_PREFIX):])
+            if result['file'] in pending:
+                pending.remove(result['file'])
+            report(result)
+        process.wait()
+
+        # The files without a result were not processed, because the worker crashed.
+        error = 'The worker exited with code {}:\n{}'.format(process.returncode, '\n'.join(output)[-2000:])
+        for path in pending:
+            report({'file': path, 'status': 'error', 'nodes': 0, 'changed': 0, 'skipped': 0, 'problems': [],
+                    'seconds': None, 'error': error})
+
+    pool = multiprocessing.pool.ThreadPool(workers)
+    try:
+        pool.map(run_worker, chunks)
+    finally:
+        pool.close()
+        pool.join()
+        if log_file:
+            log_file.close()
+
+    return results
+
+
+def main(argv=None):
+    """
+    Command line entry point, to run with mayapy:
+    mayapy jlr_sort_attributes.py normalize --spec layout.json --workers 4 --log results.jsonl scene1.ma scene2.mb
+    :param argv: list of arguments. By default, sys.argv.
+    :return: int. Exit code.
+    """
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog='jlr_sort_attributes')
+    subparsers = parser.add_subparsers(dest='command')
+    normalize_parser = subparsers.add_parser('normalize', help='Apply a layout spec to scene files.')
+    normalize_parser.add_argument('files', nargs='+', help='Scene files to process.')
+    normalize_parser.add_argument('--spec', required=True, help='Path of the json file with the layout spec.')
+    normalize_parser.add_argument('--workers', type=int, help='Number of worker processes.')
+    normalize_parser.add_argument('--log', help='Path of the json lines file with the result of each file.')
+    normalize_parser.add_argument('--mayapy', help='Path of the mayapy executable used by the workers.')
+    normalize_parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.command != 'normalize':
+        parser.print_help()
+        return 1
+
+    if not args.worker:
+        results = batch_normalize_files(args.files, args.spec, workers=args.workers, log_path=args.log,
+                                        mayapy=args.mayapy)
+        return int(any(result['status'] != 'ok' for result in results))
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    try:
+        with open(args.spec) as spec_file:
+            spec = json.load(spec_file)
+
+        for path in args.files:
+            print(BATCH_RESULT_PREFIX + json.dumps(normalize_file(path, spec)))
+            sys.stdout.flush()
+    finally:
+        maya.standalone.uninitialize()
+
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'normalize':
+        sys.exit(main())
 
-if __name__ == "__main__":
     create_menu_commands()
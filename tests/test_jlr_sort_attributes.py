@@ -0,0 +1,202 @@
+"""
+Behaviour tests of jlr_sort_attributes on the in-memory fake Maya DG of benchmarks/fake_maya.py.
+
+They check that a command that fails halfway puts the scene back as it was. Run them from the repository root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+
+SCENE = fake_maya.install()
+cmds = SCENE.cmds
+
+import jlr_sort_attributes
+
+
+def get_scene_state():
+    """
+    :return: tuple with the nodes, the connections and, for every user defined attribute, its name, value and lock.
+    """
+    attributes = list()
+    for node in sorted(SCENE.nodes):
+        for attr_name in cmds.listAttr(node, userDefined=True) or []:
+            plug = '{}.{}'.format(node, attr_name)
+            attributes.append((plug, cmds.getAttr(plug), cmds.getAttr(plug, lock=True)))
+    return sorted(SCENE.nodes), sorted(SCENE.inputs.items()), attributes
+
+
+class FakeSceneTestCase(unittest.TestCase):
+
+    def setUp(self):
+        SCENE.reset()
+        jlr_sort_attributes.clear_descriptor_cache()
+        jlr_sort_attributes.set_reorder_engine('rebuild')
+
+    def fail_on_call(self, name, call):
+        """
+        It replaces a function of the module by one that raises a RuntimeError on the given call.
+        :param name: String. Name of the function.
+        :param call: int. Number of the call that fails, starting at 1.
+        """
+        function = getattr(jlr_sort_attributes, name)
+        calls = [0]
+
+        def failing(*args, **kwargs):
+            calls[0] += 1
+            if calls[0] == call:
+                raise RuntimeError('{} failed'.format(name))
+            return function(*args, **kwargs)
+
+        setattr(jlr_sort_attributes, name, failing)
+        self.addCleanup(setattr, jlr_sort_attributes, name, function)
+
+    def select(self, nodes, attributes=None):
+        SCENE.selection = list(nodes)
+        SCENE.channel_box_selection = list(attributes or [])
+
+
+class TestPasteRollback(FakeSceneTestCase):
+
+    def setUp(self):
+        super(TestPasteRollback, self).setUp()
+        cmds.createNode('transform', name='src', skipSelect=True)
+        cmds.createNode('multiplyDivide', name='md', skipSelect=True)
+        cmds.addAttr('src', longName='a', attributeType='double', keyable=True)
+        cmds.addAttr('src', longName='b', attributeType='double', keyable=True)
+        cmds.setAttr('src.a', 3.0)
+        cmds.setAttr('src.b', 5.0)
+        cmds.connectAttr('src.a', 'md.input1X')
+        cmds.connectAttr('md.outputX', 'src.b')
+        cmds.setAttr('md.input1X', lock=True)
+        cmds.setAttr('src.b', lock=True)
+        for target in ['t0', 't1', 't2']:
+            cmds.createNode('transform', name=target, skipSelect=True)
+
+    def test_failure_mid_paste_restores_the_scene(self):
+        self.select(['src'], ['a', 'b'])
+        jlr_sort_attributes.copy_attribute()
+        before = get_scene_state()
+
+        self.fail_on_call('set_plug_value', 3)
+        self.select(['t0', 't1', 't2'])
+        self.assertRaises(RuntimeError, jlr_sort_attributes.paste_attribute)
+
+        self.assertEqual(get_scene_state(), before)
+
+    def test_failure_mid_cut_paste_restores_the_source(self):
+        self.select(['src'], ['a', 'b'])
+        jlr_sort_attributes.cut_attribute()
+        before = get_scene_state()
+
+        self.fail_on_call('set_plug_value', 2)
+        self.select(['t0', 't1'])
+        self.assertRaises(RuntimeError, jlr_sort_attributes.paste_attribute)
+
+        self.assertEqual(get_scene_state(), before)
+
+    def test_paste_onto_existing_names_is_rejected(self):
+        self.select(['src'], ['a'])
+        jlr_sort_attributes.copy_attribute()
+        self.select(['t0', 't1'])
+        jlr_sort_attributes.paste_attribute()
+        before = get_scene_state()
+
+        self.select(['t2', 't1'])
+        estimate = jlr_sort_attributes.paste_attribute(dry_run=True)
+        self.assertEqual(estimate.problems, ['t1 already has an attribute named a.'])
+
+        SCENE.counts.clear()
+        jlr_sort_attributes.paste_attribute()
+        self.assertEqual(SCENE.counts['addAttr'], 0)
+        self.assertEqual(get_scene_state(), before)
+
+
+class TestMoveRollback(FakeSceneTestCase):
+
+    def setUp(self):
+        super(TestMoveRollback, self).setUp()
+        cmds.createNode('transform', name='ctrl', skipSelect=True)
+        cmds.createNode('multiplyDivide', name='md', skipSelect=True)
+        for attr_name in 'abcdef':
+            cmds.addAttr('ctrl', longName=attr_name, attributeType='double', keyable=True)
+            cmds.setAttr('ctrl.' + attr_name, float(ord(attr_name)))
+        cmds.connectAttr('ctrl.c', 'md.input1X')
+        cmds.connectAttr('md.outputX', 'ctrl.e')
+        cmds.setAttr('md.input1X', lock=True)
+        cmds.setAttr('ctrl.d', lock=True)
+
+    def check_failure_mid_move(self, engine, name, call):
+        jlr_sort_attributes.set_reorder_engine(engine)
+        before = get_scene_state()
+
+        self.fail_on_call(name, call)
+        self.select(['ctrl'], ['b'])
+        self.assertRaises(RuntimeError, jlr_sort_attributes.move_down_attribute)
+
+        self.assertEqual(get_scene_state(), before)
+        self.assertEqual(cmds.listAttr('ctrl', userDefined=True), list('abcdef'))
+
+    def test_failure_mid_move_restores_the_node(self):
+        self.check_failure_mid_move('rebuild', '_connect_attr', 3)
+
+    def test_failure_mid_preserving_move_restores_the_node(self):
+        jlr_sort_attributes.set_reorder_engine('preserve')
+        before = get_scene_state()
+
+        delete_attr = cmds.deleteAttr
+        calls = [0]
+
+        def failing(*args, **kwargs):
+            calls[0] += 1
+            if calls[0] == 2:
+                raise RuntimeError('deleteAttr failed')
+            return delete_attr(*args, **kwargs)
+
+        cmds.deleteAttr = failing
+        self.addCleanup(setattr, cmds, 'deleteAttr', delete_attr)
+        self.select(['ctrl'], ['b'])
+        self.assertRaises(RuntimeError, jlr_sort_attributes.move_down_attribute)
+
+        self.assertEqual(get_scene_state(), before)
+        self.assertEqual(cmds.listAttr('ctrl', userDefined=True), list('abcdef'))
+
+    def test_failure_mid_sort_restores_the_node(self):
+        before = get_scene_state()
+
+        self.fail_on_call('_connect_attr', 2)
+        self.select(['ctrl'])
+        self.assertRaises(RuntimeError, jlr_sort_attributes.sort_selected_items, True)
+
+        self.assertEqual(get_scene_state(), before)
+        self.assertEqual(cmds.listAttr('ctrl', userDefined=True), list('abcdef'))
+
+
+class TestDryRun(FakeSceneTestCase):
+
+    def test_renumber_dividers_dry_run_counts_the_renames(self):
+        cmds.createNode('transform', name='ctrl', skipSelect=True)
+        self.select(['ctrl'])
+        jlr_sort_attributes.add_divider_attribute()
+        jlr_sort_attributes.add_divider_attribute()
+        divider = cmds.listAttr('ctrl', userDefined=True)[0]
+        jlr_sort_attributes.rename_plug_attribute('ctrl.{}'.format(divider), 'divider07')
+        before = get_scene_state()
+
+        SCENE.counts.clear()
+        estimate = jlr_sort_attributes.renumber_divider_attributes(dry_run=True)
+
+        self.assertEqual(estimate.summary['renames'], 2)
+        self.assertEqual(len(estimate.operations), 2)
+        self.assertEqual(SCENE.counts['undoInfo'], 0)
+        self.assertEqual(get_scene_state(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()